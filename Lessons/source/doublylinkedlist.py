@@ -153,17 +153,28 @@ class DoublyLinkedList(object):
 
     def append(self, item):
         """
-        Insert the given item at the tail of this linked list.
+        Insert the given item at the tail of this linked list and return
+        the new node holding it.
         Best and worst case running time: O(1) b/c tail pointer can easily
         grab end item and insert new item at end
         """
         # Create a new node to hold the given item
         new_node = DoublyNode(item)
+        self.append_node(new_node)
+        return new_node
+
+    def append_node(self, new_node):
+        """
+        Link the given node (not in any list) at the tail of this linked list.
+        Best and worst case running time: O(1) b/c of the tail pointer
+        """
         # increment size counter
         self.size += 1
+        new_node.next = None
         # Check if this linked list is empty
         if self.is_empty():
             # Assign head to new node
+            new_node.prev = None
             self.head = new_node
         else:
             # Otherwise insert new node after tail
@@ -279,11 +290,19 @@ class DoublyLinkedList(object):
         if node == None:
             raise ValueError('Item: {} not found in list'.format(item))
 
+        self.delete_node(node)
+
+    def delete_node(self, node):
+        """
+        Unlink the given node of this linked list.
+        Best and worst case running time: O(1) b/c the node already knows
+        its prev and next nodes so no traversal is needed
+        """
         # check if it is head or tail to reassign necessary values
-        if node == self.head:
+        if node is self.head:
             self.head = node.next
 
-        if node == self.tail:
+        if node is self.tail:
             self.tail = node.prev
 
         # reassign nodes pointers to skip over node
@@ -292,6 +311,9 @@ class DoublyLinkedList(object):
         if node.next is not None:
             node.next.prev = node.prev
 
+        # detach node so it can be linked into a list again
+        node.prev = None
+        node.next = None
         self.size -= 1  # decrement length counter
 
 
@@ -168,7 +168,7 @@ class HashTable(object):
             new_size = len(self.buckets) * 2  # Double size
 
         # Option to reduce size if buckets are sparsely filled(low load factor)
-        elif new_size is 0:
+        elif new_size == 0:
             new_size = len(self.buckets) / 2  # Half size
 
         # Get a list to temporarily hold all current key-value entries
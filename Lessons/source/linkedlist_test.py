@@ -179,6 +179,34 @@ class LinkedListTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             ll.delete('X')  # item not in list
 
+    def test_delete_node(self):
+        ll = DoublyLinkedList()
+        node_a = ll.append('A')
+        node_b = ll.append('B')
+        node_c = ll.append('C')
+        assert node_b.data == 'B'
+        ll.delete_node(node_b)
+        assert ll.items() == ['A', 'C']
+        assert node_a.next is node_c
+        assert node_c.prev is node_a
+        assert ll.size == 2
+        ll.delete_node(node_a)
+        assert ll.head is node_c  # new head
+        ll.delete_node(node_c)
+        assert ll.head is None
+        assert ll.tail is None
+        assert ll.size == 0
+
+    def test_append_node(self):
+        ll = DoublyLinkedList(['A', 'B', 'C'])
+        node = ll.head
+        ll.delete_node(node)
+        ll.append_node(node)  # move A from head to tail
+        assert ll.items() == ['B', 'C', 'A']
+        assert ll.tail is node
+        assert node.next is None
+        assert ll.size == 3
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+#!python
+
+
+class PriorityQueue(object):
+    """
+    Queue that always dequeues the item with the lowest priority, stored as
+    a binary min-heap in a list: the children of the entry at index i are at
+    2i + 1 and 2i + 2, and no entry has a lower priority than its parent.
+    Items with equal priorities are dequeued in the order they were enqueued.
+    """
+
+    def __init__(self, iterable=None):
+        """
+        Initialize this priority queue and enqueue the given (item, priority)
+        pairs, if any.
+        """
+        # Initialize a new list (dynamic array) to store the heap entries,
+        # each a tuple of (priority, enqueue order, item)
+        self.heap = list()
+        self.count = 0  # Number of items ever enqueued, to break ties
+        if iterable is not None:
+            for item, priority in iterable:
+                self.enqueue(item, priority)
+
+    def __repr__(self):
+        """Return a string representation of this priority queue."""
+        return 'PriorityQueue({} items, front={})'.format(self.length(),
+                                                         self.front())
+
+    def is_empty(self):
+        """Return True if this priority queue is empty, or False otherwise."""
+        return len(self.heap) == 0
+
+    def length(self):
+        """Return the number of items in this priority queue."""
+        return len(self.heap)
+
+    def enqueue(self, item, priority):
+        """
+        Insert the given item with the given priority into this queue.
+        Running time: O(log n) – the new entry is appended as a leaf and
+        swapped up past each parent with a higher priority
+        """
+        entry = (priority, self.count, item)
+        self.count += 1
+        heap = self.heap
+        heap.append(entry)
+        # sift the new entry up, moving parents down into the hole
+        index = len(heap) - 1
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[index] = heap[parent]
+            index = parent
+        heap[index] = entry
+
+    def front(self):
+        """Return the item with the lowest priority without removing it,
+        or None if this priority queue is empty."""
+        return self.heap[0][2] if not self.is_empty() else None
+
+    def front_priority(self):
+        """Return the lowest priority in this queue, or None if it is empty."""
+        return self.heap[0][0] if not self.is_empty() else None
+
+    def dequeue(self):
+        """
+        Remove and return the item with the lowest priority,
+        or raise ValueError if this priority queue is empty.
+        Running time: O(log n) – the last leaf replaces the root and is
+        swapped down past each child with a lower priority
+        """
+        heap = self.heap
+        if len(heap) == 0:
+            raise ValueError('Priority queue is empty')
+        item = heap[0][2]
+        last = heap.pop()
+        size = len(heap)
+        if size > 0:
+            # sift the last entry down from the root, moving the lower of
+            # each pair of children up into the hole
+            index = 0
+            child = 1
+            while child < size:
+                if child + 1 < size and heap[child + 1] < heap[child]:
+                    child += 1
+                if last <= heap[child]:
+                    break
+                heap[index] = heap[child]
+                index = child
+                child = 2 * index + 1
+            heap[index] = last
+        return item
@@ -0,0 +1,68 @@
+#!python
+
+from priorityqueue import PriorityQueue
+import random
+import unittest
+
+
+class PriorityQueueTest(unittest.TestCase):
+
+    def test_init(self):
+        q = PriorityQueue()
+        assert q.front() is None
+        assert q.front_priority() is None
+        assert q.length() == 0
+        assert q.is_empty() is True
+
+    def test_init_with_list(self):
+        q = PriorityQueue([('B', 2), ('A', 1), ('C', 3)])
+        assert q.front() == 'A'
+        assert q.front_priority() == 1
+        assert q.length() == 3
+        assert q.is_empty() is False
+
+    def test_enqueue(self):
+        q = PriorityQueue()
+        q.enqueue('B', 2)
+        assert q.front() == 'B'
+        assert q.length() == 1
+        q.enqueue('C', 3)
+        assert q.front() == 'B'
+        assert q.length() == 2
+        q.enqueue('A', 1)
+        assert q.front() == 'A'
+        assert q.length() == 3
+
+    def test_dequeue(self):
+        q = PriorityQueue([('C', 3), ('A', 1), ('B', 2)])
+        assert q.dequeue() == 'A'
+        assert q.length() == 2
+        assert q.dequeue() == 'B'
+        assert q.length() == 1
+        assert q.dequeue() == 'C'
+        assert q.length() == 0
+        assert q.is_empty() is True
+        with self.assertRaises(ValueError):
+            q.dequeue()
+
+    def test_equal_priorities(self):
+        q = PriorityQueue([('A', 1), ('B', 0), ('C', 1), ('D', 1)])
+        assert [q.dequeue() for _ in range(4)] == ['B', 'A', 'C', 'D']
+
+    def test_unorderable_items(self):
+        q = PriorityQueue([({'carrier': 'A'}, 0.02), ({'carrier': 'B'}, 0.02)])
+        assert q.dequeue() == {'carrier': 'A'}
+        assert q.dequeue() == {'carrier': 'B'}
+
+    def test_random_order(self):
+        rand = random.Random(7)
+        priorities = [rand.random() for _ in range(1000)]
+        q = PriorityQueue()
+        for index, priority in enumerate(priorities):
+            q.enqueue(index, priority)
+        order = [q.dequeue() for _ in range(len(priorities))]
+        assert [priorities[index] for index in order] == sorted(priorities)
+
+
+if __name__ == '__main__':
+    unittest.main()
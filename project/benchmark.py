@@ -0,0 +1,235 @@
+#!python
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from bucketroutes import LengthBucketRoutes
+from compacttrie import CompactRouteTrie
+from pricer import price_batch, BATCH_SIZE
+from radixroutes import RadixRoutes
+from routefile import MappedRouteTrie, write_index
+from routegen import generate_prefixes, generate_carriers, generate_numbers
+from routing import RouteTrie
+from sortedroutes import SortedRoutes
+from vectorpricer import VectorRouteIndex, np
+
+# Route counts benchmarked when none are given on the command line
+DEFAULT_SIZES = [10000, 100000, 1000000]
+# Phone numbers looked up per size to measure lookups per second
+LOOKUPS = 100000
+# Zipf exponent of how often numbers repeat in the batch benchmark, about
+# that of the callees in a call detail record (CDR) file
+ZIPF = 1.1
+
+
+def build_mapped(routes):
+    """
+    Return a MappedRouteTrie for the given routes. The compiled file is
+    removed once mapped, so its pages live only as long as the index.
+    """
+    handle, path = tempfile.mkstemp(suffix='.rtix')
+    os.close(handle)
+    try:
+        write_index(CompactRouteTrie(routes), path)
+        return MappedRouteTrie(path)
+    finally:
+        os.remove(path)
+
+
+# Every route index backend, mapping its name to a function that builds it
+# from a list of (prefix, cost) routes
+BACKENDS = {
+    'trie': RouteTrie,
+    'compact': CompactRouteTrie,
+    'mapped': build_mapped,
+    'buckets': LengthBucketRoutes,
+    'sorted': SortedRoutes,
+    'radix': RadixRoutes,
+}
+if np is not None:
+    BACKENDS['vector'] = VectorRouteIndex
+
+
+def cheapest_routes(carrier_routes):
+    """
+    Return a sorted list of (prefix, cost) routes keeping the cheapest cost
+    per prefix across the given carrier route lists.
+    Running time: O(r log r) for r routes across all carriers
+    """
+    cheapest = {}
+    for routes in carrier_routes:
+        for prefix, cost in routes:
+            if prefix not in cheapest or cost < cheapest[prefix]:
+                cheapest[prefix] = cost
+    return sorted(cheapest.items())
+
+
+def measure_build(build, routes):
+    """
+    Build an index from the given routes and return a tuple of (index,
+    seconds to build, bytes allocated by the build and still retained).
+    The index is built twice: once timed, once traced by tracemalloc,
+    because tracing slows allocation down too much to time it.
+    """
+    start = time.perf_counter()
+    index = build(routes)
+    seconds = time.perf_counter() - start
+    del index
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    index = build(routes)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return index, seconds, retained
+
+
+def measure_lookups(index, numbers):
+    """
+    Return how many of the given numbers the index prices per second, all
+    in one cost_array call if it prices whole arrays at once.
+    """
+    if hasattr(index, 'cost_array'):
+        start = time.perf_counter()
+        index.cost_array(numbers)
+        return len(numbers) / (time.perf_counter() - start)
+    cost = index.cost
+    start = time.perf_counter()
+    for number in numbers:
+        cost(number)
+    return len(numbers) / (time.perf_counter() - start)
+
+
+def measure_batches(index, numbers, batch_size=BATCH_SIZE):
+    """
+    Return how many of the given numbers price_batch prices per second,
+    batch_size numbers at a time.
+    """
+    start = time.perf_counter()
+    for first in range(0, len(numbers), batch_size):
+        price_batch(index, numbers[first:first + batch_size])
+    return len(numbers) / (time.perf_counter() - start)
+
+
+def benchmark_backend(build, routes, numbers):
+    """
+    Return a dict of build time, retained memory and lookups per second for
+    the backend built by the given function from the given routes.
+    """
+    index, seconds, retained = measure_build(build, routes)
+    result = {
+        'routes': len(routes),
+        'build_seconds': seconds,
+        'memory_bytes': retained,
+        'bytes_per_route': retained / len(routes) if routes else 0,
+        'lookups_per_second': measure_lookups(index, numbers),
+    }
+    if hasattr(index, 'close'):
+        index.close()
+    return result
+
+
+def run_benchmark(sizes, lookups=LOOKUPS, carriers=3, backends=None,
+                  seed=0):
+    """
+    Benchmark every backend (all of BACKENDS by default) on synthetic
+    datasets of each of the given numbers of prefixes merged from several
+    carriers. Return a list of result dicts that also name the backend.
+    """
+    if backends is None:
+        backends = BACKENDS
+    results = []
+    for size in sizes:
+        rand = random.Random(seed)
+        prefixes = generate_prefixes(size, rand)
+        routes = cheapest_routes(generate_carriers(prefixes, carriers, rand))
+        numbers = generate_numbers(lookups, prefixes, rand)
+        for name, build in backends.items():
+            result = benchmark_backend(build, routes, numbers)
+            result['backend'] = name
+            results.append(result)
+    return results
+
+
+def run_batch_benchmark(size, lookups=LOOKUPS, zipf=ZIPF, carriers=3,
+                        backends=None, seed=0):
+    """
+    Compare pricing numbers one at a time against price_batch on every
+    backend (all of BACKENDS that price one number at a time by default),
+    using a synthetic dataset of the given number of prefixes and numbers
+    that repeat like a CDR file with the given Zipf exponent. Return a list
+    of result dicts.
+    """
+    if backends is None:
+        # a vectorized backend prices a whole batch in one cost_array call
+        backends = {name: build for name, build in BACKENDS.items()
+                    if not hasattr(build, 'cost_array')}
+    rand = random.Random(seed)
+    prefixes = generate_prefixes(size, rand)
+    routes = cheapest_routes(generate_carriers(prefixes, carriers, rand))
+    numbers = generate_numbers(lookups, prefixes, rand, zipf=zipf)
+    results = []
+    for name, build in backends.items():
+        index = build(routes)
+        single = measure_lookups(index, numbers)
+        batched = measure_batches(index, numbers)
+        results.append({
+            'routes': len(routes),
+            'backend': name,
+            'distinct': len(set(numbers)),
+            'single_per_second': single,
+            'batch_per_second': batched,
+            'speedup': batched / single,
+        })
+        if hasattr(index, 'close'):
+            index.close()
+    return results
+
+
+def format_results(results):
+    """Return the given benchmark results as a text table."""
+    lines = ['{:>10} {:>10} {:>10} {:>12} {:>12} {:>14}'.format(
+        'routes', 'backend', 'build s', 'memory MB', 'bytes/route',
+        'lookups/s')]
+    for result in results:
+        lines.append('{routes:>10} {backend:>10} {build_seconds:>10.3f} '
+                     '{memory_mb:>12.2f} {bytes_per_route:>12.1f} '
+                     '{lookups_per_second:>14.0f}'.format(
+                         memory_mb=result['memory_bytes'] / 2 ** 20,
+                         **result))
+    return '\n'.join(lines)
+
+
+def format_batch_results(results):
+    """Return the given batch benchmark results as a text table."""
+    lines = ['{:>10} {:>10} {:>10} {:>14} {:>14} {:>8}'.format(
+        'routes', 'backend', 'distinct', 'single/s', 'batch/s', 'speedup')]
+    for result in results:
+        lines.append('{routes:>10} {backend:>10} {distinct:>10} '
+                     '{single_per_second:>14.0f} {batch_per_second:>14.0f} '
+                     '{speedup:>7.2f}x'.format(**result))
+    return '\n'.join(lines)
+
+
+def main():
+    """Benchmark every route index backend at the given sizes."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if args[:1] == ['--batch'] and len(args) <= 2 and \
+            all(arg.isdigit() for arg in args[1:]):
+        size = int(args[1]) if len(args) == 2 else DEFAULT_SIZES[1]
+        print(format_batch_results(run_batch_benchmark(size, LOOKUPS * 10)))
+    elif all(arg.isdigit() for arg in args):
+        sizes = [int(arg) for arg in args] or DEFAULT_SIZES
+        print(format_results(run_benchmark(sizes)))
+    else:
+        print('Usage: {} [routes1 routes2 ... routesN]'.format(sys.argv[0]))
+        print('       {} --batch [routes]'.format(sys.argv[0]))
+        print('  benchmarks every route index backend at each number of routes')
+        print('  --batch compares pricing CDR-like numbers one at a time and '
+              'in batches')
+
+
+if __name__ == '__main__':
+    main()
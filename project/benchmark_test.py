@@ -0,0 +1,63 @@
+#!python
+
+from benchmark import (BACKENDS, cheapest_routes, benchmark_backend,
+                       measure_lookups, run_benchmark, format_results,
+                       run_batch_benchmark, format_batch_results)
+from routing import RouteTrie
+from routing_test import ROUTES
+from vectorpricer import VectorRouteIndex, np
+import unittest
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_cheapest_routes(self):
+        carriers = [[('+1415', 0.02), ('+1512', 0.04)],
+                    [('+1415', 0.01), ('+44', 0.10)]]
+        assert cheapest_routes(carriers) == [('+1415', 0.01), ('+1512', 0.04),
+                                             ('+44', 0.10)]
+
+    def test_backends_agree(self):
+        numbers = ['+15124156620', '+14152345678', '+19876543210']
+        expected = [RouteTrie(ROUTES).cost(number) for number in numbers]
+        for name, build in BACKENDS.items():
+            index = build(ROUTES)
+            assert [index.cost(number) for number in numbers] == expected, name
+            if hasattr(index, 'close'):
+                index.close()
+
+    def test_benchmark_backend(self):
+        result = benchmark_backend(RouteTrie, ROUTES, ['+14152345678'] * 10)
+        assert result['routes'] == 4
+        assert result['build_seconds'] >= 0
+        assert result['memory_bytes'] > 0
+        assert result['lookups_per_second'] > 0
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_vector_backend(self):
+        assert BACKENDS['vector'] is VectorRouteIndex
+        index = VectorRouteIndex(ROUTES)
+        index.cost = None  # Lookups must be priced with cost_array
+        assert measure_lookups(index, ['+14152345678'] * 10) > 0
+
+    def test_run_benchmark(self):
+        results = run_benchmark([100, 200], lookups=50)
+        assert len(results) == 2 * len(BACKENDS)
+        assert [result['backend'] for result in results[:len(BACKENDS)]] == \
+            list(BACKENDS)
+        table = format_results(results)
+        assert len(table.splitlines()) == len(results) + 1
+
+    def test_run_batch_benchmark(self):
+        results = run_batch_benchmark(100, lookups=200)
+        assert [result['backend'] for result in results] == \
+            [name for name in BACKENDS if name != 'vector']
+        # numbers repeat, so fewer are distinct than were priced
+        assert all(0 < result['distinct'] < 200 for result in results)
+        assert all(result['speedup'] > 0 for result in results)
+        table = format_batch_results(results)
+        assert len(table.splitlines()) == len(results) + 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+#!python
+
+import math
+from routing import normalize, NO_ROUTE_COST
+
+# False positive rate that bloom filters are sized for by default
+ERROR_RATE = 0.01
+# Fewest bits a bloom filter is given, however few keys it holds
+MIN_BITS = 64
+
+
+class BloomFilter(object):
+    """
+    Set of strings that may answer contains with a false positive but never
+    with a false negative, stored as an array of bits. Each key sets the
+    bits at num_hashes positions derived from its hash by double hashing
+    (position i is h1 + i * h2), and a key is contained only if all of its
+    bits are set. Keys are hashed with Python's hash, so a filter is only
+    valid within the process that built it.
+    """
+
+    def __init__(self, capacity, error_rate=ERROR_RATE, max_bytes=None):
+        """
+        Initialize this filter with enough bits to hold the given number of
+        keys at the given false positive rate, but no more than max_bytes
+        bytes if given, in which case the rate will be higher.
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError('Error rate must be between 0 and 1: {}'
+                             .format(error_rate))
+        capacity = max(capacity, 1)
+        self.capacity = capacity  # Number of keys sized for
+        # optimal bits for n keys at rate p is -n ln p / (ln 2) ^ 2
+        bits = int(math.ceil(-capacity * math.log(error_rate) /
+                             math.log(2) ** 2))
+        if max_bytes is not None:
+            bits = min(bits, max_bytes * 8)
+        self.num_bits = max(bits, MIN_BITS)
+        # optimal number of hashes for m bits and n keys is m / n ln 2
+        self.num_hashes = max(1, int(round(self.num_bits / capacity *
+                                           math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.size = 0  # Number of keys added
+
+    def __repr__(self):
+        """Return a string representation of this bloom filter."""
+        return 'BloomFilter({} keys, {} bits, {} hashes)'.format(
+            self.size, self.num_bits, self.num_hashes)
+
+    def _positions(self, key):
+        """Generate the bit positions of the given key, one per hash."""
+        code = hash(key)
+        first = code & 0xFFFFFFFF
+        step = (code >> 32) | 1  # Odd, so positions do not repeat early
+        for i in range(self.num_hashes):
+            yield (first + i * step) % self.num_bits
+
+    def add(self, key):
+        """
+        Add the given key to this filter.
+        Running time: O(k) for k hashes
+        """
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.size += 1
+
+    def contains(self, key):
+        """
+        Return False if the given key was never added to this filter, or True
+        if it was or on a false positive.
+        Running time: O(k) for k hashes, but a key that was never added is
+        usually rejected after the first few
+        """
+        # same positions as _positions, inlined since this is the hot path
+        bits, num_bits = self.bits, self.num_bits
+        code = hash(key)
+        position = code & 0xFFFFFFFF
+        step = (code >> 32) | 1
+        for _ in range(self.num_hashes):
+            bit = position % num_bits
+            if not bits[bit >> 3] & 1 << (bit & 7):
+                return False
+            position += step
+        return True
+
+    def nbytes(self):
+        """Return the number of bytes used by this filter's bits."""
+        return len(self.bits)
+
+    def error_rate(self):
+        """
+        Return the expected false positive rate of this filter for the keys
+        added so far: (1 - e ^ (-k * n / m)) ^ k for n keys and k hashes.
+        """
+        filled = 1 - math.exp(-self.num_hashes * self.size / self.num_bits)
+        return filled ** self.num_hashes
+
+
+class BloomGate(object):
+    """
+    Wrapper around a route index that rejects unroutable numbers without
+    touching the index. It keeps one BloomFilter of route prefixes per
+    prefix length; a number is passed to the index only if one of its own
+    prefixes of a routed length may be in that length's filter, so a
+    number with no route is answered by a few bit tests per length.
+    The filters follow an index with subscribe, like a LiveRouteTable, as
+    each batch of updates is published. Any other index must not gain
+    routes once gated, or numbers under them are rejected.
+    """
+
+    def __init__(self, index, error_rate=ERROR_RATE, max_bytes=None):
+        """
+        Initialize this gate in front of the given route index, building
+        filters of all the (prefix, cost) routes in its items(). Each filter
+        is sized for the given false positive rate; if max_bytes is given,
+        it is shared between the filters in proportion to their prefixes.
+        Running time: O(p * k) for p routes and k hashes per filter
+        """
+        self.index = index
+        self.error_rate = error_rate  # False positive rate filters target
+        self.max_bytes = max_bytes
+        self._build(index.items())
+        self.passed = 0  # Numbers passed on to the index
+        self.rejected = 0  # Numbers rejected by the filters
+        self.rebuilds = 0  # Times updates outgrew the filters
+        if hasattr(index, 'subscribe'):
+            index.subscribe(self._on_update)
+
+    def _build(self, routes, spare=1):
+        """
+        Replace this gate's filters with filters of the given (prefix, cost)
+        routes, each sized for spare times as many prefixes as it holds.
+        Running time: O(p * k) for p routes and k hashes per filter
+        """
+        by_length = {}  # Maps prefix length to list of prefixes
+        for prefix, _ in routes:
+            digits = normalize(prefix)
+            by_length.setdefault(len(digits), []).append(digits)
+        total = sum(len(prefixes) for prefixes in by_length.values())
+        filters = {}  # Maps prefix length to filter of its prefixes
+        for length, prefixes in by_length.items():
+            budget = None
+            if self.max_bytes is not None:
+                budget = max(1, self.max_bytes * len(prefixes) // total)
+            bloom = BloomFilter(len(prefixes) * spare, self.error_rate,
+                                budget)
+            for digits in prefixes:
+                bloom.add(digits)
+            filters[length] = bloom
+        self.filters = filters
+        self.lengths = sorted(filters)  # Prefix lengths, shortest first
+        # (length, bound contains method) pairs, to skip lookups per probe;
+        # assigned last so a concurrent may_route sees old or new filters
+        self._probes = [(length, filters[length].contains)
+                        for length in self.lengths]
+
+    def _on_update(self, affected, snapshot):
+        """
+        Add the prefixes an update routes to the filters, or rebuild them
+        from the snapshot with room to grow when a prefix has a new length
+        or would fill its filter past what it was sized for. Removed routes
+        stay in the filters, where they can only cause false positives.
+        Running time: O(a * k) for a affected prefixes and k hashes, or
+        O(p * k) for p routes when the filters are rebuilt
+        """
+        for digits in affected:
+            if not snapshot.contains(digits):
+                continue
+            bloom = self.filters.get(len(digits))
+            if bloom is not None and bloom.contains(digits):
+                continue  # Already added, or a false positive either way
+            if bloom is None or bloom.size >= bloom.capacity:
+                self.rebuilds += 1
+                self._build(snapshot.items(), spare=2)
+                return
+            bloom.add(digits)
+
+    def __repr__(self):
+        """Return a string representation of this bloom filter gate."""
+        return 'BloomGate({!r}, {} bytes)'.format(self.index, self.nbytes())
+
+    def length(self):
+        """Return the number of routes in the gated index."""
+        return self.index.length()
+
+    def nbytes(self):
+        """Return the number of bytes used by all of this gate's filters."""
+        return sum(bloom.nbytes() for bloom in self.filters.values())
+
+    def may_route(self, number):
+        """
+        Return False if no route prefix can match the given phone number, or
+        True if one may (always True if one does).
+        Running time: O(k * h) for k prefix lengths and h hashes per filter
+        """
+        digits = normalize(number)
+        for length, contains in self._probes:
+            if length > len(digits):
+                break
+            if contains(digits[:length]):
+                return True
+        return False
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        """
+        if not self.may_route(number):
+            self.rejected += 1
+            return None
+        self.passed += 1
+        return self.index.lookup(number)
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number, or NO_ROUTE_COST
+        without consulting the index if the filters rule out every route.
+        """
+        if not self.may_route(number):
+            self.rejected += 1
+            return NO_ROUTE_COST
+        self.passed += 1
+        return self.index.cost(number)
+
+    def stats(self):
+        """
+        Return a dict of the numbers passed and rejected, the times the
+        filters were rebuilt, the bytes used and the expected false positive
+        rate of each prefix length's filter.
+        """
+        return {
+            'passed': self.passed,
+            'rejected': self.rejected,
+            'rebuilds': self.rebuilds,
+            'bytes': self.nbytes(),
+            'error_rates': {length: bloom.error_rate()
+                            for length, bloom in self.filters.items()},
+        }
@@ -0,0 +1,107 @@
+#!python
+
+from bloomgate import BloomFilter, BloomGate
+from bucketroutes import LengthBucketRoutes
+from compacttrie_test import random_routes
+from liveroutes import LiveRouteTable, ADD, REMOVE
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES
+import random
+import unittest
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_init(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        # about 9.6 bits and 7 hashes per key for a 1% error rate
+        assert bloom.num_bits == 9586
+        assert bloom.num_hashes == 7
+        assert bloom.nbytes() == 1199
+        with self.assertRaises(ValueError):
+            BloomFilter(1000, error_rate=0)
+
+    def test_max_bytes(self):
+        bloom = BloomFilter(1000, error_rate=0.01, max_bytes=500)
+        assert bloom.nbytes() == 500
+        assert bloom.num_hashes == 3
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [str(key) for key in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert bloom.size == 1000
+        assert all(bloom.contains(key) for key in keys)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(2000, error_rate=0.02)
+        for key in range(2000):
+            bloom.add(str(key))
+        false_positives = sum(bloom.contains(str(key))
+                              for key in range(2000, 12000))
+        assert false_positives < 400  # 2% of 10000 is 200
+        assert 0.01 < bloom.error_rate() < 0.03
+
+
+class BloomGateTest(unittest.TestCase):
+
+    def test_gate(self):
+        gate = BloomGate(RouteTrie(ROUTES))
+        assert gate.lengths == [4, 7]
+        assert gate.length() == 4
+        assert gate.cost('+14152345678') == 0.03
+        assert gate.lookup('+15124156620') == ('+1512', 0.04)
+        assert gate.may_route('+141') is False
+        assert gate.cost('+141') == NO_ROUTE_COST
+        stats = gate.stats()
+        assert stats['passed'] == 2
+        assert stats['rejected'] == 1
+        assert sorted(stats['error_rates']) == [4, 7]
+
+    def test_max_bytes_is_shared(self):
+        routes = random_routes(2000)
+        gate = BloomGate(RouteTrie(routes), max_bytes=1000)
+        assert gate.nbytes() <= 1000 + len(gate.filters)
+
+    def test_matches_index(self):
+        routes = random_routes(500)
+        index = LengthBucketRoutes(routes)
+        gate = BloomGate(index, error_rate=0.05)
+        rand = random.Random(9)
+        unroutable = 0
+        for _ in range(1000):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            match = index.lookup(number)
+            assert gate.lookup(number) == match
+            unroutable += match is None
+        # only unroutable numbers are rejected, but not all of them might be
+        assert gate.rejected <= unroutable
+        assert gate.passed + gate.rejected == 1000
+
+    def test_follows_live_table(self):
+        table = LiveRouteTable()
+        table.apply([(ADD, 'a', '+1415', 0.02), (ADD, 'a', '+1512', 0.03)])
+        gate = BloomGate(table)
+        assert gate.cost('+44123456789') == NO_ROUTE_COST
+        # a full filter is rebuilt with room for twice its prefixes
+        table.apply([(ADD, 'b', '+4412', 0.05)])
+        assert gate.cost('+44123456789') == 0.05
+        assert gate.rebuilds == 1
+        table.apply([(ADD, 'b', '+4413', 0.06)])
+        assert gate.cost('+44133456789') == 0.06
+        assert gate.rebuilds == 1
+        # so is one for a prefix of a new length
+        table.apply([(ADD, 'b', '+331', 0.04)])
+        assert gate.rebuilds == 2
+        assert gate.cost('+33123456789') == 0.04
+        # a removed route can only be a false positive
+        table.apply([(REMOVE, 'b', '+331', None)])
+        assert gate.cost('+33123456789') == NO_ROUTE_COST
+        routes = table.items()
+        assert all(gate.may_route(prefix + '5') for prefix, _ in routes)
+
+
+if __name__ == '__main__':
+    unittest.main()
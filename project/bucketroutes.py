@@ -0,0 +1,123 @@
+#!python
+
+import lessons  # Makes Lessons/source importable
+from hashtable import HashTable
+from routing import normalize, NO_ROUTE_COST
+
+
+class LengthBucketRoutes(object):
+    """
+    Route index that keeps one HashTable of prefix -> cost per prefix length.
+    A number is priced by probing its own prefixes from the longest length
+    that has any routes down to the shortest, skipping every length with no
+    routes, so a lookup costs O(k) hash table probes for k distinct lengths.
+    """
+
+    def __init__(self, routes=None):
+        """Initialize this index and insert the given (prefix, cost) routes."""
+        self.tables = {}  # Maps prefix length to HashTable of its routes
+        self.lengths = []  # Prefix lengths with routes, longest first
+        self.size = 0  # Number of route prefixes stored
+        if routes is not None:
+            for prefix, cost in routes:
+                self.insert(prefix, cost)
+
+    def __repr__(self):
+        """Return a string representation of this route index."""
+        return 'LengthBucketRoutes({} routes, lengths {})'.format(
+            self.size, sorted(self.lengths))
+
+    def is_empty(self):
+        """Return True if this index contains no routes."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes stored in this index."""
+        return self.size
+
+    def contains(self, prefix):
+        """
+        Return True if a route with exactly the given prefix is stored.
+        Running time: O(l) to hash a prefix of length l
+        """
+        digits = normalize(prefix)
+        table = self.tables.get(len(digits))
+        return table is not None and table.contains(digits)
+
+    def get(self, prefix):
+        """
+        Return the cost of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(l) to hash a prefix of length l
+        """
+        digits = normalize(prefix)
+        table = self.tables.get(len(digits))
+        if table is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        return table.get(digits)
+
+    def insert(self, prefix, cost):
+        """
+        Insert a route with the given prefix and cost, or update its cost if
+        the prefix is already stored.
+        Running time: O(l) to hash a prefix of length l, plus O(k log k) for
+        k distinct lengths when this is the first route of its length
+        """
+        digits = normalize(prefix)
+        table = self.tables.get(len(digits))
+        if table is None:
+            table = self.tables[len(digits)] = HashTable()
+            self.lengths = sorted(self.tables, reverse=True)
+        if not table.contains(digits):
+            self.size += 1
+        table.set(digits, cost)
+
+    def delete(self, prefix):
+        """
+        Delete the route with the given prefix, or raise KeyError.
+        A length left without routes is no longer probed.
+        Running time: O(l) to hash a prefix of length l
+        """
+        digits = normalize(prefix)
+        table = self.tables.get(len(digits))
+        if table is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        table.delete(digits)
+        self.size -= 1
+        if table.length() == 0:
+            del self.tables[len(digits)]
+            self.lengths.remove(len(digits))
+
+    def items(self):
+        """
+        Return a list of all (prefix, cost) routes in sorted prefix order.
+        Running time: O(n log n) for n routes
+        """
+        return sorted(('+' + prefix, cost) for table in self.tables.values()
+                      for prefix, cost in table.items())
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        Running time: O(k * l) for k distinct lengths and a number of length l
+        """
+        digits = normalize(number)
+        for length in self.lengths:
+            if length > len(digits):
+                continue
+            try:
+                return ('+' + digits[:length],
+                        self.tables[length].get(digits[:length]))
+            except KeyError:
+                pass  # No route of this length, try the next shorter one
+        return None
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Running time: O(k * l) for k distinct lengths and a number of length l
+        """
+        match = self.lookup(number)
+        return NO_ROUTE_COST if match is None else match[1]
@@ -0,0 +1,73 @@
+#!python
+
+from bucketroutes import LengthBucketRoutes
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES
+import random
+import unittest
+
+
+class LengthBucketRoutesTest(unittest.TestCase):
+
+    def test_init(self):
+        index = LengthBucketRoutes()
+        assert index.length() == 0
+        assert index.is_empty() is True
+        assert index.cost('+14152345678') == NO_ROUTE_COST
+
+    def test_init_with_routes(self):
+        index = LengthBucketRoutes(ROUTES)
+        assert index.length() == 4
+        # only lengths with routes are probed, longest first
+        assert index.lengths == [7, 4]
+
+    def test_insert_and_get(self):
+        index = LengthBucketRoutes()
+        index.insert('+1415', 0.02)
+        index.insert('+1415', 0.05)
+        assert index.get('+1415') == 0.05
+        assert index.length() == 1
+        assert index.contains('+1415') is True
+        assert index.contains('+141') is False
+        with self.assertRaises(KeyError):
+            index.get('+141')
+
+    def test_delete(self):
+        index = LengthBucketRoutes(ROUTES)
+        index.delete('+1415234')
+        assert index.lengths == [7, 4]
+        index.delete('+1415246')
+        # no routes of length 7 are left, so it is not probed anymore
+        assert index.lengths == [4]
+        assert index.length() == 2
+        with self.assertRaises(KeyError):
+            index.delete('+1415234')
+        with self.assertRaises(KeyError):
+            index.delete('+14')
+
+    def test_items(self):
+        assert LengthBucketRoutes(ROUTES).items() == sorted(ROUTES)
+
+    def test_lookup_and_cost(self):
+        index = LengthBucketRoutes(ROUTES)
+        assert index.lookup('+14152345678') == ('+1415234', 0.03)
+        assert index.lookup('+14159999999') == ('+1415', 0.02)
+        assert index.lookup('+19876543210') is None
+        assert index.cost('+15124156620') == 0.04
+        assert index.cost('+141523') == 0.02
+        assert index.cost('+19876543210') == NO_ROUTE_COST
+
+    def test_matches_route_trie(self):
+        routes = random_routes(500)
+        index = LengthBucketRoutes(routes)
+        trie = RouteTrie(routes)
+        rand = random.Random(9)
+        for _ in range(500):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            assert index.lookup(number) == trie.lookup(number)
+
+
+if __name__ == '__main__':
+    unittest.main()
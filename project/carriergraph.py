@@ -0,0 +1,265 @@
+#!python
+
+import math
+import random
+import lessons  # Makes Lessons/source importable
+from priorityqueue import PriorityQueue
+
+
+class CarrierGraph(object):
+    """
+    Directed graph of carrier interconnects: each exchange (a switch or
+    point of presence, named by any hashable value) has outgoing edges to
+    the exchanges that carriers will hand its calls to, each with the cost
+    per minute and the carrier charging it. A call can cross several
+    carriers, so the cheapest route is the cheapest path between exchanges.
+    """
+
+    def __init__(self, edges=None):
+        """
+        Initialize this graph and add the given (source, target, cost,
+        carrier) edges, if any.
+        """
+        self.edges = {}  # Maps exchange to list of (target, cost, carrier)
+        self.positions = {}  # Maps exchange to (x, y) location, if known
+        self.size = 0  # Number of edges
+        if edges is not None:
+            for source, target, cost, carrier in edges:
+                self.add_edge(source, target, cost, carrier)
+
+    def __repr__(self):
+        """Return a string representation of this carrier graph."""
+        return 'CarrierGraph({} exchanges, {} edges)'.format(
+            self.exchange_count(), self.size)
+
+    def exchange_count(self):
+        """Return the number of exchanges in this graph."""
+        return len(self.edges)
+
+    def edge_count(self):
+        """Return the number of edges in this graph."""
+        return self.size
+
+    def add_exchange(self, exchange, position=None):
+        """
+        Add the given exchange if it is not in this graph, and set its (x, y)
+        location if one is given, which distance_heuristic uses.
+        """
+        self.edges.setdefault(exchange, [])
+        if position is not None:
+            self.positions[exchange] = position
+
+    def add_edge(self, source, target, cost, carrier=None):
+        """
+        Add an edge from the source to the target exchange at the given cost,
+        adding either exchange if it is new. Costs must not be negative, as
+        the searches rely on a path never getting cheaper as it grows.
+        Running time: O(1)
+        """
+        if cost < 0:
+            raise ValueError('Edge cost must not be negative: {} -> {}'
+                             .format(source, target))
+        self.edges.setdefault(target, [])
+        self.edges.setdefault(source, []).append((target, cost, carrier))
+        self.size += 1
+
+    def neighbors(self, exchange):
+        """
+        Return the list of (target, cost, carrier) edges out of the given
+        exchange, or raise KeyError if it is not in this graph.
+        """
+        if exchange not in self.edges:
+            raise KeyError('Exchange not found: {}'.format(exchange))
+        return self.edges[exchange]
+
+    def _search(self, source, target=None, heuristic=None):
+        """
+        Search from the source exchange with Dijkstra's algorithm, or A* if
+        given a heuristic function returning a lower bound on the cost from
+        an exchange to the target, stopping once the target is settled.
+        Return a tuple of (dict of exchange to cheapest cost found, dict of
+        exchange to the (previous exchange, cost, carrier) edge reaching it,
+        number of exchanges settled).
+        Running time: O(e log e) for e edges
+        """
+        if source not in self.edges:
+            raise KeyError('Exchange not found: {}'.format(source))
+        costs = {source: 0}
+        previous = {source: None}
+        settled = set()
+        queue = PriorityQueue()
+        queue.enqueue(source, 0)
+        while not queue.is_empty():
+            exchange = queue.dequeue()
+            # an exchange is enqueued again each time a cheaper path to it is
+            # found, so skip the stale entries behind its cheapest one
+            if exchange in settled:
+                continue
+            settled.add(exchange)
+            if exchange == target:
+                break
+            cost = costs[exchange]
+            for neighbor, edge_cost, carrier in self.edges[exchange]:
+                new_cost = cost + edge_cost
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    previous[neighbor] = (exchange, edge_cost, carrier)
+                    if heuristic is None:
+                        queue.enqueue(neighbor, new_cost)
+                    else:
+                        queue.enqueue(neighbor, new_cost + heuristic(neighbor))
+        return costs, previous, len(settled)
+
+    def cheapest_costs(self, source):
+        """
+        Return a dict of every exchange reachable from the source exchange to
+        the cost of the cheapest path to it.
+        Running time: O(e log e) for e edges
+        """
+        return self._search(source)[0]
+
+    def cheapest_path(self, source, target, heuristic=None):
+        """
+        Return a tuple of (total cost, list of (exchange, next exchange, cost,
+        carrier) hops) of the cheapest path from the source to the target
+        exchange, or None if the target cannot be reached. Uses A* if given
+        a heuristic that never overestimates the cost to the target (see
+        distance_heuristic), which settles fewer exchanges than Dijkstra.
+        Running time: O(e log e) for e edges
+        """
+        if target not in self.edges:
+            raise KeyError('Exchange not found: {}'.format(target))
+        costs, previous, _ = self._search(source, target, heuristic)
+        if target not in costs:
+            return None
+        hops = []
+        exchange = target
+        while previous[exchange] is not None:
+            last, cost, carrier = previous[exchange]
+            hops.append((last, exchange, cost, carrier))
+            exchange = last
+        hops.reverse()
+        return costs[target], hops
+
+    def min_rate(self):
+        """
+        Return the lowest cost per unit of distance of any edge between two
+        exchanges with positions, or 0 if there is none.
+        Running time: O(e) for e edges
+        """
+        rate = None
+        positions = self.positions
+        for source, edges in self.edges.items():
+            if source not in positions:
+                continue
+            x, y = positions[source]
+            for target, cost, _ in edges:
+                if target in positions:
+                    distance = math.hypot(positions[target][0] - x,
+                                          positions[target][1] - y)
+                    if distance > 0 and (rate is None or
+                                         cost / distance < rate):
+                        rate = cost / distance
+        return rate or 0
+
+    def distance_heuristic(self, target, rate=None):
+        """
+        Return an A* heuristic for paths to the given target exchange: the
+        straight line distance to it times the lowest cost per unit of
+        distance of any edge (min_rate unless given), which never
+        overestimates. Unless every exchange has a position, the heuristic
+        is 0 everywhere, so A* settles exchanges like Dijkstra.
+        """
+        if rate is None:
+            rate = self.min_rate()
+        positions = self.positions
+        # min_rate skips edges with an unpositioned end, so a path through
+        # one can cost less than the distance it covers times the rate;
+        # every positioned exchange is in edges, so comparing sizes suffices
+        if target not in positions or rate == 0 or \
+                len(positions) < len(self.edges):
+            return lambda exchange: 0
+        target_x, target_y = positions[target]
+
+        def heuristic(exchange):
+            position = positions.get(exchange)
+            if position is None:
+                return 0
+            return rate * math.hypot(position[0] - target_x,
+                                     position[1] - target_y)
+        return heuristic
+
+
+def random_graph(exchanges, edges, carriers=3, seed=None):
+    """
+    Return a CarrierGraph of the given numbers of exchanges, placed at
+    random in the unit square, and edges between nearby exchanges, each
+    priced by one of the given number of carriers at a per-hop fee plus a
+    rate per unit of distance.
+    Running time: O(exchanges + edges)
+    """
+    rand = random.Random(seed)
+    graph = CarrierGraph()
+    # bucket exchanges into a grid of cells holding a few each, and link
+    # each edge's source to an exchange in the same or a neighboring cell
+    cells_per_side = max(1, int(math.sqrt(exchanges / 4)))
+    cells = {}
+    for exchange in range(exchanges):
+        x, y = rand.random(), rand.random()
+        graph.add_exchange(exchange, (x, y))
+        cell = (int(x * cells_per_side), int(y * cells_per_side))
+        cells.setdefault(cell, []).append(exchange)
+    rates = [rand.uniform(1.0, 2.0) for _ in range(carriers)]
+    positions = graph.positions
+    for _ in range(edges):
+        source = rand.randrange(exchanges)
+        x, y = positions[source]
+        cell = (int(x * cells_per_side), int(y * cells_per_side))
+        nearby = cells.get((cell[0] + rand.randint(-1, 1),
+                            cell[1] + rand.randint(-1, 1))) or cells[cell]
+        target = rand.choice(nearby)
+        if target == source:
+            continue
+        carrier = rand.randrange(carriers)
+        distance = math.hypot(positions[target][0] - x,
+                              positions[target][1] - y)
+        cost = 0.001 + rates[carrier] * distance * rand.uniform(1.0, 1.5)
+        graph.add_edge(source, target, round(cost, 6),
+                       'carrier{}'.format(carrier + 1))
+    return graph
+
+
+def main():
+    """Time Dijkstra against A* on a random carrier graph."""
+    import sys
+    import time
+    args = sys.argv[1:]  # Ignore script file name
+    if 2 <= len(args) <= 3 and all(arg.isdigit() for arg in args):
+        exchanges, edges = int(args[0]), int(args[1])
+        queries = int(args[2]) if len(args) == 3 else 20
+        start = time.perf_counter()
+        graph = random_graph(exchanges, edges, seed=0)
+        print('Built {!r} in {:.3f} seconds'.format(
+            graph, time.perf_counter() - start))
+        rand = random.Random(1)
+        pairs = [(rand.randrange(exchanges), rand.randrange(exchanges))
+                 for _ in range(queries)]
+        rate = graph.min_rate()
+        for name in ['dijkstra', 'astar']:
+            settled = 0
+            start = time.perf_counter()
+            for source, target in pairs:
+                heuristic = None
+                if name == 'astar':
+                    heuristic = graph.distance_heuristic(target, rate)
+                settled += graph._search(source, target, heuristic)[2]
+            seconds = time.perf_counter() - start
+            print('{:>8}: {:.2f} ms per query, {:.0f} exchanges settled'
+                  .format(name, seconds * 1000 / queries, settled / queries))
+    else:
+        print('Usage: {} exchanges edges [queries]'.format(sys.argv[0]))
+        print('  times cheapest path searches on a random carrier graph')
+
+
+if __name__ == '__main__':
+    main()
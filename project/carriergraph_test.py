@@ -0,0 +1,97 @@
+#!python
+
+from carriergraph import CarrierGraph, random_graph
+import random
+import unittest
+
+# Exchanges A to E with direct and multi-hop carrier interconnects
+EDGES = [('A', 'B', 0.05, 'acme'), ('A', 'C', 0.01, 'zeta'),
+         ('C', 'B', 0.02, 'acme'), ('B', 'D', 0.03, 'zeta'),
+         ('C', 'D', 0.09, 'zeta'), ('E', 'A', 0.01, 'acme')]
+
+
+class CarrierGraphTest(unittest.TestCase):
+
+    def test_init(self):
+        graph = CarrierGraph(EDGES)
+        assert graph.exchange_count() == 5
+        assert graph.edge_count() == 6
+        assert graph.neighbors('A') == [('B', 0.05, 'acme'),
+                                        ('C', 0.01, 'zeta')]
+        assert graph.neighbors('D') == []
+        with self.assertRaises(KeyError):
+            graph.neighbors('F')
+        with self.assertRaises(ValueError):
+            graph.add_edge('A', 'D', -0.01)
+
+    def test_cheapest_path(self):
+        graph = CarrierGraph(EDGES)
+        cost, hops = graph.cheapest_path('A', 'D')
+        assert round(cost, 6) == 0.06
+        assert hops == [('A', 'C', 0.01, 'zeta'), ('C', 'B', 0.02, 'acme'),
+                        ('B', 'D', 0.03, 'zeta')]
+        assert graph.cheapest_path('A', 'A') == (0, [])
+        assert graph.cheapest_path('D', 'A') is None
+        with self.assertRaises(KeyError):
+            graph.cheapest_path('A', 'F')
+
+    def test_cheapest_costs(self):
+        costs = CarrierGraph(EDGES).cheapest_costs('A')
+        assert sorted(costs) == ['A', 'B', 'C', 'D']
+        assert round(costs['B'], 6) == 0.03
+        assert round(costs['D'], 6) == 0.06
+
+    def test_distance_heuristic(self):
+        graph = CarrierGraph()
+        graph.add_exchange('A', (0, 0))
+        graph.add_exchange('B', (3, 4))
+        graph.add_exchange('C', (6, 8))
+        graph.add_edge('A', 'B', 10)
+        graph.add_edge('B', 'C', 5)
+        assert graph.min_rate() == 1
+        heuristic = graph.distance_heuristic('C')
+        assert heuristic('A') == 10
+        assert heuristic('C') == 0
+        assert heuristic('D') == 0
+        assert graph.cheapest_path('A', 'C', heuristic) == \
+            (15, [('A', 'B', 10, None), ('B', 'C', 5, None)])
+
+    def test_partly_positioned_heuristic(self):
+        graph = CarrierGraph()
+        graph.add_exchange('A', (0, 0))
+        graph.add_exchange('B', (1, 0))
+        graph.add_exchange('C', (10, 0))
+        graph.add_edge('A', 'B', 1)
+        # S and U have no position, so their edges are not in min_rate
+        graph.add_edge('S', 'A', 1)
+        graph.add_edge('S', 'C', 5)
+        graph.add_edge('A', 'U', 0.5)
+        graph.add_edge('U', 'C', 0.5)
+        heuristic = graph.distance_heuristic('C')
+        assert heuristic('A') == 0
+        assert graph.cheapest_path('S', 'C', heuristic)[0] == 2
+
+    def test_astar_matches_dijkstra(self):
+        graph = random_graph(500, 3000, seed=3)
+        rand = random.Random(5)
+        rate = graph.min_rate()
+        for _ in range(20):
+            source, target = rand.randrange(500), rand.randrange(500)
+            expected = graph.cheapest_path(source, target)
+            found = graph.cheapest_path(
+                source, target, graph.distance_heuristic(target, rate))
+            if expected is None:
+                assert found is None
+                continue
+            cost, hops = found
+            assert abs(cost - expected[0]) < 1e-9
+            assert abs(sum(hop[2] for hop in hops) - cost) < 1e-9
+            exchange = source
+            for last, next_exchange, _, _ in hops:
+                assert last == exchange
+                exchange = next_exchange
+            assert exchange == target
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,308 @@
+#!python
+
+from array import array
+from routing import normalize, NO_ROUTE_COST
+
+# Costs are stored as fixed-point integers in millionths inside the base array
+# of an array('i') as -(cost + 1), so the largest cost is 2147.483646
+COST_SCALE = 10 ** 6
+MAX_COST = (2 ** 31 - 2) / COST_SCALE
+# Returned by the trie's internal searches for nodes without a route
+NO_COST = -1
+# Sentinel stored in the check array for slots no node owns
+FREE = -1
+# Digits '0'-'9' are stored as transition codes 1-10, code 0 is the
+# terminal transition to a slot holding the cost of a route that ends at a
+# node which also has children
+CODE_OFFSET = ord('0') - 1
+TERMINAL = 0
+# Slots added whenever the arrays run out of room
+GROW_SIZE = 1024
+# Bases tried before the search for free slots stops starting at old holes
+MAX_PROBES = 64
+
+
+def to_fixed(cost):
+    """
+    Return the given cost as a fixed-point integer in millionths, or raise
+    ValueError if it cannot be stored in the trie's base array.
+    Running time: O(1)
+    """
+    if not 0 <= cost <= MAX_COST:
+        raise ValueError('Cost out of range: {}'.format(cost))
+    return int(round(cost * COST_SCALE))
+
+
+def from_fixed(fixed):
+    """Return the cost stored as the given fixed-point integer."""
+    return fixed / COST_SCALE
+
+
+class CompactRouteTrie(object):
+    """
+    Read-only double-array trie of route prefixes. Every node is one slot in
+    two flat array('i') tables instead of a Python object with a dict:
+        check[t] is the parent slot of slot t, or FREE if t is unused
+        base[s] > 0 means node s has children, and base[s] + code is the slot
+            of its child for that code (code 0 is its terminal slot, if any)
+        base[s] < 0 means slot s is a route leaf costing -(base[s] + 1)
+    so each node costs 8 bytes, plus 8 more for each route that ends at a
+    node with children. Routes cannot be changed after the trie is built;
+    build a new trie from the updated routes instead.
+    """
+
+    def __init__(self, routes=None):
+        """
+        Build this trie from the given iterable of (prefix, cost) routes.
+        A later route with the same prefix replaces an earlier one.
+        Running time: O(p log p) to sort p routes, plus the time to find a
+        free base for each node, which is nearly constant for dense tries
+        Space usage: O(p) for a temporary map of all routes while building
+        """
+        fixed_costs = {}
+        if routes is not None:
+            for prefix, cost in routes:
+                fixed_costs[normalize(prefix)] = to_fixed(cost)
+        self.size = len(fixed_costs)  # Number of route prefixes stored
+        self.base = array('i', [0] * GROW_SIZE)
+        self.check = array('i', [FREE] * GROW_SIZE)
+        self.check[0] = 0  # Slot 0 is the root node
+        self._first_free = 1  # No free slots before this index
+        self._build(sorted(fixed_costs), fixed_costs)
+
+    def __repr__(self):
+        """Return a string representation of this compact route trie."""
+        return 'CompactRouteTrie({} routes, {} bytes)'.format(self.size,
+                                                              self.nbytes())
+
+    def is_empty(self):
+        """Return True if this trie contains no routes."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes stored in this trie."""
+        return self.size
+
+    def nbytes(self):
+        """Return the number of bytes used by this trie's arrays."""
+        return (self.base.itemsize * len(self.base) +
+                self.check.itemsize * len(self.check))
+
+    def bytes_per_route(self):
+        """Return the average number of array bytes used per stored route."""
+        return self.nbytes() / self.size if self.size > 0 else 0
+
+    def _grow(self, length):
+        """Extend the arrays with free slots so they hold at least length."""
+        while len(self.check) < length:
+            self.base.extend([0] * GROW_SIZE)
+            self.check.extend([FREE] * GROW_SIZE)
+
+    def _find_base(self, codes):
+        """
+        Return the smallest base of at least 1 such that the slots
+        base + code are free for every one of the given sorted codes.
+        Running time: O(MAX_PROBES * c) for c codes, because free slots that
+        keep failing to fit are given up on instead of being scanned again
+        """
+        check = self.check
+        # skip past the slots that filled up since the last search
+        while self._first_free < len(check) and check[self._first_free] != FREE:
+            self._first_free += 1
+        # try to fit the first code into each slot from there on
+        position = max(self._first_free, codes[0] + 1)
+        probes = 0
+        while True:
+            self._grow(position + codes[-1] - codes[0] + 1)
+            check = self.check
+            base = position - codes[0]
+            if all(check[base + code] == FREE for code in codes):
+                break
+            position += 1
+            probes += 1
+        if probes > MAX_PROBES:
+            # leave the holes before this base empty from now on
+            self._first_free = position
+        return base
+
+    def _build(self, keys, fixed_costs):
+        """
+        Place every node of the trie for the given sorted prefix keys.
+        Each pending range of keys shares the prefix of the node built for it,
+        so its children are the distinct digits following that prefix.
+        Running time: O(p * l) for p keys of length l, besides _find_base
+        """
+        last_slot = 0
+        # (node slot, first key index, end key index, depth) ranges to place
+        stack = [(0, 0, len(keys), 0)]
+        while stack:
+            slot, low, high, depth = stack.pop()
+            # sorted order puts a key equal to this node's prefix first
+            fixed = NO_COST
+            if low < high and len(keys[low]) == depth:
+                fixed = fixed_costs[keys[low]]
+                low += 1
+            if low == high:
+                # a leaf stores its own cost (only an empty root has none)
+                if fixed != NO_COST:
+                    self.base[slot] = -(fixed + 1)
+                continue
+            # group the remaining keys by their digit at this depth
+            codes = [TERMINAL] if fixed != NO_COST else []
+            ranges = []
+            start = low
+            for index in range(low + 1, high + 1):
+                if index == high or keys[index][depth] != keys[start][depth]:
+                    codes.append(ord(keys[start][depth]) - CODE_OFFSET)
+                    ranges.append((start, index))
+                    start = index
+            base = self._find_base(codes)
+            self.base[slot] = base
+            if fixed != NO_COST:
+                self.check[base] = slot
+                self.base[base] = -(fixed + 1)
+            for code, (start, end) in zip(codes[-len(ranges):], ranges):
+                child = base + code
+                self.check[child] = slot
+                stack.append((child, start, end, depth + 1))
+            last_slot = max(last_slot, base + codes[-1])
+        # trim the unused tail but keep room for an empty root's children
+        length = max(last_slot + 1, 11)
+        del self.base[length:]
+        del self.check[length:]
+
+    def _slot_cost(self, slot):
+        """
+        Return the fixed-point cost of the route ending at the given node,
+        or NO_COST if no route ends there.
+        Running time: O(1)
+        """
+        base = self.base[slot]
+        if base < 0:
+            return -base - 1
+        if base > 0 and self.check[base] == slot:
+            return -self.base[base] - 1
+        return NO_COST
+
+    def _find_slot(self, prefix):
+        """
+        Return the slot reached by following the digits of the given prefix,
+        or None if no node exists for it.
+        Running time: O(l) for a prefix of length l
+        """
+        base, check = self.base, self.check
+        size = len(check)
+        slot = 0
+        for digit in normalize(prefix):
+            if base[slot] <= 0:
+                return None  # No children
+            child = base[slot] + ord(digit) - CODE_OFFSET
+            if not 0 < child < size or check[child] != slot:
+                return None
+            slot = child
+        return slot
+
+    def contains(self, prefix):
+        """
+        Return True if a route with exactly the given prefix is stored.
+        Running time: O(l) for a prefix of length l
+        """
+        slot = self._find_slot(prefix)
+        return slot is not None and self._slot_cost(slot) != NO_COST
+
+    def get(self, prefix):
+        """
+        Return the cost of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(l) for a prefix of length l
+        """
+        slot = self._find_slot(prefix)
+        fixed = NO_COST if slot is None else self._slot_cost(slot)
+        if fixed == NO_COST:
+            raise KeyError('Route not found: {}'.format(prefix))
+        return from_fixed(fixed)
+
+    def items(self):
+        """
+        Return a list of all (prefix, cost) routes in sorted prefix order.
+        Running time: O(n) for n nodes in the trie
+        """
+        base, check = self.base, self.check
+        size = len(check)
+        result = []
+        stack = [('', 0)]
+        while stack:
+            prefix, slot = stack.pop()
+            fixed = self._slot_cost(slot)
+            if fixed != NO_COST:
+                result.append(('+' + prefix, from_fixed(fixed)))
+            if base[slot] <= 0:
+                continue  # No children
+            # push children in reverse digit order to pop them in order
+            for code in range(10, 0, -1):
+                child = base[slot] + code
+                if child < size and check[child] == slot:
+                    stack.append((prefix + chr(code + CODE_OFFSET), child))
+        return result
+
+    def _longest_match(self, digits):
+        """
+        Return a tuple of (length, fixed cost) for the longest route prefix
+        of the given digits, or None if no route matches.
+        Running time: O(l) for digits of length l
+        """
+        base, check = self.base, self.check
+        size = len(check)
+        slot = 0
+        fixed = self._slot_cost(0)
+        match = (0, fixed) if fixed != NO_COST else None
+        for depth, digit in enumerate(digits, 1):
+            if base[slot] <= 0:
+                break  # No children
+            child = base[slot] + ord(digit) - CODE_OFFSET
+            if not 0 < child < size or check[child] != slot:
+                break
+            slot = child
+            fixed = self._slot_cost(slot)
+            if fixed != NO_COST:
+                match = (depth, fixed)
+        return match
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        digits = normalize(number)
+        match = self._longest_match(digits)
+        if match is None:
+            return None
+        return '+' + digits[:match[0]], from_fixed(match[1])
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        base, check = self.base, self.check
+        size = len(check)
+        slot = 0
+        fixed = self._slot_cost(0)
+        # same walk as _longest_match with _slot_cost inlined for speed
+        for digit in number[1:] if number[:1] == '+' else number:
+            node_base = base[slot]
+            if node_base <= 0:
+                break  # No children
+            child = node_base + ord(digit) - CODE_OFFSET
+            if not 0 < child < size or check[child] != slot:
+                break
+            slot = child
+            node_base = base[slot]
+            if node_base < 0:
+                fixed = -node_base - 1
+                break  # Leaf route, nothing longer can match
+            if check[node_base] == slot:
+                fixed = -base[node_base] - 1
+        return NO_ROUTE_COST if fixed == NO_COST else fixed / COST_SCALE
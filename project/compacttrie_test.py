@@ -0,0 +1,105 @@
+#!python
+
+from compacttrie import CompactRouteTrie, to_fixed, from_fixed, MAX_COST
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES
+import random
+import unittest
+
+
+def random_routes(count, seed=3):
+    """Return a list of count random (prefix, cost) routes of 1-9 digits."""
+    rand = random.Random(seed)
+    routes = {}
+    while len(routes) < count:
+        length = rand.randint(1, 9)
+        prefix = '+' + ''.join(rand.choice('0123456789') for _ in range(length))
+        routes[prefix] = round(rand.random(), 4)
+    return list(routes.items())
+
+
+class FixedPointTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        assert to_fixed(0.03) == 30000
+        assert from_fixed(to_fixed(0.03)) == 0.03
+        assert to_fixed(0) == 0
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            to_fixed(-0.01)
+        with self.assertRaises(ValueError):
+            to_fixed(MAX_COST + 1)
+
+
+class CompactRouteTrieTest(unittest.TestCase):
+
+    def test_init(self):
+        trie = CompactRouteTrie()
+        assert trie.length() == 0
+        assert trie.is_empty() is True
+        assert trie.cost('+14152345678') == NO_ROUTE_COST
+        assert trie.items() == []
+
+    def test_init_with_routes(self):
+        trie = CompactRouteTrie(ROUTES)
+        assert trie.length() == 4
+        assert trie.is_empty() is False
+
+    def test_duplicate_prefix_keeps_last_cost(self):
+        trie = CompactRouteTrie([('+1415', 0.02), ('+1415', 0.05)])
+        assert trie.length() == 1
+        assert trie.get('+1415') == 0.05
+
+    def test_get_and_contains(self):
+        trie = CompactRouteTrie(ROUTES)
+        assert trie.get('+1415') == 0.02
+        assert trie.get('+1415234') == 0.03
+        assert trie.contains('+1512') is True
+        assert trie.contains('+151') is False
+        assert trie.contains('+15123') is False
+        with self.assertRaises(KeyError):
+            trie.get('+141')
+
+    def test_items(self):
+        trie = CompactRouteTrie(ROUTES)
+        assert trie.items() == sorted(ROUTES)
+
+    def test_lookup(self):
+        trie = CompactRouteTrie(ROUTES)
+        assert trie.lookup('+15124156620') == ('+1512', 0.04)
+        assert trie.lookup('+14152345678') == ('+1415234', 0.03)
+        assert trie.lookup('+14159999999') == ('+1415', 0.02)
+        assert trie.lookup('+19876543210') is None
+
+    def test_cost(self):
+        trie = CompactRouteTrie(ROUTES)
+        assert trie.cost('+15124156620') == 0.04
+        assert trie.cost('+14152345678') == 0.03
+        assert trie.cost('+14152465678') == 0.01
+        assert trie.cost('+141523') == 0.02
+        assert trie.cost('+19876543210') == NO_ROUTE_COST
+        # characters other than digits never match a transition
+        assert trie.cost('+1415 234') == 0.02
+
+    def test_matches_route_trie(self):
+        routes = random_routes(2000)
+        compact = CompactRouteTrie(routes)
+        trie = RouteTrie(routes)
+        assert compact.items() == trie.items()
+        rand = random.Random(5)
+        for _ in range(2000):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            assert compact.cost(number) == trie.cost(number)
+            assert compact.lookup(number) == trie.lookup(number)
+
+    def test_bytes_per_route(self):
+        trie = CompactRouteTrie(random_routes(2000))
+        # 8 bytes per node, and random prefixes need about 3 nodes per route
+        assert trie.nbytes() == 8 * len(trie.check)
+        assert trie.bytes_per_route() < 32
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,8 @@
+#!python
+# Running pytest from the repository root collects the Lessons tests first,
+# which import Lessons/source/queue.py as module queue; give that name back
+# to the standard library before the project tests import multiprocessing.
+
+import lessons
+
+lessons.restore_standard_queue()
@@ -0,0 +1,161 @@
+#!python
+
+import gc
+import random
+import sys
+import types
+from benchmark import BACKENDS, cheapest_routes, measure_build, \
+    measure_lookups
+from routegen import generate_prefixes, generate_carriers, generate_numbers
+
+# Objects shared by the whole program rather than owned by any index, so a
+# walk never counts them or follows their references
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType,
+                types.BuiltinFunctionType, types.MethodType, types.CodeType)
+# Route count reported when none is given on the command line
+DEFAULT_ROUTES = 100000
+# Phone numbers looked up to measure lookups per second
+LOOKUPS = 100000
+
+
+def walk_objects(root):
+    """
+    Generate a tuple of (object, size in bytes) for the given object and
+    every object reachable from it through references the garbage collector
+    knows about (attributes, dict keys and values, list items, ...), each
+    once, skipping classes, modules and functions.
+    Running time: O(n) for n reachable objects
+    """
+    seen = set()  # Ids of objects already generated
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        yield obj, sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+
+
+def deep_sizeof(root):
+    """
+    Return the bytes used by the given object and everything reachable
+    from it, like a whole route index with all of its nodes. Objects shared
+    with the rest of the program, such as small ints and one-digit strings,
+    are counted once like any other.
+    Running time: O(n) for n reachable objects
+    """
+    return sum(size for _, size in walk_objects(root))
+
+
+def type_breakdown(root):
+    """
+    Return a dict mapping each type name to a [count, bytes] list of the
+    objects of that type reachable from the given object.
+    Running time: O(n) for n reachable objects
+    """
+    totals = {}
+    for obj, size in walk_objects(root):
+        total = totals.setdefault(type(obj).__name__, [0, 0])
+        total[0] += 1
+        total[1] += size
+    return totals
+
+
+def measure_footprint(build, routes, numbers):
+    """
+    Return a dict of the memory used by the index the given function builds
+    from the given routes, as retained by the build according to
+    tracemalloc and as walked by deep_sizeof, both in total and per route
+    prefix, alongside the number of the given numbers it prices per second.
+    The pages of a mapped index file belong to the operating system's file
+    cache, not the heap, so neither measure counts them.
+    """
+    index, _, retained = measure_build(build, routes)
+    deep = deep_sizeof(index)
+    count = len(routes)
+    result = {
+        'routes': count,
+        'traced_bytes': retained,
+        'deep_bytes': deep,
+        'traced_per_prefix': retained / count if count else 0,
+        'deep_per_prefix': deep / count if count else 0,
+        'lookups_per_second': measure_lookups(index, numbers),
+    }
+    if hasattr(index, 'close'):
+        index.close()
+    return result
+
+
+def footprint_report(routes=DEFAULT_ROUTES, lookups=LOOKUPS, carriers=3,
+                     backends=None, seed=0):
+    """
+    Measure the footprint of every backend (all of BACKENDS by default) on
+    a synthetic dataset of the given number of prefixes merged from several
+    carriers. Return a list of result dicts that also name the backend.
+    """
+    if backends is None:
+        backends = BACKENDS
+    rand = random.Random(seed)
+    prefixes = generate_prefixes(routes, rand)
+    merged = cheapest_routes(generate_carriers(prefixes, carriers, rand))
+    numbers = generate_numbers(lookups, prefixes, rand)
+    results = []
+    for name, build in backends.items():
+        result = measure_footprint(build, merged, numbers)
+        result['backend'] = name
+        results.append(result)
+    return results
+
+
+def format_report(results):
+    """Return the given footprint results as a text table."""
+    lines = ['{:>10} {:>10} {:>12} {:>12} {:>12} {:>12} {:>12}'.format(
+        'routes', 'backend', 'traced MB', 'deep MB', 'traced B/rt',
+        'deep B/rt', 'lookups/s')]
+    for result in results:
+        lines.append('{routes:>10} {backend:>10} {traced_mb:>12.2f} '
+                     '{deep_mb:>12.2f} {traced_per_prefix:>12.1f} '
+                     '{deep_per_prefix:>12.1f} {lookups_per_second:>12.0f}'
+                     .format(traced_mb=result['traced_bytes'] / 2 ** 20,
+                             deep_mb=result['deep_bytes'] / 2 ** 20,
+                             **result))
+    return '\n'.join(lines)
+
+
+def format_breakdown(totals, limit=10):
+    """
+    Return the largest limit entries of a type_breakdown as lines of text.
+    """
+    lines = ['{:>20} {:>10} {:>12}'.format('type', 'objects', 'bytes')]
+    for name, (count, size) in sorted(totals.items(),
+                                      key=lambda item: -item[1][1])[:limit]:
+        lines.append('{:>20} {:>10} {:>12}'.format(name, count, size))
+    return '\n'.join(lines)
+
+
+def main():
+    """Report the memory footprint of every route index backend."""
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) <= 2 and all(arg.isdigit() for arg in args[:1]) and \
+            (len(args) < 2 or args[1] in BACKENDS):
+        routes = int(args[0]) if args else DEFAULT_ROUTES
+        print(format_report(footprint_report(routes)))
+        if len(args) == 2:
+            rand = random.Random(0)
+            merged = cheapest_routes(generate_carriers(
+                generate_prefixes(routes, rand), 3, rand))
+            index = BACKENDS[args[1]](merged)
+            print()
+            print(format_breakdown(type_breakdown(index)))
+            if hasattr(index, 'close'):
+                index.close()
+    else:
+        print('Usage: {} [routes [backend]]'.format(sys.argv[0]))
+        print('  reports bytes per route prefix and lookups per second of '
+              'every backend')
+        print('  and the objects making up the given backend by type')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!python
+
+from footprint import (deep_sizeof, type_breakdown, walk_objects,
+                       measure_footprint, footprint_report, format_report,
+                       format_breakdown)
+from benchmark import BACKENDS
+from routing import RouteTrie
+from routing_test import ROUTES
+import lessons  # Makes Lessons/source importable
+from linkedlist import LinkedList
+import sys
+import unittest
+
+
+class FootprintTest(unittest.TestCase):
+
+    def test_deep_sizeof(self):
+        items = [1.5, 2.5]
+        assert deep_sizeof(items) == (sys.getsizeof(items) +
+                                      sys.getsizeof(1.5) * 2)
+        # shared objects are counted once
+        shared = 3.5
+        assert deep_sizeof([shared, shared]) == (sys.getsizeof([0, 0]) +
+                                                 sys.getsizeof(shared))
+        # classes and functions are not part of an object's footprint
+        assert deep_sizeof([RouteTrie, len]) == sys.getsizeof([0, 0])
+
+    def test_walk_cycles(self):
+        items = []
+        items.append(items)
+        assert [obj for obj, _ in walk_objects(items)] == [items]
+
+    def test_type_breakdown(self):
+        totals = type_breakdown(RouteTrie(ROUTES))
+        # the root and 1, then 415 and 512 below it, then 2, 34 and 46
+        assert totals['TrieNode'][0] == 13
+        assert totals['RouteTrie'] == [1, sys.getsizeof(RouteTrie())]
+        assert totals['float'][0] == 4
+        totals = type_breakdown(LinkedList(['A', 'B', 'C']))
+        assert totals['Node'][0] == 3
+        lines = format_breakdown(totals, limit=2).splitlines()
+        assert len(lines) == 3
+
+    def test_measure_footprint(self):
+        result = measure_footprint(RouteTrie, ROUTES, ['+14152345678'] * 10)
+        assert result['routes'] == 4
+        assert result['traced_bytes'] > 0
+        assert result['deep_bytes'] == deep_sizeof(RouteTrie(ROUTES))
+        assert result['deep_per_prefix'] == result['deep_bytes'] / 4
+        assert result['lookups_per_second'] > 0
+
+    def test_footprint_report(self):
+        results = footprint_report(200, lookups=50)
+        assert [result['backend'] for result in results] == list(BACKENDS)
+        table = format_report(results)
+        assert len(table.splitlines()) == len(results) + 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!python
+# Importing this module makes the course data structures in Lessons/source
+# (HashTable, DoublyLinkedList, ...) importable from the project modules.
+
+import importlib.util
+import os
+import sys
+
+SOURCE_DIR = os.path.normpath(os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), os.pardir, 'Lessons', 'source'))
+
+# append rather than insert so Lessons/source/queue.py never shadows the
+# standard library queue module that multiprocessing and asyncio rely on
+if SOURCE_DIR not in sys.path:
+    sys.path.append(SOURCE_DIR)
+
+
+def import_with_lessons_queue(name):
+    """
+    Import and return the Lessons/source module with the given name, such
+    as treemap, whose imports need Lessons/source/queue.py as module queue.
+    That module is bound to the name queue only while the import runs, so
+    everything else still gets the standard library queue module.
+    """
+    spec = importlib.util.spec_from_file_location(
+        'queue', os.path.join(SOURCE_DIR, 'queue.py'))
+    lessons_queue = importlib.util.module_from_spec(spec)
+    std_queue = sys.modules.get('queue')
+    sys.modules['queue'] = lessons_queue
+    try:
+        spec.loader.exec_module(lessons_queue)
+        return importlib.import_module(name)
+    finally:
+        if std_queue is None:
+            del sys.modules['queue']
+        else:
+            sys.modules['queue'] = std_queue
+
+
+def restore_standard_queue():
+    """
+    Make the name queue refer to the standard library queue module again if
+    Lessons/source/queue.py was imported as queue, as it is when pytest
+    collects the Lessons tests before the project's, so multiprocessing,
+    concurrent.futures and asyncio find the queue module they expect.
+    Modules that already imported the Lessons queue keep it.
+    """
+    lessons_queue = sys.modules.get('queue')
+    if lessons_queue is None or os.path.dirname(os.path.abspath(
+            getattr(lessons_queue, '__file__', None) or '')) != SOURCE_DIR:
+        return
+    path = sys.path[:]
+    del sys.modules['queue']
+    sys.path[:] = [entry for entry in path
+                   if os.path.abspath(entry or os.curdir) != SOURCE_DIR]
+    try:
+        importlib.import_module('queue')
+    finally:
+        sys.path[:] = path
@@ -0,0 +1,321 @@
+#!python
+
+import heapq
+import threading
+from types import MappingProxyType
+from routing import RouteTrie, TrieNode, normalize, read_routes
+
+# Actions of a route delta, a tuple of (action, carrier, prefix, cost)
+ADD = 'add'  # Carrier starts offering a prefix it did not offer before
+CHANGE = 'change'  # Carrier changes the cost of a prefix it offers
+REMOVE = 'remove'  # Carrier stops offering a prefix (cost is ignored)
+
+
+class OfferNode(TrieNode):
+
+    def __init__(self):
+        """Initialize this node with no children, route cost or offers."""
+        super().__init__()
+        self.offers = None  # Read-only {carrier: cost} for this prefix, if any
+
+
+class RouteSnapshot(RouteTrie):
+    """
+    Read-only version of a LiveRouteTable's cheapest routes. A snapshot never
+    changes once published, so any number of readers can use one without
+    locks while the table publishes newer snapshots that share its nodes.
+    """
+
+    def __init__(self, root=None, size=0, version=0):
+        """Initialize this snapshot with the given root node."""
+        super().__init__()
+        if root is not None:
+            self.root = root
+        self.size = size  # Number of route prefixes stored
+        self.version = version  # Number of updates applied before this one
+
+    def __repr__(self):
+        """Return a string representation of this route snapshot."""
+        return 'RouteSnapshot(version {}, {} routes)'.format(self.version,
+                                                            self.size)
+
+    def insert(self, prefix, cost, carrier=None):
+        raise TypeError('Route snapshots are read-only')
+
+    def insert_cheapest(self, prefix, cost, carrier=None):
+        raise TypeError('Route snapshots are read-only')
+
+    def delete(self, prefix):
+        raise TypeError('Route snapshots are read-only')
+
+    def cheapest_carriers(self, number, k):
+        """
+        Return a list of up to k (carrier, prefix, cost) tuples for the k
+        cheapest carriers that can route the given phone number, cheapest
+        first with ties broken by carrier name. Each carrier is priced by its
+        own longest prefix matching the number, like a single lookup would.
+        Running time: O(l + c log k) for a number of length l and c offers
+        across its matching prefixes, since heapq.nsmallest streams them
+        through a heap of only k candidates instead of sorting them all
+        """
+        digits = normalize(number)
+        best = heapq.nsmallest(k, self._carrier_offers(digits))
+        return [(carrier, '+' + prefix, cost)
+                for cost, carrier, prefix in best]
+
+    def _carrier_offers(self, digits):
+        """
+        Generate a (cost, carrier, prefix) tuple for every carrier offering a
+        prefix of the given digits, using each carrier's longest such prefix.
+        Running time: O(l + c) for l digits and c offers on their prefixes
+        """
+        matches = []  # (length, offers) of each prefix on the path
+        node = self.root
+        for length, digit in enumerate(digits, 1):
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.offers is not None:
+                matches.append((length, node.offers))
+        seen = set()  # Carriers already priced by a longer prefix
+        for length, offers in reversed(matches):
+            for carrier, cost in offers.items():
+                if carrier not in seen:
+                    seen.add(carrier)
+                    yield cost, carrier, digits[:length]
+
+
+class LiveRouteTable(object):
+    """
+    Cheapest route per prefix across carriers whose route lists change while
+    numbers are being priced. Updates are applied as batches of deltas, only
+    the prefixes they touch are recomputed, and each batch is published as a
+    new RouteSnapshot with a single reference assignment so readers see
+    either all of a batch or none of it.
+    """
+
+    def __init__(self):
+        """Initialize this table with no carriers and an empty snapshot."""
+        self.offers = {}  # Maps prefix digits to {carrier: cost}
+        self.snapshot = RouteSnapshot()  # Latest published snapshot
+        self._write_lock = threading.RLock()  # Serializes writers only
+        self.listeners = []  # Called with each batch's affected prefixes
+
+    def __repr__(self):
+        """Return a string representation of this live route table."""
+        return 'LiveRouteTable({!r})'.format(self.snapshot)
+
+    def length(self):
+        """Return the number of prefixes in the latest snapshot."""
+        return self.snapshot.size
+
+    def cost(self, number):
+        """Return the cost of the given number in the latest snapshot."""
+        return self.snapshot.cost(number)
+
+    def items(self):
+        """Return all (prefix, cost) routes in the latest snapshot."""
+        return self.snapshot.items()
+
+    def lookup(self, number):
+        """Return the (prefix, cost) match in the latest snapshot."""
+        return self.snapshot.lookup(number)
+
+    def lookup_carrier(self, number):
+        """Return the (prefix, cost, carrier) match in the latest snapshot."""
+        return self.snapshot.lookup_carrier(number)
+
+    def cheapest_carriers(self, number, k):
+        """
+        Return the k cheapest (carrier, prefix, cost) offers for the given
+        number in the latest snapshot, without taking any lock.
+        """
+        return self.snapshot.cheapest_carriers(number, k)
+
+    def carrier_routes(self, carrier):
+        """
+        Return a dict of prefix digits to cost for every route offered by
+        the given carrier.
+        Running time: O(p) for p prefixes offered by any carrier
+        """
+        return {prefix: offers[carrier]
+                for prefix, offers in self.offers.items() if carrier in offers}
+
+    def subscribe(self, listener):
+        """
+        Call the given function with the set of affected prefix digits and
+        the new snapshot after every batch of deltas is published.
+        """
+        self.listeners.append(listener)
+
+    def _apply_offer(self, action, carrier, prefix, cost):
+        """
+        Apply one delta to the offers and return the cost the carrier had for
+        the prefix before, or None. Raise ValueError for a delta without a
+        carrier or an add of a prefix the carrier already offers, or KeyError
+        for a change or remove of a prefix it does not offer.
+        Running time: O(1)
+        """
+        if carrier is None:
+            raise ValueError('Route delta has no carrier: +{}'.format(prefix))
+        offers = self.offers.get(prefix)
+        old_cost = None if offers is None else offers.get(carrier)
+        if action == ADD:
+            if old_cost is not None:
+                raise ValueError('Carrier {} already offers +{}'
+                                 .format(carrier, prefix))
+        elif action in (CHANGE, REMOVE):
+            if old_cost is None:
+                raise KeyError('Carrier {} does not offer +{}'
+                               .format(carrier, prefix))
+        else:
+            raise ValueError('Invalid route delta action: {!r}'.format(action))
+        if action == REMOVE:
+            del offers[carrier]
+            if len(offers) == 0:
+                del self.offers[prefix]
+        else:
+            if offers is None:
+                offers = self.offers[prefix] = {}
+            offers[carrier] = cost
+        return old_cost
+
+    def _undo_offer(self, carrier, prefix, old_cost):
+        """Restore the cost the carrier had for the prefix before a delta."""
+        if old_cost is None:
+            offers = self.offers[prefix]
+            del offers[carrier]
+            if len(offers) == 0:
+                del self.offers[prefix]
+        else:
+            self.offers.setdefault(prefix, {})[carrier] = old_cost
+
+    def _cheapest(self, prefix):
+        """
+        Return the (cost, carrier) of the cheapest offer for the given prefix,
+        breaking ties by carrier name, or None if no carrier offers it.
+        Running time: O(c) for c carriers offering the prefix
+        """
+        offers = self.offers.get(prefix)
+        if offers is None:
+            return None
+        return min((cost, carrier) for carrier, cost in offers.items())
+
+    def apply(self, deltas):
+        """
+        Apply the given batch of (action, carrier, prefix, cost) deltas and
+        publish a new snapshot. If any delta is invalid or the snapshot cannot
+        be built, none of the batch is applied and the error is raised.
+        Return the published snapshot.
+        Running time: O(d * (c + l)) for d deltas on prefixes of length l
+        offered by c carriers, independent of the number of routes
+        Space usage: O(d * l) new trie nodes; all others are shared with the
+        previous snapshot
+        """
+        with self._write_lock:
+            undo = []  # (carrier, prefix, old cost) to roll back on error
+            try:
+                for action, carrier, prefix, cost in deltas:
+                    prefix = normalize(prefix)
+                    old_cost = self._apply_offer(action, carrier, prefix, cost)
+                    undo.append((carrier, prefix, old_cost))
+                affected = set(prefix for _, prefix, _ in undo)
+                snapshot = self._publish(affected)
+            except Exception:
+                for carrier, prefix, old_cost in reversed(undo):
+                    self._undo_offer(carrier, prefix, old_cost)
+                raise
+            self.snapshot = snapshot
+            for listener in self.listeners:
+                listener(affected, self.snapshot)
+            return self.snapshot
+
+    def _publish(self, affected):
+        """
+        Return a new snapshot in which the cheapest routes for the given
+        affected prefixes are recomputed, copying only the nodes on their
+        paths so the current snapshot is never modified.
+        Running time: O(a * (c + l)) for a affected prefixes of length l
+        offered by c carriers
+        """
+        current = self.snapshot
+        fresh = set()  # ids of nodes copied for this snapshot
+        root = self._copy_node(current.root, fresh)
+        size = current.size
+        for prefix in affected:
+            # copy every node on the path to the prefix
+            path = [root]
+            for digit in prefix:
+                parent = path[-1]
+                child = parent.children.get(digit)
+                child = OfferNode() if child is None else child
+                child = self._copy_node(child, fresh)
+                parent.children[digit] = child
+                path.append(child)
+            node = path[-1]
+            cheapest = self._cheapest(prefix)
+            if node.cost is None and cheapest is not None:
+                size += 1
+            elif node.cost is not None and cheapest is None:
+                size -= 1
+            node.cost, node.carrier = cheapest or (None, None)
+            offers = self.offers.get(prefix)
+            node.offers = None if offers is None else \
+                MappingProxyType(dict(offers))
+            # prune nodes that no longer lead to any route
+            for depth in range(len(prefix), 0, -1):
+                node = path[depth]
+                if node.cost is not None or not node.is_leaf():
+                    break
+                del path[depth - 1].children[prefix[depth - 1]]
+        return RouteSnapshot(root, size, current.version + 1)
+
+    def _copy_node(self, node, fresh):
+        """
+        Return a copy of the given node that is safe to modify, or the node
+        itself if it was already copied for the snapshot being built.
+        Running time: O(1) since a node has at most 10 children
+        """
+        if id(node) in fresh:
+            return node
+        copy = OfferNode()
+        copy.children = dict(node.children)
+        copy.cost = node.cost
+        copy.carrier = node.carrier
+        copy.offers = getattr(node, 'offers', None)  # The first root has none
+        fresh.add(id(copy))
+        return copy
+
+    def replace_carrier(self, carrier, routes):
+        """
+        Replace the whole route list of the given carrier with the given
+        iterable of (prefix, cost) routes, applying only the differences as
+        one batch of deltas. Return the published snapshot.
+        Running time: O(p + r) for p prefixes in the table and r new routes,
+        plus the cost of applying the differences
+        Space usage: O(r) for the new routes
+        """
+        # a later route with the same prefix replaces an earlier one
+        new_routes = {}
+        for prefix, cost in routes:
+            new_routes[normalize(prefix)] = cost
+        with self._write_lock:
+            old_routes = self.carrier_routes(carrier)
+            deltas = []
+            for prefix, cost in new_routes.items():
+                old_cost = old_routes.pop(prefix, None)
+                if old_cost is None:
+                    deltas.append((ADD, carrier, prefix, cost))
+                elif old_cost != cost:
+                    deltas.append((CHANGE, carrier, prefix, cost))
+            # whatever was not resent is no longer offered
+            for prefix in old_routes:
+                deltas.append((REMOVE, carrier, prefix, None))
+            return self.apply(deltas)
+
+    def load_carrier(self, carrier, path):
+        """
+        Replace the route list of the given carrier with the routes in the
+        route cost file at the given path. Return the published snapshot.
+        """
+        return self.replace_carrier(carrier, read_routes(path))
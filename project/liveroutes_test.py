@@ -0,0 +1,193 @@
+#!python
+
+from liveroutes import LiveRouteTable, RouteSnapshot, ADD, CHANGE, REMOVE
+from routing import NO_ROUTE_COST
+from routing_test import write_temp_file
+import os
+import threading
+import unittest
+
+
+class LiveRouteTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = LiveRouteTable()
+        self.table.apply([(ADD, 'a', '+1512', 0.04), (ADD, 'a', '+1415', 0.02),
+                          (ADD, 'b', '+1415', 0.03),
+                          (ADD, 'b', '+1415234', 0.03)])
+
+    def test_init(self):
+        table = LiveRouteTable()
+        assert table.length() == 0
+        assert table.snapshot.version == 0
+        assert table.cost('+14152345678') == NO_ROUTE_COST
+
+    def test_apply_keeps_cheapest(self):
+        assert self.table.length() == 3
+        assert self.table.snapshot.version == 1
+        assert self.table.lookup_carrier('+14159999999') == ('+1415', 0.02, 'a')
+        assert self.table.lookup_carrier('+14152345678') == ('+1415234', 0.03,
+                                                             'b')
+
+    def test_change_recomputes_cheapest(self):
+        self.table.apply([(CHANGE, 'a', '+1415', 0.05)])
+        assert self.table.lookup_carrier('+14159999999') == ('+1415', 0.03, 'b')
+        assert self.table.snapshot.version == 2
+
+    def test_cheapest_carriers(self):
+        self.table.apply([(ADD, 'c', '+1', 0.01), (ADD, 'd', '+14', 0.025)])
+        # b prices the number by its longest prefix +1415234, not +1415
+        assert self.table.cheapest_carriers('+14152345678', 3) == [
+            ('c', '+1', 0.01), ('a', '+1415', 0.02), ('d', '+14', 0.025)]
+        assert self.table.cheapest_carriers('+14152345678', 10) == [
+            ('c', '+1', 0.01), ('a', '+1415', 0.02), ('d', '+14', 0.025),
+            ('b', '+1415234', 0.03)]
+        assert self.table.cheapest_carriers('+15124156620', 1) == [
+            ('c', '+1', 0.01)]
+        assert self.table.cheapest_carriers('+19876543210', 2) == [
+            ('c', '+1', 0.01)]
+        assert self.table.cheapest_carriers('+44123', 2) == []
+
+    def test_cheapest_carriers_reads_snapshot(self):
+        snapshot = self.table.snapshot
+        self.table.apply([(ADD, 'c', '+1', 0.01)])
+        # an older snapshot keeps the offers it was published with
+        assert snapshot.cheapest_carriers('+14152345678', 1) == [
+            ('a', '+1415', 0.02)]
+        # readers never wait for a writer holding the lock
+        holding = threading.Event()
+        release = threading.Event()
+
+        def write():
+            with self.table._write_lock:
+                holding.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        holding.wait(5)
+        try:
+            assert self.table.cheapest_carriers('+14152345678', 1) == [
+                ('c', '+1', 0.01)]
+        finally:
+            release.set()
+            writer.join()
+
+    def test_remove_falls_back_to_next_carrier(self):
+        self.table.apply([(REMOVE, 'a', '+1415', None)])
+        assert self.table.lookup_carrier('+14159999999') == ('+1415', 0.03, 'b')
+        self.table.apply([(REMOVE, 'b', '+1415', None)])
+        assert self.table.lookup('+14159999999') is None
+        # the longer prefix under the removed one is still routed
+        assert self.table.cost('+14152345678') == 0.03
+        assert self.table.length() == 2
+
+    def test_remove_prunes_nodes(self):
+        self.table.apply([(REMOVE, 'b', '+1415234', None)])
+        assert self.table.snapshot.get('+1415') == 0.02
+        node = self.table.snapshot.root
+        for digit in '1415':
+            node = node.children[digit]
+        assert node.is_leaf() is True
+
+    def test_old_snapshot_is_unchanged(self):
+        old = self.table.snapshot
+        self.table.apply([(CHANGE, 'a', '+1415', 0.05),
+                          (ADD, 'c', '+44', 0.10),
+                          (REMOVE, 'a', '+1512', None)])
+        assert old.items() == [('+1415', 0.02), ('+1415234', 0.03),
+                               ('+1512', 0.04)]
+        assert self.table.snapshot.items() == [('+1415', 0.03),
+                                               ('+1415234', 0.03),
+                                               ('+44', 0.10)]
+
+    def test_unchanged_subtries_are_shared(self):
+        old = self.table.snapshot
+        self.table.apply([(ADD, 'c', '+44', 0.10)])
+        new = self.table.snapshot
+        assert new.root is not old.root
+        assert new.root.children['1'] is old.root.children['1']
+
+    def test_invalid_batch_is_not_applied(self):
+        old = self.table.snapshot
+        with self.assertRaises(ValueError):
+            self.table.apply([(CHANGE, 'a', '+1415', 0.01),
+                              (ADD, 'a', '+1512', 0.01)])
+        with self.assertRaises(KeyError):
+            self.table.apply([(ADD, 'c', '+44', 0.10),
+                              (REMOVE, 'c', '+45', None)])
+        with self.assertRaises(ValueError):
+            self.table.apply([('drop', 'a', '+1415', None)])
+        with self.assertRaises(ValueError):
+            self.table.apply([(ADD, None, '+1415', 0.02)])
+        assert self.table.snapshot is old
+        assert self.table.carrier_routes('a') == {'1512': 0.04, '1415': 0.02}
+        assert self.table.carrier_routes('c') == {}
+
+    def test_failed_publish_is_rolled_back(self):
+        old = self.table.snapshot
+        # carriers that cannot be ordered fail when a tie is published
+        with self.assertRaises(TypeError):
+            self.table.apply([(ADD, 'c', '+44', 0.10),
+                              (ADD, 7, '+1415', 0.02)])
+        assert self.table.snapshot is old
+        assert self.table.carrier_routes('c') == {}
+        assert self.table.carrier_routes(7) == {}
+        self.table.apply([(CHANGE, 'a', '+1415', 0.01)])
+        assert self.table.cost('+14159999999') == 0.01
+
+    def test_snapshot_is_read_only(self):
+        with self.assertRaises(TypeError):
+            self.table.snapshot.insert('+44', 0.10)
+        with self.assertRaises(TypeError):
+            self.table.snapshot.delete('+1415')
+
+    def test_replace_carrier(self):
+        self.table.replace_carrier('a', [('+1415', 0.01), ('+44', 0.10)])
+        assert self.table.carrier_routes('a') == {'1415': 0.01, '44': 0.10}
+        assert self.table.lookup('+15124156620') is None
+        assert self.table.lookup_carrier('+14159999999') == ('+1415', 0.01, 'a')
+
+    def test_load_carrier(self):
+        path = write_temp_file(['+1512,0.01', '+1415234,0.02'])
+        try:
+            snapshot = self.table.load_carrier('b', path)
+        finally:
+            os.remove(path)
+        assert isinstance(snapshot, RouteSnapshot)
+        assert self.table.carrier_routes('b') == {'1512': 0.01,
+                                                  '1415234': 0.02}
+        assert self.table.lookup_carrier('+15124156620') == ('+1512', 0.01, 'b')
+
+    def test_subscribe(self):
+        published = []
+        self.table.subscribe(lambda affected, snapshot:
+                             published.append((affected, snapshot.version)))
+        self.table.apply([(CHANGE, 'a', '+1415', 0.05),
+                          (ADD, 'c', '+44', 0.10)])
+        assert published == [({'1415', '44'}, 2)]
+
+    def test_readers_never_see_half_applied_batch(self):
+        table = LiveRouteTable()
+        table.apply([(ADD, 'a', '+1', 0.0), (ADD, 'a', '+2', 0.0)])
+        mismatches = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                snapshot = table.snapshot
+                if snapshot.cost('+1555') != snapshot.cost('+2555'):
+                    mismatches.append(snapshot.version)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for step in range(1, 300):
+            table.apply([(CHANGE, 'a', '+1', float(step)),
+                         (CHANGE, 'a', '+2', float(step))])
+        done.set()
+        reader.join()
+        assert mismatches == []
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!python
+
+import asyncio
+import itertools
+import math
+import time
+
+
+def percentile(ordered, fraction):
+    """
+    Return the value at the given fraction (e.g. 0.99) of the given sorted
+    list using the nearest-rank method, or 0 for an empty list.
+    Running time: O(1)
+    """
+    if len(ordered) == 0:
+        return 0
+    rank = max(int(math.ceil(fraction * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+async def open_connection(address):
+    """Open a connection to a TCP (host, port) tuple or Unix socket path."""
+    if isinstance(address, tuple):
+        return await asyncio.open_connection(*address)
+    return await asyncio.open_unix_connection(address)
+
+
+async def run_connection(address, numbers, requests, batch, pipeline,
+                         latencies):
+    """
+    Send the given number of request lines of batch numbers each over one
+    connection, writing pipeline lines at a time before reading their
+    responses, and append the latency of each request to latencies.
+    Running time: O(requests * batch) numbers sent
+    """
+    reader, writer = await open_connection(address)
+    sent = 0
+    while sent < requests:
+        group = min(pipeline, requests - sent)
+        lines = [' '.join(itertools.islice(numbers, batch)) + '\n'
+                 for _ in range(group)]
+        start = time.perf_counter()
+        writer.write(''.join(lines).encode('ascii'))
+        await writer.drain()
+        for _ in range(group):
+            response = await reader.readline()
+            if not response:
+                raise ConnectionError('Server closed the connection')
+            latencies.append(time.perf_counter() - start)
+        sent += group
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load_test(address, numbers, connections=4, requests=1000, batch=1,
+                    pipeline=16):
+    """
+    Price the given phone numbers (cycled as needed) against the pricing
+    server at the given address from several concurrent connections, each
+    sending the given number of requests. Return a dict of statistics with
+    throughput per second and latency percentiles in milliseconds.
+    """
+    numbers = itertools.cycle(numbers)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[run_connection(address, numbers, requests, batch,
+                                          pipeline, latencies)
+                           for _ in range(connections)])
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    total = connections * requests
+    return {
+        'requests': total,
+        'numbers': total * batch,
+        'seconds': seconds,
+        'requests_per_second': total / seconds,
+        'numbers_per_second': total * batch / seconds,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': percentile(latencies, 1.0) * 1000,
+    }
+
+
+def main():
+    """Load test a running pricing server with numbers from a file."""
+    import sys
+    from pricer import read_numbers
+    args = sys.argv[1:]  # Ignore script file name
+    if 2 <= len(args) <= 6:
+        address = args[0]
+        if address.isdigit():
+            address = ('127.0.0.1', int(address))
+        numbers = list(itertools.islice(read_numbers(args[1]), 100000))
+        settings = [int(arg) for arg in args[2:]]
+        stats = asyncio.run(load_test(address, numbers, *settings))
+        print('{requests} requests ({numbers} numbers) in {seconds:.3f} '
+              'seconds'.format(**stats))
+        print('{requests_per_second:.0f} requests/sec, '
+              '{numbers_per_second:.0f} numbers/sec'.format(**stats))
+        print('latency p50 {p50_ms:.3f} ms, p99 {p99_ms:.3f} ms, '
+              'max {max_ms:.3f} ms'.format(**stats))
+    else:
+        print('Usage: {} port|socket-path phone-numbers.txt [connections] '
+              '[requests] [batch] [pipeline]'.format(sys.argv[0]))
+        print('  measures requests/sec and latency of a pricing server')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!python
+
+import time
+
+# Values below 2 ** SUB_BUCKET_BITS get a bucket each, and each power of two
+# range above is split into 2 ** (SUB_BUCKET_BITS - 1) linear sub buckets,
+# so a bucket ends at most 1 / 16 (6.25%) above any value in it, e.g. 1024
+# is reported as 1087
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS >> 1
+# Largest value that can be recorded, in bits (plenty for nanoseconds)
+MAX_VALUE_BITS = 48
+# By default one in this many lookups is measured. The others still pass
+# through one extra Python call, which adds about 8% to the fastest
+# in-memory index (a RouteTrie) and proportionally less to slower ones
+SAMPLE_EVERY = 64
+# Percentiles reported by summaries
+PERCENTILES = [0.5, 0.95, 0.99]
+# Cache outcomes counted by InstrumentedIndex
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+NO_CACHE = 'none'
+
+
+class LatencyHistogram(object):
+    """
+    Histogram of non-negative integer values (such as nanoseconds) in
+    logarithmic buckets like an HDR histogram: values below SUB_BUCKETS get
+    a bucket each, and every power of two range above is split into
+    HALF_SUB_BUCKETS equal buckets. Memory is fixed no matter how many
+    values are recorded, and a percentile is at most 1 / HALF_SUB_BUCKETS
+    (6.25%) above the recorded value it stands for.
+    """
+
+    def __init__(self):
+        """Initialize this histogram with no recorded values."""
+        shifts = MAX_VALUE_BITS - SUB_BUCKET_BITS + 1
+        self.counts = [0] * ((shifts + 1) * HALF_SUB_BUCKETS)
+        self.count = 0  # Number of values recorded
+        self.total = 0  # Sum of values recorded
+        self.min = None  # Smallest value recorded
+        self.max = None  # Largest value recorded
+
+    def __repr__(self):
+        """Return a string representation of this histogram."""
+        return 'LatencyHistogram({} values)'.format(self.count)
+
+    def record(self, value):
+        """
+        Count the given value in its bucket.
+        Running time: O(1)
+        """
+        value = min(max(int(value), 0), (1 << MAX_VALUE_BITS) - 1)
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the counts of another histogram to this histogram."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def mean(self):
+        """Return the mean of the recorded values, or 0 if there are none."""
+        return self.total / self.count if self.count > 0 else 0
+
+    def percentile(self, fraction):
+        """
+        Return the highest value in the bucket holding the value at the given
+        fraction (0.99 for p99) of the recorded values in order, capped at
+        the largest value recorded, or 0 if there are none.
+        Running time: O(b) for b buckets
+        """
+        if self.count == 0:
+            return 0
+        # nearest rank of the value, counting from 1
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_high(index), self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Return a dict of the count, min, mean and max of the recorded values
+        and their PERCENTILES keyed like 'p50'.
+        """
+        summary = {
+            'count': self.count,
+            'min': self.min or 0,
+            'mean': self.mean(),
+            'max': self.max or 0,
+        }
+        for fraction in PERCENTILES:
+            summary['p{:g}'.format(fraction * 100)] = self.percentile(fraction)
+        return summary
+
+
+def bucket_index(value):
+    """
+    Return the index of the histogram bucket holding the given value.
+    Running time: O(1)
+    """
+    if value < SUB_BUCKETS:
+        return value
+    # keep the top SUB_BUCKET_BITS bits of the value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def bucket_high(index):
+    """Return the highest value held by the histogram bucket at an index."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    top = index - (shift << (SUB_BUCKET_BITS - 1))
+    return ((top + 1) << shift) - 1
+
+
+class InstrumentedIndex(object):
+    """
+    Route index wrapper that measures its lookups: the latency of each in a
+    LatencyHistogram of nanoseconds, and counts of lookups by the length of
+    the matched prefix (0 for no match) and by cache outcome when the
+    wrapped index is a CachedRouteIndex. To keep the overhead low, only
+    one in every sample_every lookups is measured; the rest go straight to
+    the wrapped index and are only counted.
+    """
+
+    def __init__(self, index, sample_every=SAMPLE_EVERY,
+                 clock=time.perf_counter_ns):
+        """Initialize this wrapper around the given route index."""
+        if sample_every < 1:
+            raise ValueError('Sample interval must be positive: {}'
+                             .format(sample_every))
+        self.index = index
+        # bound once, so an unsampled call costs one extra frame and no
+        # attribute lookups on the wrapped index
+        self._lookup = index.lookup
+        self._cost = index.cost
+        self.sample_every = sample_every
+        self.clock = clock  # Returns the current time in nanoseconds
+        self.latency = LatencyHistogram()
+        self.prefix_lengths = {}  # Maps matched prefix length to count
+        self.cache_outcomes = {CACHE_HIT: 0, CACHE_MISS: 0, NO_CACHE: 0}
+        self._countdown = 1  # Lookups left until the next measured one
+        self._interval = 1  # Lookups in the current sampling interval
+        self._counted = 0  # Lookups in the sampling intervals before it
+
+    def __repr__(self):
+        """Return a string representation of this instrumented index."""
+        return 'InstrumentedIndex({!r}, {} lookups)'.format(
+            self.index, self.lookup_count())
+
+    def length(self):
+        """Return the number of routes in the wrapped index."""
+        return self.index.length()
+
+    def lookup_count(self):
+        """Return the number of lookups made, measured or not."""
+        return self._counted + self._interval - self._countdown
+
+    def _measure(self, number, cost=False):
+        """
+        Return the (prefix, cost) match of the given phone number from the
+        wrapped index, or its cost if cost is True, timing the same call an
+        unsampled lookup makes. Record its latency, matched prefix length
+        and cache outcome, and start the next sampling interval. The match
+        of a cost call is looked up afterwards, untimed, from the index
+        behind the wrapped one if it wraps another (like a CachedRouteIndex),
+        so the wrapper's own counters only see the timed call.
+        """
+        self._counted += self._interval
+        self._interval = self._countdown = self.sample_every
+        cache = getattr(self.index, 'cache', None)
+        hits = cache.hits if cache is not None else 0
+        call = self.index.cost if cost else self.index.lookup
+        start = self.clock()
+        result = call(number)
+        self.latency.record(self.clock() - start)
+        if cache is None:
+            outcome = NO_CACHE
+        else:
+            outcome = CACHE_HIT if cache.hits > hits else CACHE_MISS
+        self.cache_outcomes[outcome] += 1
+        match = result
+        if cost:
+            match = getattr(self.index, 'index', self.index).lookup(number)
+        length = 0 if match is None else len(match[0]) - 1
+        self.prefix_lengths[length] = self.prefix_lengths.get(length, 0) + 1
+        return result
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) match of the given phone number from the
+        wrapped index, measuring the lookup if it is sampled.
+        """
+        self._countdown -= 1
+        if self._countdown > 0:
+            return self._lookup(number)
+        return self._measure(number)
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number from the wrapped
+        index's cost, measuring the call if it is sampled.
+        """
+        self._countdown -= 1
+        if self._countdown > 0:
+            return self._cost(number)
+        return self._measure(number, cost=True)
+
+    def stats(self):
+        """
+        Return a dict of the lookups made, the latency summary of the
+        measured ones in nanoseconds and their counts by matched prefix
+        length and cache outcome.
+        """
+        return {
+            'lookups': self.lookup_count(),
+            'latency_ns': self.latency.summary(),
+            'prefix_lengths': dict(sorted(self.prefix_lengths.items())),
+            'cache_outcomes': dict(self.cache_outcomes),
+        }
+
+
+def format_stats(stats):
+    """Return the stats of an InstrumentedIndex as lines of text."""
+    latency = stats['latency_ns']
+    lines = ['{} lookups, {} measured'.format(stats['lookups'],
+                                              latency['count'])]
+    lines.append('latency us: ' + ' '.join(
+        '{}={:.2f}'.format(name, latency[name] / 1000)
+        for name in ['min', 'mean', 'p50', 'p95', 'p99', 'max']))
+    lines.append('matched prefix length: ' + ' '.join(
+        '{}:{}'.format(length, count)
+        for length, count in stats['prefix_lengths'].items()))
+    lines.append('cache: ' + ' '.join(
+        '{}:{}'.format(outcome, count)
+        for outcome, count in stats['cache_outcomes'].items()))
+    return '\n'.join(lines)
@@ -0,0 +1,117 @@
+#!python
+
+from metrics import (LatencyHistogram, InstrumentedIndex, bucket_index,
+                     bucket_high, format_stats, SUB_BUCKETS)
+from routecache import CachedRouteIndex
+from routing import RouteTrie
+from routing_test import ROUTES
+import unittest
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_buckets(self):
+        # small values get a bucket each
+        for value in range(SUB_BUCKETS):
+            assert bucket_index(value) == value
+            assert bucket_high(value) == value
+        # each larger value falls in a bucket ending at most 1/16 above it
+        previous = SUB_BUCKETS - 1
+        for value in range(SUB_BUCKETS, 100000):
+            index = bucket_index(value)
+            assert index in (previous, previous + 1)
+            assert value <= bucket_high(index) <= value * 17 / 16
+            previous = index
+        assert bucket_high(bucket_index(1024)) == 1087
+
+    def test_record(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile(0.5) == 0
+        for value in [5, 1000, 3, 40]:
+            histogram.record(value)
+        assert histogram.count == 4
+        assert histogram.min == 3
+        assert histogram.max == 1000
+        assert histogram.mean() == 262
+        assert histogram.percentile(0.5) == 5
+        assert histogram.percentile(1.0) == 1000
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+        summary = histogram.summary()
+        assert summary['count'] == 10000
+        for name, exact in [('p50', 5000), ('p95', 9500), ('p99', 9900)]:
+            assert exact <= summary[name] <= exact * 1.07
+
+    def test_merge(self):
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(10)
+        second.record(2000)
+        first.merge(second)
+        assert first.count == 2
+        assert first.min == 10
+        assert first.max == 2000
+
+
+class InstrumentedIndexTest(unittest.TestCase):
+
+    def test_counts_prefix_lengths(self):
+        ticks = iter(range(0, 1000, 100))
+        index = InstrumentedIndex(RouteTrie(ROUTES), sample_every=1,
+                                  clock=lambda: next(ticks))
+        assert index.cost('+14152345678') == 0.03
+        assert index.lookup('+14159999999') == ('+1415', 0.02)
+        assert index.cost('+19876543210') == 0
+        stats = index.stats()
+        assert stats['lookups'] == 3
+        assert stats['latency_ns']['p50'] == 100
+        assert stats['prefix_lengths'] == {0: 1, 4: 1, 7: 1}
+        assert stats['cache_outcomes'] == {'hit': 0, 'miss': 0, 'none': 3}
+        assert 'p99=0.10' in format_stats(stats)
+
+    def test_counts_cache_outcomes(self):
+        index = InstrumentedIndex(CachedRouteIndex(RouteTrie(ROUTES)),
+                                  sample_every=1)
+        index.cost('+14152345678')
+        index.cost('+14152345678')
+        index.cost('+15124156620')
+        assert index.stats()['cache_outcomes'] == {'hit': 1, 'miss': 2,
+                                                   'none': 0}
+        # the untimed lookup for the prefix length bypasses the cache
+        assert index.index.cache.hits == 1
+        assert index.stats()['prefix_lengths'] == {4: 1, 7: 2}
+
+    def test_times_the_call_made(self):
+        calls = []
+
+        class Index(object):
+            def lookup(self, number):
+                calls.append('lookup')
+                return '+1415', 0.02
+
+            def cost(self, number):
+                calls.append('cost')
+                return 0.02
+
+        index = InstrumentedIndex(Index(), sample_every=1,
+                                  clock=lambda: len(calls))
+        assert index.cost('+14152345678') == 0.02
+        # cost was timed, and its prefix looked up once the clock stopped
+        assert calls == ['cost', 'lookup']
+        assert index.latency.max == 1
+
+    def test_sampling(self):
+        index = InstrumentedIndex(RouteTrie(ROUTES), sample_every=4)
+        for _ in range(10):
+            assert index.cost('+14152345678') == 0.03
+        assert index.lookup_count() == 10
+        assert index.latency.count == 3  # lookups 1, 5 and 9
+        with self.assertRaises(ValueError):
+            InstrumentedIndex(RouteTrie(ROUTES), sample_every=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
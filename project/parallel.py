@@ -0,0 +1,233 @@
+#!python
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from array import array
+from compacttrie import to_fixed, from_fixed
+from pricer import price_numbers, write_costs, FILE_BUFFER_SIZE
+from routefile import MappedRouteTrie, compile_routes, is_compiled
+from routing import parse_route, load_routes
+from sortedroutes import SortedRoutes, encode, decode
+
+# Route index mapped once by each worker process when its pool starts
+_worker_index = None
+
+
+def split_ranges(path, parts):
+    """
+    Split the file at the given path into at most the given number of byte
+    ranges of about equal size, each starting at the beginning of a line and
+    ending just after a newline (or at the end of the file).
+    Return a list of (start, end) offsets in file order.
+    Running time: O(parts * l) to skip a partial line of length l per split
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as numbers_file:
+        for part in range(1, parts):
+            numbers_file.seek(size * part // parts)
+            # move to the start of the next whole line
+            numbers_file.readline()
+            position = min(numbers_file.tell(), size)
+            if position > bounds[-1]:
+                bounds.append(position)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def read_range(path, start, end):
+    """
+    Generate the stripped non-blank lines of the file at the given path that
+    start in the byte range [start, end).
+    Running time: O(end - start)
+    Space usage: O(1) besides the line being read
+    """
+    with open(path, 'rb', buffering=FILE_BUFFER_SIZE) as numbers_file:
+        numbers_file.seek(start)
+        position = start
+        while position < end:
+            line = numbers_file.readline()
+            if not line:
+                break
+            position += len(line)
+            number = line.strip()
+            if number:
+                yield number.decode('ascii')
+
+
+def _attach(index_path):
+    """Pool initializer that maps the shared route index in a worker."""
+    global _worker_index
+    _worker_index = MappedRouteTrie(index_path)
+
+
+def _price_range(task):
+    """
+    Price the numbers in one byte range of a numbers file with the worker's
+    mapped route index, writing them to a part file. Return the count.
+    """
+    numbers_path, start, end, part_path = task
+    with open(part_path, 'w', buffering=FILE_BUFFER_SIZE) as part_file:
+        priced = price_numbers(_worker_index,
+                               read_range(numbers_path, start, end))
+        return write_costs(priced, part_file)
+
+
+def _parse_range(task):
+    """
+    Parse the route lines in one byte range of a route cost file into a
+    tuple of compact arrays: prefix keys as encoded by sortedroutes.encode
+    and fixed-point costs, in file order. Arrays are sent back to the parent
+    process as flat bytes instead of one pickled tuple per route.
+    """
+    route_path, start, end = task
+    keys = array('q')
+    costs = array('i')
+    add_key, add_cost = keys.append, costs.append  # Bound once per range
+    for line in read_range(route_path, start, end):
+        prefix, cost = parse_route(line)
+        add_key(encode(prefix))
+        add_cost(to_fixed(cost))
+    return keys, costs
+
+
+def parse_routes_parallel(route_path, processes=None, parts=None):
+    """
+    Parse the route cost file at the given path with a pool of worker
+    processes, each parsing newline-aligned byte ranges of the file (4 per
+    process by default), and return a tuple of (prefix keys, fixed-point
+    costs) arrays of all its routes in file order.
+    Raise ValueError if any line is malformed.
+    Running time: O(n / processes) for a file with n characters
+    Space usage: O(r) for r routes, 12 bytes each
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if parts is None:
+        parts = 4 * processes
+    tasks = [(route_path, start, end)
+             for start, end in split_ranges(route_path, parts)]
+    with multiprocessing.Pool(processes) as pool:
+        chunks = pool.map(_parse_range, tasks)
+    keys = array('q')
+    costs = array('i')
+    # join the chunks in file order, so later routes still win
+    for chunk_keys, chunk_costs in chunks:
+        keys.extend(chunk_keys)
+        costs.extend(chunk_costs)
+    return keys, costs
+
+
+def load_routes_parallel(route_path, index=None, processes=None, parts=None):
+    """
+    Load every route in the route cost file at the given path like
+    routing.load_routes, but parse the file in parallel first. By default
+    the parsed arrays become a SortedRoutes index directly, without decoding
+    a single prefix; a given route index instead gets every route inserted
+    one at a time, which costs more than the parse saves. Return the index.
+    Unlike load_routes, costs are rounded to fixed point (see
+    compacttrie.to_fixed), and a cost above about 2147 or a prefix over
+    MAX_DIGITS digits raises ValueError.
+    Running time: O(n / processes) to parse a file with n characters, plus
+    O(r log r) to sort r routes (O(r) if the file is sorted by prefix)
+    """
+    keys, costs = parse_routes_parallel(route_path, processes, parts)
+    if index is None:
+        return SortedRoutes.from_arrays(keys, costs)
+    insert = index.insert
+    for key, fixed in zip(keys, costs):
+        insert(decode(key), from_fixed(fixed))
+    return index
+
+
+def price_file_parallel(index_path, numbers_path, costs_path, processes=None,
+                        parts=None):
+    """
+    Price the phone numbers file at numbers_path with a pool of worker
+    processes that all map the compiled route index file at index_path, and
+    write the call costs file to costs_path in input order.
+    The input is split into parts byte ranges (4 per process by default),
+    each priced into its own part file, and the parts are joined in order.
+    Return the number of numbers priced.
+    Running time: O(n * l / processes) for n numbers of length l
+    Space usage: O(1) per process, since the route index pages are shared
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if parts is None:
+        parts = 4 * processes
+    ranges = split_ranges(numbers_path, parts)
+    part_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(costs_path)))
+    tasks = [(numbers_path, start, end,
+              os.path.join(part_dir, 'part-{}.txt'.format(part)))
+             for part, (start, end) in enumerate(ranges)]
+    try:
+        with multiprocessing.Pool(processes, _attach, (index_path,)) as pool:
+            counts = pool.map(_price_range, tasks)
+        # join the part files in input order
+        with open(costs_path, 'wb') as costs_file:
+            for task in tasks:
+                with open(task[3], 'rb') as part_file:
+                    shutil.copyfileobj(part_file, costs_file, FILE_BUFFER_SIZE)
+    finally:
+        shutil.rmtree(part_dir)
+    return sum(counts)
+
+
+def main():
+    """Price a phone numbers file on every core against the given routes."""
+    import sys
+    import time
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) == 2 and args[0] == 'parse':
+        start = time.time()
+        keys, costs = parse_routes_parallel(args[1])
+        parsed = time.time()
+        SortedRoutes.from_arrays(keys, costs)
+        built = time.time()
+        load_routes(args[1])
+        done = time.time()
+        megabytes = os.path.getsize(args[1]) / 2 ** 20
+        print('Parsed {} routes ({:.1f} MB) on {} processes in {:.3f} '
+              'seconds ({:.1f} MB/s)'.format(len(keys), megabytes,
+                                             os.cpu_count(), parsed - start,
+                                             megabytes / (parsed - start)))
+        print('Loaded them into SortedRoutes in {:.3f} seconds in all, '
+              'against {:.3f} seconds for a serial load_routes'
+              .format(built - start, done - built))
+    elif len(args) >= 3:
+        route_paths, numbers_path, costs_path = args[:-2], args[-2], args[-1]
+        start = time.time()
+        if len(route_paths) == 1 and is_compiled(route_paths[0]):
+            index_path = route_paths[0]
+        else:
+            # workers can only share a compiled index, so compile one first
+            handle, index_path = tempfile.mkstemp(suffix='.rtix')
+            os.close(handle)
+            compile_routes(route_paths, index_path)
+        loaded = time.time()
+        try:
+            count = price_file_parallel(index_path, numbers_path, costs_path)
+        finally:
+            if index_path != route_paths[0]:
+                os.remove(index_path)
+        done = time.time()
+        print('Prepared route index in {:.3f} seconds'.format(loaded - start))
+        print('Priced {} numbers on {} processes in {:.3f} seconds'
+              .format(count, os.cpu_count(), done - loaded))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt '
+              'phone-numbers.txt call-costs.txt'.format(sys.argv[0]))
+        print('       {} routes.rtix phone-numbers.txt call-costs.txt'
+              .format(sys.argv[0]))
+        print('  prices phone numbers on every core, sharing one route index')
+        print('       {} parse route-costs.txt'.format(sys.argv[0]))
+        print('  parses a route cost file on every core and reports MB/s and '
+              'load time')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!python
+
+from parallel import (split_ranges, read_range, price_file_parallel,
+                      parse_routes_parallel, load_routes_parallel)
+from pricer import price_file
+from routefile import compile_routes
+from routing import RouteTrie, load_routes
+from sortedroutes import SortedRoutes, decode
+from routing_test import ROUTES, write_temp_file
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+
+class SplitRangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = write_temp_file(['+15124156620', '+14152345678',
+                                     '+19876543210', '+1415'])
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_ranges_cover_file_on_line_boundaries(self):
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as numbers_file:
+            data = numbers_file.read()
+        for parts in range(1, 8):
+            ranges = split_ranges(self.path, parts)
+            assert ranges[0][0] == 0
+            assert ranges[-1][1] == size
+            assert len(ranges) <= parts
+            for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+                assert end == next_start
+                assert data[end - 1:end] == b'\n'
+
+    def test_read_range(self):
+        lines = []
+        for start, end in split_ranges(self.path, 3):
+            lines.extend(read_range(self.path, start, end))
+        assert lines == ['+15124156620', '+14152345678', '+19876543210',
+                         '+1415']
+
+
+class PriceFileParallelTest(unittest.TestCase):
+
+    def test_matches_serial_pricer(self):
+        rand = random.Random(7)
+        numbers = ['+1' + ''.join(rand.choice('0123456789')
+                                  for _ in range(10)) for _ in range(500)]
+        numbers_path = write_temp_file(numbers)
+        route_path = write_temp_file(['{},{}'.format(*route)
+                                      for route in ROUTES])
+        work_dir = tempfile.mkdtemp()
+        index_path = os.path.join(work_dir, 'routes.rtix')
+        serial_path = os.path.join(work_dir, 'serial.txt')
+        parallel_path = os.path.join(work_dir, 'parallel.txt')
+        try:
+            compile_routes([route_path], index_path)
+            price_file(RouteTrie(ROUTES), numbers_path, serial_path)
+            count = price_file_parallel(index_path, numbers_path,
+                                        parallel_path, processes=2, parts=5)
+            assert count == 500
+            with open(serial_path) as serial, open(parallel_path) as parallel:
+                assert parallel.read() == serial.read()
+            # only the output files are left behind
+            assert sorted(os.listdir(work_dir)) == ['parallel.txt',
+                                                   'routes.rtix', 'serial.txt']
+        finally:
+            os.remove(numbers_path)
+            os.remove(route_path)
+            shutil.rmtree(work_dir)
+
+
+class ParseRoutesParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.route_path = write_temp_file(['{},{}'.format(*route)
+                                           for route in ROUTES] +
+                                          ['', '+1415,0.025'])
+
+    def tearDown(self):
+        os.remove(self.route_path)
+
+    def test_parse_routes_parallel(self):
+        keys, costs = parse_routes_parallel(self.route_path, processes=2,
+                                            parts=3)
+        # routes come back in file order, blank lines skipped
+        assert [decode(key) for key in keys] == \
+            ['1512', '1415', '1415234', '1415246', '1415']
+        assert list(costs) == [40000, 20000, 30000, 10000, 25000]
+
+    def test_load_routes_parallel_matches_serial(self):
+        index = load_routes_parallel(self.route_path, processes=2, parts=4)
+        assert isinstance(index, SortedRoutes)
+        assert index.items() == load_routes(self.route_path).items()
+        assert index.get('+1415') == 0.025
+        index = load_routes_parallel(self.route_path, RouteTrie(),
+                                     processes=2, parts=4)
+        assert index.items() == load_routes(self.route_path).items()
+
+    def test_malformed_line(self):
+        path = write_temp_file(['+1415,0.02', '+1415;0.02'])
+        try:
+            with self.assertRaises(ValueError):
+                parse_routes_parallel(path, processes=2, parts=2)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
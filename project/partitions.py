@@ -0,0 +1,229 @@
+#!python
+
+import os
+from compacttrie import CompactRouteTrie
+from routecache import LRUCache
+from routefile import HEADER, MAGIC, read_index, write_index
+from routing import load_carriers, normalize, NO_ROUTE_COST
+
+# Two-digit E.164 country codes; the only one-digit codes are 1 (North
+# America) and 7 (Russia, Kazakhstan) and every other code has three digits
+ONE_DIGIT_CODES = frozenset(['1', '7'])
+TWO_DIGIT_CODES = frozenset(
+    ['20', '27', '30', '31', '32', '33', '34', '36', '39', '40', '41', '43',
+     '44', '45', '46', '47', '48', '49', '51', '52', '53', '54', '55', '56',
+     '57', '58', '60', '61', '62', '63', '64', '65', '66', '81', '82', '84',
+     '86', '90', '91', '92', '93', '94', '95', '98'])
+# Partition file names in a partition directory
+PARTITION_FILE = 'cc{}.rtix'
+# Routes shorter than their country code, like +3, are kept in this
+# partition, which is always loaded since it is consulted for every number
+SHARED_FILE = 'shared.rtix'
+# Bytes of partitions kept loaded by default
+MAX_BYTES = 64 << 20
+
+
+def country_code_length(digits):
+    """
+    Return the number of digits in the E.164 country code that the given
+    phone number or route prefix digits start with (or would start with,
+    if they are too short to hold a whole country code).
+    Running time: O(1)
+    """
+    if digits[:1] in ONE_DIGIT_CODES:
+        return 1
+    if digits[:2] in TWO_DIGIT_CODES:
+        return 2
+    return 3
+
+
+def country_code(digits):
+    """
+    Return the E.164 country code that the given phone number or route
+    prefix digits start with, or all the digits if there are too few.
+    Running time: O(1)
+    """
+    return digits[:country_code_length(digits)]
+
+
+def is_partition_file(name):
+    """Return True if the given file name is one of a partition's files."""
+    return name == SHARED_FILE or \
+        name.startswith('cc') and name.endswith('.rtix')
+
+
+def write_partitions(routes, directory):
+    """
+    Split the given (prefix, cost) routes by country code and write each
+    group as a compiled route index file in the given directory, which must
+    exist. Routes shorter than their country code go to the shared file.
+    Partition files left in the directory from earlier routes that have no
+    group now are removed, so a withdrawn country is no longer priced.
+    Return a dict of country code (None for shared) to number of routes.
+    Running time: O(p log p) for p routes
+    """
+    groups = {}  # Maps country code, or None for shared, to its routes
+    for prefix, cost in routes:
+        digits = normalize(prefix)
+        length = country_code_length(digits)
+        code = digits[:length] if len(digits) >= length else None
+        groups.setdefault(code, []).append((digits, cost))
+    names = set()  # Partition files written for the given routes
+    for code, group in groups.items():
+        name = SHARED_FILE if code is None else PARTITION_FILE.format(code)
+        write_index(CompactRouteTrie(group), os.path.join(directory, name))
+        names.add(name)
+    # every file was replaced atomically, so only stale ones remain to go
+    for name in os.listdir(directory):
+        if is_partition_file(name) and name not in names:
+            os.remove(os.path.join(directory, name))
+    return {code: len(group) for code, group in groups.items()}
+
+
+def partition_routes(route_paths, directory):
+    """
+    Merge the given carrier route cost files keeping the cheapest cost per
+    prefix, then write them as country code partitions to the given
+    directory, creating it if needed. Return the dict of route counts.
+    """
+    os.makedirs(directory, exist_ok=True)
+    return write_partitions(load_carriers(route_paths).items(), directory)
+
+
+class PartitionedRouteIndex(object):
+    """
+    Route index split into one compiled route index file per country code.
+    A partition is read into memory the first time a number in its country
+    is priced, and the least recently used partitions are evicted whenever
+    the loaded ones use more than max_bytes, so a process pricing only a
+    few countries only holds those countries' routes. Not thread-safe.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        """
+        Open the partitions in the given directory, reading only the header
+        of each file until it is first used.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.codes = set()  # Country codes that have a partition
+        self.size = 0  # Number of routes across all partitions
+        self.shared = CompactRouteTrie()  # Routes shorter than their code
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name == SHARED_FILE:
+                self.shared = read_index(path)
+                self.size += self.shared.length()
+            elif is_partition_file(name):
+                self.codes.add(name[2:-len('.rtix')])
+                self.size += self._route_count(path)
+        # LRU of loaded partitions by country code, evicted by bytes, not
+        # entries, so its own capacity never binds
+        self.loaded = LRUCache(max(len(self.codes), 1))
+        self.loaded_bytes = 0  # Bytes used by the loaded partitions
+        self.loads = 0  # Partitions read from disk
+        self.evictions = 0  # Partitions evicted to stay within max_bytes
+
+    def __repr__(self):
+        """Return a string representation of this partitioned index."""
+        return 'PartitionedRouteIndex({!r}, {} of {} loaded)'.format(
+            self.directory, self.loaded.length(), len(self.codes))
+
+    def _route_count(self, path):
+        """Return the number of routes in a partition file from its header."""
+        with open(path, 'rb') as index_file:
+            header = index_file.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a route index file: {}'.format(path))
+        return HEADER.unpack(header)[3]
+
+    def is_empty(self):
+        """Return True if no partition holds any route."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes across all partitions."""
+        return self.size
+
+    def partition(self, code):
+        """
+        Return the index of the given country code's partition, reading it
+        from disk and evicting least recently used partitions if it is not
+        loaded, or None if the country has no routes.
+        Running time: O(1) if loaded, else O(s) for s slots in its file
+        """
+        try:
+            return self.loaded.get(code)
+        except KeyError:
+            if code not in self.codes:
+                return None
+        index = read_index(os.path.join(self.directory,
+                                        PARTITION_FILE.format(code)))
+        self.loads += 1
+        self.loaded_bytes += index.nbytes()
+        self.loaded.put(code, index)
+        # evict from the least recently used end, but keep the new one
+        while self.loaded_bytes > self.max_bytes and self.loaded.length() > 1:
+            old_code, old_index = self.loaded.order.head.data
+            self.loaded.delete(old_code)
+            self.loaded_bytes -= old_index.nbytes()
+            self.evictions += 1
+        return index
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches. Routes in the
+        shared partition are shorter than any in a country partition, so
+        they are only consulted when the country has no match.
+        Running time: O(l) for a number of length l once its partition is
+        loaded
+        """
+        digits = normalize(number)
+        index = self.partition(country_code(digits))
+        if index is not None:
+            match = index.lookup(digits)
+            if match is not None:
+                return match
+        return self.shared.lookup(digits)
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        """
+        match = self.lookup(number)
+        return NO_ROUTE_COST if match is None else match[1]
+
+    def stats(self):
+        """
+        Return a dict of the partitions loaded, the bytes they use, and the
+        numbers of loads and evictions so far.
+        """
+        return {
+            'partitions': len(self.codes),
+            'loaded': self.loaded.length(),
+            'loaded_bytes': self.loaded_bytes,
+            'loads': self.loads,
+            'evictions': self.evictions,
+        }
+
+
+def main():
+    """Write the given route cost files as country code partitions."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) >= 2:
+        counts = partition_routes(args[:-1], args[-1])
+        shared = counts.pop(None, 0)
+        print('Wrote {} country partitions ({} routes) and {} shared routes '
+              'to {}'.format(len(counts), sum(counts.values()), shared,
+                             args[-1]))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt directory'
+              .format(sys.argv[0]))
+        print('  writes one compiled route index per country code')
+
+
+if __name__ == '__main__':
+    main()
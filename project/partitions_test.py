@@ -0,0 +1,113 @@
+#!python
+
+from partitions import (country_code, write_partitions, partition_routes,
+                        PartitionedRouteIndex)
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES, write_temp_file
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+COUNTRY_ROUTES = ROUTES + [('+44', 0.05), ('+4420', 0.04), ('+353', 0.06),
+                           ('+3531', 0.05), ('+3', 0.5), ('+35', 0.3)]
+
+
+class CountryCodeTest(unittest.TestCase):
+
+    def test_country_code(self):
+        assert country_code('14152345678') == '1'
+        assert country_code('74951234567') == '7'
+        assert country_code('442071234567') == '44'
+        assert country_code('35312345678') == '353'
+        assert country_code('8801234567') == '880'
+        # digits shorter than their country code
+        assert country_code('35') == '35'
+        assert country_code('') == ''
+
+
+class PartitionedRouteIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_partitions(self):
+        counts = write_partitions(COUNTRY_ROUTES, self.directory)
+        assert counts == {'1': 4, '44': 2, '353': 2, None: 2}
+        assert sorted(os.listdir(self.directory)) == \
+            ['cc1.rtix', 'cc353.rtix', 'cc44.rtix', 'shared.rtix']
+
+    def test_rewrite_drops_withdrawn_countries(self):
+        write_partitions(COUNTRY_ROUTES, self.directory)
+        notes_path = os.path.join(self.directory, 'README')
+        open(notes_path, 'w').close()
+        counts = write_partitions([('+44', 0.05), ('+1415', 0.02)],
+                                  self.directory)
+        assert counts == {'1': 1, '44': 1}
+        write_partitions([('+1415', 0.03)], self.directory)
+        # files that are not partitions are left alone
+        assert sorted(os.listdir(self.directory)) == ['README', 'cc1.rtix']
+        index = PartitionedRouteIndex(self.directory)
+        assert index.length() == 1
+        assert index.cost('+441234') == NO_ROUTE_COST
+        assert index.cost('+31612345678') == NO_ROUTE_COST
+        assert index.cost('+14152345678') == 0.03
+
+    def test_partitions_load_on_first_use(self):
+        write_partitions(COUNTRY_ROUTES, self.directory)
+        index = PartitionedRouteIndex(self.directory)
+        assert index.length() == 10
+        assert index.codes == {'1', '44', '353'}
+        assert index.stats()['loaded'] == 0
+        assert index.cost('+14152345678') == 0.03
+        assert index.lookup('+442071234567') == ('+4420', 0.04)
+        assert index.cost('+14159999999') == 0.02
+        stats = index.stats()
+        assert stats['loaded'] == 2
+        assert stats['loads'] == 2
+
+    def test_shared_routes(self):
+        write_partitions(COUNTRY_ROUTES, self.directory)
+        index = PartitionedRouteIndex(self.directory)
+        assert index.lookup('+35312345678') == ('+3531', 0.05)
+        # no +353 route matches this number, but the shorter +35 does
+        assert index.lookup('+35222345678') == ('+35', 0.3)
+        assert index.lookup('+31612345678') == ('+3', 0.5)
+        assert index.cost('+81312345678') == NO_ROUTE_COST
+
+    def test_evicts_least_recently_used(self):
+        write_partitions(COUNTRY_ROUTES, self.directory)
+        index = PartitionedRouteIndex(self.directory, max_bytes=1)
+        index.cost('+14152345678')
+        index.cost('+442071234567')
+        # only the partition in use is kept under a tiny budget
+        assert index.loaded.order.items()[0][0] == '44'
+        assert index.stats()['evictions'] == 1
+        assert index.cost('+14152345678') == 0.03
+        assert index.stats()['loads'] == 3
+
+    def test_matches_route_trie(self):
+        routes = random_routes(500)
+        paths = [write_temp_file(['{},{}'.format(*route)
+                                  for route in routes])]
+        try:
+            partition_routes(paths, self.directory)
+        finally:
+            os.remove(paths[0])
+        trie = RouteTrie(routes)
+        index = PartitionedRouteIndex(self.directory, max_bytes=4096)
+        rand = random.Random(9)
+        for _ in range(500):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            assert index.lookup(number) == trie.lookup(number)
+        assert index.loaded_bytes <= 4096 or index.loaded.length() == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!python
+
+from itertools import islice
+from metrics import InstrumentedIndex, format_stats
+from routefile import open_index
+
+# Number of output lines collected before each bulk write
+BUFFER_LINES = 8192
+# Number of phone numbers deduplicated and sorted together by price_batch
+BATCH_SIZE = 1 << 18
+# Size in bytes of the file buffers used for reading and writing
+FILE_BUFFER_SIZE = 1 << 20
+
+
+def format_cost(cost):
+    """
+    Return the given cost formatted like the call costs files, e.g. 0.03 ->
+    '0.03' and a cost of 0 (no route) -> '0'.
+    Running time: O(1)
+    """
+    if cost == int(cost):
+        return str(int(cost))
+    return repr(cost)
+
+
+def read_numbers(path):
+    """
+    Generate the phone numbers in the file at the given path one line at a
+    time, so the whole file is never held in memory.
+    Running time: O(n) for a file with n characters
+    Space usage: O(1) besides the line being read
+    """
+    with open(path, buffering=FILE_BUFFER_SIZE) as numbers_file:
+        for line in numbers_file:
+            number = line.strip()
+            # skip blank lines (e.g. trailing newline at end of file)
+            if number:
+                yield number
+
+
+def price_numbers(index, numbers):
+    """
+    Generate a (number, cost) tuple for each phone number in the given
+    iterable, looked up in the given route index as the numbers arrive.
+    Running time: O(n * l) for n numbers of length l
+    Space usage: O(1) since numbers are priced one at a time
+    """
+    cost = index.cost  # avoid an attribute lookup per number
+    for number in numbers:
+        yield number, cost(number)
+
+
+def price_batch(index, numbers):
+    """
+    Return a list of the costs of the given list of phone numbers in the
+    same order. Each distinct number is looked up once, in sorted order so
+    numbers sharing a prefix are priced one after another and each walk
+    follows nodes the previous one left in the CPU cache.
+    Running time: O(n + u log u + u * l) for n numbers with u distinct ones
+    of length l
+    Space usage: O(u) for the distinct numbers and their costs
+    """
+    unique = sorted(set(numbers))
+    # walks start from the root rather than where the previous walk left
+    # the shared prefix: finding that point costs as much in Python as
+    # walking to it (0.40 s against 0.25 s for 135K sorted numbers on a
+    # 100K route RouteTrie)
+    cost = index.cost
+    # scatter the costs back to every occurrence of each number
+    costs = dict(zip(unique, [cost(number) for number in unique]))
+    return [costs[number] for number in numbers]
+
+
+def price_numbers_batched(index, numbers, batch_size=BATCH_SIZE):
+    """
+    Generate a (number, cost) tuple for each phone number in the given
+    iterable, in input order, pricing batch_size numbers at a time with
+    price_batch.
+    Running time: O(n log b + u * l) for n numbers in batches of b with u
+    distinct ones per batch of length l
+    Space usage: O(batch_size) for the batch being priced
+    """
+    numbers = iter(numbers)
+    while True:
+        batch = list(islice(numbers, batch_size))
+        if not batch:
+            return
+        yield from zip(batch, price_batch(index, batch))
+
+
+def write_costs(priced, costs_file, buffer_lines=BUFFER_LINES):
+    """
+    Write '+number,cost' lines for the given (number, cost) tuples to the
+    given open file, collecting buffer_lines lines per bulk write.
+    Return the number of lines written.
+    Running time: O(n) for n priced numbers
+    Space usage: O(buffer_lines) for the pending lines
+    """
+    count = 0
+    pending = []
+    for number, cost in priced:
+        pending.append('{},{}\n'.format(number, format_cost(cost)))
+        if len(pending) >= buffer_lines:
+            costs_file.write(''.join(pending))
+            count += len(pending)
+            pending = []
+    # flush the last partial buffer
+    if pending:
+        costs_file.write(''.join(pending))
+        count += len(pending)
+    return count
+
+
+def price_file(index, numbers_path, costs_path, buffer_lines=BUFFER_LINES,
+               batch_size=None):
+    """
+    Stream the phone numbers file at numbers_path through the given route
+    index and write a call costs file to costs_path. If a batch_size is
+    given, numbers are priced in deduplicated, sorted batches of that size.
+    Return the number of numbers priced.
+    Running time: O(n * l) for n numbers of length l
+    Space usage: O(buffer_lines + batch_size) no matter how long the input
+    file is
+    """
+    with open(costs_path, 'w', buffering=FILE_BUFFER_SIZE) as costs_file:
+        numbers = read_numbers(numbers_path)
+        if batch_size is None:
+            priced = price_numbers(index, numbers)
+        else:
+            priced = price_numbers_batched(index, numbers, batch_size)
+        return write_costs(priced, costs_file, buffer_lines)
+
+
+def main():
+    """Price a phone numbers file against the given route cost files."""
+    import sys
+    import time
+    args = sys.argv[1:]  # Ignore script file name
+    flags = set()
+    while args[:1] in (['--batch'], ['--instrument']):
+        flags.add(args.pop(0))
+    batched = '--batch' in flags
+    if len(args) >= 3:
+        route_paths, numbers_path, costs_path = args[:-2], args[-2], args[-1]
+        start = time.time()
+        index = open_index(route_paths)
+        if '--instrument' in flags:
+            index = InstrumentedIndex(index)
+        loaded = time.time()
+        count = price_file(index, numbers_path, costs_path,
+                           batch_size=BATCH_SIZE if batched else None)
+        done = time.time()
+        print('Loaded {} routes in {:.3f} seconds'.format(index.length(),
+                                                        loaded - start))
+        print('Priced {} numbers in {:.3f} seconds'.format(count,
+                                                         done - loaded))
+        if '--instrument' in flags:
+            print(format_stats(index.stats()))
+    else:
+        print('Usage: {} [--batch] [--instrument] route-costs1.txt ... '
+              'route-costsN.txt phone-numbers.txt call-costs.txt'
+              .format(sys.argv[0]))
+        print('       {} [--batch] [--instrument] routes.rtix '
+              'phone-numbers.txt call-costs.txt'.format(sys.argv[0]))
+        print('  writes the cost of calling each phone number to call-costs.txt')
+        print('  --batch prices deduplicated numbers in sorted batches')
+        print('  --instrument samples lookups and prints their latency '
+              'percentiles')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!python
+
+from pricer import (format_cost, read_numbers, price_numbers, write_costs,
+                    price_file, price_batch, price_numbers_batched)
+from compacttrie import CompactRouteTrie
+from routing import RouteTrie
+from routing_test import ROUTES, write_temp_file
+import io
+import os
+import unittest
+
+
+class PricerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RouteTrie(ROUTES)
+
+    def test_format_cost(self):
+        assert format_cost(0) == '0'
+        assert format_cost(0.0) == '0'
+        assert format_cost(0.03) == '0.03'
+        assert format_cost(1.5) == '1.5'
+
+    def test_read_numbers(self):
+        path = write_temp_file(['+15124156620', '', ' +14152345678 '])
+        try:
+            assert list(read_numbers(path)) == ['+15124156620', '+14152345678']
+        finally:
+            os.remove(path)
+
+    def test_price_numbers_is_lazy(self):
+        numbers = iter(['+15124156620', '+19876543210'])
+        priced = price_numbers(self.index, numbers)
+        assert next(priced) == ('+15124156620', 0.04)
+        # the second number has not been read from the input yet
+        assert next(numbers) == '+19876543210'
+
+    def test_price_batch(self):
+        numbers = ['+19876543210', '+14152345678', '+15124156620',
+                   '+14152345678', '+14152345679', '+19876543210']
+        expected = [0, 0.03, 0.04, 0.03, 0.03, 0]
+        assert price_batch(self.index, numbers) == expected
+        assert price_batch(CompactRouteTrie(ROUTES), numbers) == expected
+        assert price_batch(self.index, []) == []
+
+    def test_price_numbers_batched(self):
+        numbers = ['+15124156620', '+19876543210', '+15124156620']
+        priced = price_numbers_batched(self.index, numbers, batch_size=2)
+        assert list(priced) == [('+15124156620', 0.04),
+                                ('+19876543210', 0),
+                                ('+15124156620', 0.04)]
+
+    def test_write_costs_buffers(self):
+        priced = [('+1512', 0.04), ('+1415', 0.02), ('+1987', 0)]
+        out = io.StringIO()
+        assert write_costs(priced, out, buffer_lines=2) == 3
+        assert out.getvalue() == '+1512,0.04\n+1415,0.02\n+1987,0\n'
+
+    def test_price_file(self):
+        numbers_path = write_temp_file(['+15124156620', '+14152345678',
+                                        '+19876543210'])
+        costs_path = numbers_path + '.costs'
+        try:
+            assert price_file(self.index, numbers_path, costs_path) == 3
+            with open(costs_path) as costs_file:
+                assert costs_file.read() == ('+15124156620,0.04\n'
+                                             '+14152345678,0.03\n'
+                                             '+19876543210,0\n')
+            assert price_file(self.index, numbers_path, costs_path,
+                              batch_size=2) == 3
+            with open(costs_path) as costs_file:
+                assert costs_file.read() == ('+15124156620,0.04\n'
+                                             '+14152345678,0.03\n'
+                                             '+19876543210,0\n')
+        finally:
+            os.remove(numbers_path)
+            os.remove(costs_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+#!python
+
+from routing import normalize, NO_ROUTE_COST
+
+
+class RadixNode(object):
+
+    def __init__(self, label='', cost=None):
+        """Initialize this node with the given edge label and route cost."""
+        self.label = label  # Digits on the edge from the parent to here
+        self.children = {}  # Maps first digit of each child's label to it
+        self.cost = cost  # Cost of the route ending here, if any
+
+    def __repr__(self):
+        """Return a string representation of this radix tree node."""
+        return 'RadixNode({!r}, {!r})'.format(self.label, self.cost)
+
+    def is_route(self):
+        """Return True if a route prefix ends at this node."""
+        return self.cost is not None
+
+
+class RadixRoutes(object):
+    """
+    Route index stored as a radix (Patricia) tree: a digit trie in which
+    every chain of nodes with a single child and no route is collapsed into
+    one node whose edge label holds all of its digits. So every node but
+    the root either ends a route or branches, the tree has fewer than 2 * p
+    nodes for p routes, and a lookup makes one hop per branch instead of one
+    per digit.
+    """
+
+    def __init__(self, routes=None):
+        """Initialize this index and insert the given (prefix, cost) routes."""
+        self.root = RadixNode()
+        self.size = 0  # Number of route prefixes stored
+        if routes is not None:
+            for prefix, cost in routes:
+                self.insert(prefix, cost)
+
+    def __repr__(self):
+        """Return a string representation of this radix route index."""
+        return 'RadixRoutes({} routes, {} nodes)'.format(self.size,
+                                                         self.node_count())
+
+    def is_empty(self):
+        """Return True if this index contains no routes."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes stored in this index."""
+        return self.size
+
+    def node_count(self):
+        """
+        Return the number of nodes in this tree, including the root.
+        Running time: O(n) for n nodes
+        """
+        count = 0
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            count += 1
+            nodes.extend(node.children.values())
+        return count
+
+    def _find_node(self, digits):
+        """
+        Return the node where exactly the given digits end, or None if they
+        end inside an edge label or leave the tree.
+        Running time: O(l) for l digits
+        """
+        node = self.root
+        depth = 0
+        while depth < len(digits):
+            node = node.children.get(digits[depth])
+            if node is None or not digits.startswith(node.label, depth):
+                return None
+            depth += len(node.label)
+        return node
+
+    def contains(self, prefix):
+        """
+        Return True if a route with exactly the given prefix is stored.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._find_node(normalize(prefix))
+        return node is not None and node.is_route()
+
+    def get(self, prefix):
+        """
+        Return the cost of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._find_node(normalize(prefix))
+        if node is None or not node.is_route():
+            raise KeyError('Route not found: {}'.format(prefix))
+        return node.cost
+
+    def insert(self, prefix, cost):
+        """
+        Insert a route with the given prefix and cost, or update its cost if
+        the prefix is already stored. Splits an edge whose label diverges
+        from the prefix or that the prefix ends inside of.
+        Running time: O(l) for a prefix of length l
+        """
+        if cost is None:
+            raise ValueError('Route cost must not be None: {}'.format(prefix))
+        digits = normalize(prefix)
+        node = self.root
+        depth = 0
+        while depth < len(digits):
+            child = node.children.get(digits[depth])
+            if child is None:
+                # the rest of the prefix becomes one new edge
+                node.children[digits[depth]] = RadixNode(digits[depth:], cost)
+                self.size += 1
+                return
+            label = child.label
+            # count the digits the label shares with the rest of the prefix
+            common = 1
+            while (common < len(label) and depth + common < len(digits) and
+                   label[common] == digits[depth + common]):
+                common += 1
+            if common < len(label):
+                # split the edge where the prefix leaves or ends inside it
+                middle = RadixNode(label[:common])
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                node.children[digits[depth]] = middle
+                child = middle
+            node = child
+            depth += common
+        if not node.is_route():
+            self.size += 1
+        node.cost = cost
+
+    def delete(self, prefix):
+        """
+        Delete the route with the given prefix, or raise KeyError. A node
+        left with no route and one child is merged into that child, and one
+        left with no route and no children is removed, so every path stays
+        collapsed.
+        Running time: O(l) for a prefix of length l
+        """
+        digits = normalize(prefix)
+        path = [(None, self.root)]  # (parent, node) pairs down to the prefix
+        depth = 0
+        while depth < len(digits):
+            parent = path[-1][1]
+            node = parent.children.get(digits[depth])
+            if node is None or not digits.startswith(node.label, depth):
+                raise KeyError('Route not found: {}'.format(prefix))
+            path.append((parent, node))
+            depth += len(node.label)
+        parent, node = path[-1]
+        if not node.is_route():
+            raise KeyError('Route not found: {}'.format(prefix))
+        node.cost = None
+        self.size -= 1
+        if parent is None:
+            return  # The root keeps its children as they are
+        if len(node.children) == 0:
+            del parent.children[node.label[0]]
+            # the parent may now be a routeless node with a single child
+            node = parent
+            parent = path[-2][0] if len(path) > 2 else None
+        if parent is not None and not node.is_route() and \
+                len(node.children) == 1:
+            child = next(iter(node.children.values()))
+            child.label = node.label + child.label
+            parent.children[child.label[0]] = child
+
+    def items(self):
+        """
+        Return a list of all (prefix, cost) routes in sorted prefix order.
+        Running time: O(n log b) for n nodes with b children each
+        """
+        routes = []
+        stack = [('', self.root)]
+        while stack:
+            digits, node = stack.pop()
+            if node.is_route():
+                routes.append(('+' + digits, node.cost))
+            # push children in reverse order so they are popped in order
+            for first in sorted(node.children, reverse=True):
+                child = node.children[first]
+                stack.append((digits + child.label, child))
+        return routes
+
+    def _longest_match(self, digits):
+        """
+        Return a tuple of (length, node) of the longest route prefix of the
+        given digits, or (0, None) if no route matches.
+        Running time: O(l) for l digits, in one hop per branch
+        """
+        node = self.root
+        match = (0, node) if node.is_route() else (0, None)
+        depth = 0
+        while depth < len(digits):
+            node = node.children.get(digits[depth])
+            if node is None or not digits.startswith(node.label, depth):
+                break
+            depth += len(node.label)
+            if node.cost is not None:
+                match = (depth, node)
+        return match
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        digits = normalize(number)
+        length, node = self._longest_match(digits)
+        if node is None:
+            return None
+        return '+' + digits[:length], node.cost
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        # same walk as _longest_match, keeping only the cost on the hot path
+        digits = normalize(number)
+        size = len(digits)
+        node = self.root
+        cost = node.cost
+        depth = 0
+        while depth < size:
+            node = node.children.get(digits[depth])
+            if node is None or not digits.startswith(node.label, depth):
+                break
+            depth += len(node.label)
+            if node.cost is not None:
+                cost = node.cost
+        return NO_ROUTE_COST if cost is None else cost
@@ -0,0 +1,107 @@
+#!python
+
+from radixroutes import RadixRoutes
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES
+import random
+import unittest
+
+
+class RadixRoutesTest(unittest.TestCase):
+
+    def test_init(self):
+        index = RadixRoutes()
+        assert index.length() == 0
+        assert index.is_empty() is True
+        assert index.node_count() == 1
+        assert index.cost('+14152345678') == NO_ROUTE_COST
+
+    def test_init_with_routes(self):
+        index = RadixRoutes(ROUTES)
+        assert index.length() == 4
+        # root, 1 and 2 (split, no routes), 512, 415, 34 and 46
+        assert index.node_count() == 7
+        one = index.root.children['1']
+        assert one.label == '1'
+        assert one.is_route() is False
+        assert sorted(one.children) == ['4', '5']
+        two = one.children['4'].children['2']
+        assert two.label == '2'
+        assert sorted(child.label for child in
+                      two.children.values()) == ['34', '46']
+
+    def test_insert_splits_edges(self):
+        index = RadixRoutes()
+        index.insert('+1415234', 0.03)
+        assert index.node_count() == 2
+        # a prefix ending inside an edge splits it
+        index.insert('+1415', 0.02)
+        assert index.root.children['1'].label == '1415'
+        assert index.root.children['1'].children['2'].label == '234'
+        index.insert('+1415', 0.05)
+        assert index.get('+1415') == 0.05
+        assert index.length() == 2
+        assert index.contains('+141') is False
+        with self.assertRaises(KeyError):
+            index.get('+141')
+        with self.assertRaises(KeyError):
+            index.get('+1416')
+
+    def test_delete_merges_edges(self):
+        index = RadixRoutes(ROUTES)
+        index.delete('+1415')
+        assert index.length() == 3
+        # 415 is left without a route and one child, so they are merged
+        assert index.node_count() == 6
+        assert index.root.children['1'].children['4'].label == '4152'
+        index.delete('+1415246')
+        # 4152 is left with one child and merged into it
+        assert index.node_count() == 4
+        assert index.root.children['1'].children['4'].label == '415234'
+        index.delete('+1512')
+        # 1 is left with one child and merged into it
+        assert index.node_count() == 2
+        assert index.root.children['1'].label == '1415234'
+        assert index.items() == [('+1415234', 0.03)]
+        with self.assertRaises(KeyError):
+            index.delete('+1415')
+        with self.assertRaises(KeyError):
+            index.delete('+14152')
+        index.delete('+1415234')
+        assert index.node_count() == 1
+        assert index.is_empty() is True
+
+    def test_items(self):
+        assert RadixRoutes(ROUTES).items() == sorted(ROUTES)
+
+    def test_lookup_and_cost(self):
+        index = RadixRoutes(ROUTES)
+        assert index.lookup('+14152345678') == ('+1415234', 0.03)
+        assert index.lookup('+14159999999') == ('+1415', 0.02)
+        assert index.lookup('+14152') == ('+1415', 0.02)
+        assert index.lookup('+19876543210') is None
+        assert index.cost('+15124156620') == 0.04
+        assert index.cost('+19876543210') == NO_ROUTE_COST
+
+    def test_matches_route_trie(self):
+        routes = random_routes(500)
+        index = RadixRoutes(routes)
+        trie = RouteTrie(routes)
+        assert index.items() == trie.items()
+        rand = random.Random(9)
+        for _ in range(500):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            assert index.lookup(number) == trie.lookup(number)
+        # deleting half of the routes keeps them in agreement
+        for prefix, _ in routes[::2]:
+            if trie.contains(prefix):
+                index.delete(prefix)
+                trie.delete(prefix)
+        assert index.items() == trie.items()
+        assert index.node_count() < 2 * index.length() + 1
+
+
+if __name__ == '__main__':
+    unittest.main()
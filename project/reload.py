@@ -0,0 +1,178 @@
+#!python
+
+import asyncio
+import concurrent.futures
+import os
+import shutil
+import tempfile
+import time
+from metrics import LatencyHistogram
+from routefile import MappedRouteTrie, compile_routes, is_compiled, read_index
+from routing import load_carriers
+
+# Seconds between checks of the route files for changes
+RELOAD_INTERVAL = 1.0
+
+
+def file_signature(paths):
+    """
+    Return a tuple of (path, modification time, size) for each of the given
+    files, with None for the time and size of a file that does not exist,
+    so comparing two signatures tells whether any file changed.
+    """
+    signature = []
+    for path in paths:
+        try:
+            status = os.stat(path)
+            signature.append((path, status.st_mtime_ns, status.st_size))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def build_index_file(route_paths, directory=None):
+    """
+    Return the path of a new temporary compiled route index file in the
+    given directory for the given route files: a copy of a single compiled
+    index, or else the carrier route cost files compiled. The watched files
+    themselves are never mapped, since whatever rewrites them may do so in
+    place, which would crash a process mapping them. Runs in a worker
+    process, so compiling never holds the server process's GIL.
+    """
+    handle, index_path = tempfile.mkstemp(suffix='.rtix', dir=directory)
+    os.close(handle)
+    try:
+        if len(route_paths) == 1 and is_compiled(route_paths[0]):
+            shutil.copyfile(route_paths[0], index_path)
+        else:
+            compile_routes(route_paths, index_path)
+    except Exception:
+        os.remove(index_path)
+        raise
+    return index_path
+
+
+def open_reloadable_index(route_paths):
+    """
+    Return a route index for the given route files that does not map any
+    of them: a single compiled index is read into memory, and carrier route
+    cost files are merged into a RouteTrie. Used for the index a server
+    starts with when a RouteReloader watches the same files.
+    """
+    if len(route_paths) == 1 and is_compiled(route_paths[0]):
+        return read_index(route_paths[0])
+    return load_carriers(route_paths)
+
+
+class RouteReloader(object):
+    """
+    Watches a pricing server's route files and swaps in a freshly built
+    index whenever they change, while the server keeps answering from the
+    old one. The new index is compiled in a worker process and then mapped,
+    so the event loop only pauses to map the file, swap the server's index
+    reference between batches and close the old mapping.
+    """
+
+    def __init__(self, server, route_paths, interval=RELOAD_INTERVAL):
+        """
+        Initialize this reloader for the given PricingServer, which is
+        serving an index built from the given route files.
+        """
+        self.server = server
+        self.route_paths = list(route_paths)
+        self.interval = interval
+        self.signature = file_signature(self.route_paths)  # Of loaded files
+        self.reloads = 0  # Indexes swapped in
+        self.failures = 0  # Builds that raised, leaving the old index
+        self.last_error = None  # Exception raised by the last failed build
+        self.build_ns = LatencyHistogram()  # Time to compile each index
+        self.swap_ns = LatencyHistogram()  # Event loop pause of each swap
+        self._executor = None
+        self._task = None
+
+    def __repr__(self):
+        """Return a string representation of this route reloader."""
+        return 'RouteReloader({} files, {} reloads)'.format(
+            len(self.route_paths), self.reloads)
+
+    async def reload(self):
+        """
+        Build a new index from the route files in a worker process and swap
+        it into the server. If the build fails, the server keeps its old
+        index and the error is kept in last_error. Return True if swapped.
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(1)
+        signature = file_signature(self.route_paths)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter_ns()
+        try:
+            index_path = await loop.run_in_executor(
+                self._executor, build_index_file, self.route_paths)
+        except Exception as error:
+            self.failures += 1
+            self.last_error = error
+            self.signature = signature  # Don't retry until files change again
+            return False
+        self.build_ns.record(time.perf_counter_ns() - start)
+        start = time.perf_counter_ns()
+        try:
+            index = MappedRouteTrie(index_path)
+        except ValueError as error:
+            self.failures += 1
+            self.last_error = error
+            self.signature = signature
+            return False
+        finally:
+            os.remove(index_path)  # The mapping keeps its pages alive
+        old_index = self.server.swap_index(index)
+        if hasattr(old_index, 'close'):
+            old_index.close()
+        self.swap_ns.record(time.perf_counter_ns() - start)
+        self.signature = signature
+        self.reloads += 1
+        return True
+
+    async def watch(self):
+        """
+        Check the route files every interval seconds and reload once they
+        have changed and then stayed the same for one more interval, so a
+        file is not read while it is still being written.
+        """
+        previous = self.signature
+        while True:
+            await asyncio.sleep(self.interval)
+            current = file_signature(self.route_paths)
+            if current != self.signature and current == previous:
+                await self.reload()
+            previous = current
+
+    def start(self):
+        """Start watching the route files on the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self.watch())
+        return self._task
+
+    async def stop(self):
+        """Stop watching and shut down the worker process."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self):
+        """
+        Return a dict of the reload and failure counts and summaries of the
+        build times and event loop swap pauses in nanoseconds.
+        """
+        return {
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'build_ns': self.build_ns.summary(),
+            'swap_ns': self.swap_ns.summary(),
+        }
@@ -0,0 +1,180 @@
+#!python
+
+from reload import (RouteReloader, file_signature, build_index_file,
+                    open_reloadable_index)
+from routefile import MappedRouteTrie, compile_routes, write_index
+from compacttrie import CompactRouteTrie
+from routing import RouteTrie
+from routing_test import ROUTES, write_temp_file
+from server import PricingServer
+from loadgen import open_connection
+import asyncio
+import os
+import unittest
+
+
+def write_routes(path, routes):
+    """Overwrite the route cost file at the given path with the routes."""
+    with open(path, 'w') as route_file:
+        route_file.write(''.join('{},{}\n'.format(*route) for route in routes))
+
+
+class BuildTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = write_temp_file(['{},{}'.format(*route)
+                                     for route in ROUTES])
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_file_signature(self):
+        signature = file_signature([self.path, self.path + '.missing'])
+        assert signature[0][0] == self.path
+        assert signature[0][2] == os.path.getsize(self.path)
+        assert signature[1] == (self.path + '.missing', None, None)
+        write_routes(self.path, ROUTES[:1])
+        assert file_signature([self.path]) != signature[:1]
+
+    def test_build_index_file(self):
+        index_path = build_index_file([self.path])
+        with MappedRouteTrie(index_path) as index:
+            assert index.cost('+14152345678') == 0.03
+        os.remove(index_path)
+        compiled_path = self.path + '.rtix'
+        compile_routes([self.path], compiled_path)
+        try:
+            # a compiled index is copied, never mapped where it is watched
+            index_path = build_index_file([compiled_path])
+            assert index_path != compiled_path
+            with MappedRouteTrie(index_path) as index:
+                assert index.cost('+14152345678') == 0.03
+            os.remove(index_path)
+            index = open_reloadable_index([compiled_path])
+            assert not isinstance(index, MappedRouteTrie)
+            assert index.cost('+14152345678') == 0.03
+        finally:
+            os.remove(compiled_path)
+
+
+class RouteReloaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = write_temp_file(['{},{}'.format(*route)
+                                     for route in ROUTES])
+        self.server = PricingServer(RouteTrie(ROUTES))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_reload(self):
+        reloader = RouteReloader(self.server, [self.path])
+
+        async def scenario():
+            write_routes(self.path, [('+1415', 0.07)])
+            try:
+                return await reloader.reload()
+            finally:
+                await reloader.stop()
+
+        assert asyncio.run(scenario()) is True
+        assert isinstance(self.server.index, MappedRouteTrie)
+        assert self.server.index.cost('+14152345678') == 0.07
+        stats = reloader.stats()
+        assert stats['reloads'] == 1
+        assert stats['build_ns']['count'] == 1
+        assert stats['swap_ns']['count'] == 1
+        self.server.index.close()
+
+    def test_failed_build_keeps_old_index(self):
+        reloader = RouteReloader(self.server, [self.path])
+        old_index = self.server.index
+
+        async def scenario():
+            write_routes(self.path, [('+1415', 0.07)])
+            with open(self.path, 'a') as route_file:
+                route_file.write('not a route\n')
+            try:
+                return await reloader.reload()
+            finally:
+                await reloader.stop()
+
+        assert asyncio.run(scenario()) is False
+        assert self.server.index is old_index
+        assert reloader.failures == 1
+        assert isinstance(reloader.last_error, ValueError)
+
+    def test_watch_swaps_index_while_serving(self):
+        reloader = RouteReloader(self.server, [self.path], interval=0.02)
+
+        async def ask(reader, writer):
+            writer.write(b'+14152345678\n')
+            return await reader.readline()
+
+        async def scenario():
+            address = await self.server.start()
+            reloader.start()
+            reader, writer = await open_connection(address)
+            before = await ask(reader, writer)
+            write_routes(self.path, [('+1415', 0.07)])
+            for _ in range(500):
+                if reloader.reloads > 0:
+                    break
+                await asyncio.sleep(0.01)
+            # the same connection is answered from the new index
+            after = await ask(reader, writer)
+            writer.close()
+            await reloader.stop()
+            await self.server.close()
+            return before, after
+
+        before, after = asyncio.run(scenario())
+        assert before == b'+14152345678,0.03\n'
+        assert after == b'+14152345678,0.07\n'
+        self.server.index.close()
+
+    def test_rewrite_served_compiled_file(self):
+        compiled_path = self.path + '.rtix'
+        compile_routes([self.path], compiled_path)
+        server = PricingServer(open_reloadable_index([compiled_path]))
+        reloader = RouteReloader(server, [compiled_path], interval=0.02)
+        new_path = self.path + '.new.rtix'
+        write_index(CompactRouteTrie([('+1415', 0.07)]), new_path)
+
+        async def ask(reader, writer):
+            writer.write(b'+14152345678\n')
+            return await reader.readline()
+
+        async def scenario():
+            address = await server.start()
+            reloader.start()
+            reader, writer = await open_connection(address)
+            before = await ask(reader, writer)
+            # rewrite the served file in place, as cp or a hand-rolled
+            # compiler would, rather than replacing it atomically
+            with open(new_path, 'rb') as new_file:
+                data = new_file.read()
+            with open(compiled_path, 'wb') as compiled_file:
+                compiled_file.write(data)
+            for _ in range(500):
+                if reloader.reloads > 0:
+                    break
+                await asyncio.sleep(0.01)
+            after = await ask(reader, writer)
+            writer.close()
+            await reloader.stop()
+            await server.close()
+            return before, after
+
+        try:
+            before, after = asyncio.run(scenario())
+        finally:
+            os.remove(compiled_path)
+            os.remove(new_path)
+        assert before == b'+14152345678,0.03\n'
+        assert after == b'+14152345678,0.07\n'
+        server.index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!python
+
+import threading
+import lessons  # Makes Lessons/source importable
+from hashtable import HashTable
+from doublylinkedlist import DoublyLinkedList
+from routing import normalize, NO_ROUTE_COST
+
+
+class LRUCache(object):
+    """
+    Bounded cache that evicts the least recently used entry when full.
+    A HashTable maps each key to its node in a DoublyLinkedList ordered from
+    least recently used (head) to most recently used (tail), so get, put and
+    evict never traverse the list.
+    """
+
+    def __init__(self, capacity):
+        """Initialize this cache to hold at most the given number of entries."""
+        if capacity < 1:
+            raise ValueError('Cache capacity must be positive: {}'
+                             .format(capacity))
+        self.capacity = capacity
+        self.nodes = HashTable()  # Maps key to its node holding (key, value)
+        self.order = DoublyLinkedList()  # Least recently used at the head
+        self.hits = 0  # Gets that found their key
+        self.misses = 0  # Gets that did not
+        self.evictions = 0  # Entries dropped to make room
+        self.invalidations = 0  # Entries dropped by invalidate calls
+
+    def __repr__(self):
+        """Return a string representation of this cache."""
+        return 'LRUCache({} of {} entries)'.format(self.length(),
+                                                   self.capacity)
+
+    def length(self):
+        """Return the number of entries in this cache."""
+        return self.order.length()
+
+    def contains(self, key):
+        """
+        Return True if the given key is cached, without touching its recency.
+        Running time: O(1) on average b/c of the hash table
+        """
+        return self.nodes.contains(key)
+
+    def get(self, key):
+        """
+        Return the value cached for the given key and mark it most recently
+        used, or raise KeyError if it is not cached.
+        Running time: O(1) on average: one hash table lookup and moving its
+        node to the tail of the list
+        """
+        try:
+            node = self.nodes.get(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        # move the node to the most recently used end
+        self.order.delete_node(node)
+        self.order.append_node(node)
+        return node.data[1]
+
+    def put(self, key, value):
+        """
+        Cache the given value for the given key as most recently used,
+        evicting the least recently used entry if the cache is full.
+        Running time: O(1) on average
+        """
+        if self.nodes.contains(key):
+            self.order.delete_node(self.nodes.get(key))
+        elif self.order.length() >= self.capacity:
+            # the head of the list is the least recently used entry
+            oldest = self.order.head
+            self.order.delete_node(oldest)
+            self.nodes.delete(oldest.data[0])
+            self.evictions += 1
+        self.nodes.set(key, self.order.append((key, value)))
+
+    def delete(self, key):
+        """
+        Remove the given key from this cache, or raise KeyError.
+        Running time: O(1) on average
+        """
+        node = self.nodes.get(key)
+        self.order.delete_node(node)
+        self.nodes.delete(key)
+
+    def invalidate(self, quality):
+        """
+        Remove every entry whose key satisfies the given quality function and
+        return how many were removed.
+        Running time: O(n) for n cached entries
+        """
+        removed = 0
+        node = self.order.head
+        while node is not None:
+            next_node = node.next  # unlinking clears node.next
+            if quality(node.data[0]):
+                self.order.delete_node(node)
+                self.nodes.delete(node.data[0])
+                removed += 1
+            node = next_node
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        """Remove every entry from this cache, keeping its counters."""
+        self.invalidations += self.length()
+        self.nodes = HashTable()
+        self.order = DoublyLinkedList()
+
+    def stats(self):
+        """Return a dict of this cache's size and hit/miss/eviction counts."""
+        lookups = self.hits + self.misses
+        return {
+            'size': self.length(),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups > 0 else 0,
+        }
+
+
+class CachedRouteIndex(object):
+    """
+    Route index wrapper that answers repeated lookups for the same phone
+    number from an LRUCache of their matches. When the wrapped index is a
+    LiveRouteTable, the cached numbers under each updated prefix are
+    invalidated automatically.
+    """
+
+    def __init__(self, index, capacity=100000):
+        """Initialize this wrapper around the given route index."""
+        self.index = index
+        self.cache = LRUCache(capacity)
+        self.generation = 0  # Incremented whenever entries are invalidated
+        self._lock = threading.Lock()  # The cache is shared between threads
+        if hasattr(index, 'subscribe'):
+            index.subscribe(self._on_update)
+
+    def __repr__(self):
+        """Return a string representation of this cached route index."""
+        return 'CachedRouteIndex({!r}, {!r})'.format(self.index, self.cache)
+
+    def length(self):
+        """Return the number of routes in the wrapped index."""
+        return self.index.length()
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) match of the given phone number, or None,
+        from the cache if it was looked up recently or else from the wrapped
+        index.
+        Running time: O(1) on average for a hit, O(l) for a miss on a number
+        of length l
+        """
+        with self._lock:
+            try:
+                return self.cache.get(number)
+            except KeyError:
+                generation = self.generation
+        match = self.index.lookup(number)
+        with self._lock:
+            # don't cache a match that an update invalidated meanwhile
+            if generation == self.generation:
+                self.cache.put(number, match)
+        return match
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number, from the cache if
+        it was priced recently or else from the wrapped index.
+        Running time: O(1) on average for a hit, O(l) for a miss on a number
+        of length l
+        """
+        match = self.lookup(number)
+        return NO_ROUTE_COST if match is None else match[1]
+
+    def invalidate_prefix(self, prefix):
+        """
+        Remove the cached costs of every number starting with the given
+        route prefix and return how many were removed.
+        Running time: O(n) for n cached numbers
+        """
+        digits = normalize(prefix)
+        with self._lock:
+            self.generation += 1
+            return self.cache.invalidate(
+                lambda number: normalize(number).startswith(digits))
+
+    def _on_update(self, affected, snapshot):
+        """Invalidate the cached numbers under the prefixes of an update."""
+        prefixes = tuple(affected)
+        with self._lock:
+            self.generation += 1
+            self.cache.invalidate(
+                lambda number: normalize(number).startswith(prefixes))
+
+    def stats(self):
+        """Return a dict of the cache's hit/miss/eviction counts."""
+        return self.cache.stats()
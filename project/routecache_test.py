@@ -0,0 +1,113 @@
+#!python
+
+from routecache import LRUCache, CachedRouteIndex
+from liveroutes import LiveRouteTable, ADD, CHANGE
+from routing import RouteTrie
+from routing_test import ROUTES
+import unittest
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_init(self):
+        cache = LRUCache(2)
+        assert cache.length() == 0
+        assert cache.capacity == 2
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+    def test_put_and_get(self):
+        cache = LRUCache(2)
+        cache.put('A', 1)
+        cache.put('B', 2)
+        assert cache.get('A') == 1
+        assert cache.get('B') == 2
+        assert cache.length() == 2
+        with self.assertRaises(KeyError):
+            cache.get('C')
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    def test_put_updates_value(self):
+        cache = LRUCache(2)
+        cache.put('A', 1)
+        cache.put('A', 5)
+        assert cache.get('A') == 5
+        assert cache.length() == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('A', 1)
+        cache.put('B', 2)
+        cache.get('A')  # B is now least recently used
+        cache.put('C', 3)
+        assert cache.contains('A') is True
+        assert cache.contains('B') is False
+        assert cache.contains('C') is True
+        assert cache.evictions == 1
+        assert cache.order.items() == [('A', 1), ('C', 3)]
+
+    def test_delete(self):
+        cache = LRUCache(2)
+        cache.put('A', 1)
+        cache.delete('A')
+        assert cache.length() == 0
+        with self.assertRaises(KeyError):
+            cache.delete('A')
+
+    def test_invalidate(self):
+        cache = LRUCache(4)
+        for key in ['+1415', '+1416', '+1512', '+14159']:
+            cache.put(key, 0)
+        assert cache.invalidate(lambda key: key.startswith('+1415')) == 2
+        assert cache.order.items() == [('+1416', 0), ('+1512', 0)]
+        assert cache.invalidations == 2
+
+    def test_stats(self):
+        cache = LRUCache(1)
+        cache.put('A', 1)
+        cache.get('A')
+        cache.put('B', 2)
+        with self.assertRaises(KeyError):
+            cache.get('A')
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['evictions'] == 1
+        assert stats['hit_rate'] == 0.5
+
+
+class CachedRouteIndexTest(unittest.TestCase):
+
+    def test_cost(self):
+        index = CachedRouteIndex(RouteTrie(ROUTES), capacity=2)
+        assert index.cost('+14152345678') == 0.03
+        assert index.cost('+14152345678') == 0.03
+        assert index.cost('+19876543210') == 0
+        assert index.stats()['hits'] == 1
+        assert index.stats()['misses'] == 2
+
+    def test_invalidate_prefix(self):
+        index = CachedRouteIndex(RouteTrie(ROUTES))
+        index.cost('+14152345678')
+        index.cost('+15124156620')
+        assert index.invalidate_prefix('+1415') == 1
+        assert index.cache.contains('+15124156620') is True
+
+    def test_live_updates_invalidate_cached_numbers(self):
+        table = LiveRouteTable()
+        table.apply([(ADD, 'a', '+1415', 0.02), (ADD, 'a', '+1512', 0.04)])
+        index = CachedRouteIndex(table)
+        assert index.cost('+14152345678') == 0.02
+        assert index.cost('+15124156620') == 0.04
+        # a longer prefix under a cached number changes its cost
+        table.apply([(ADD, 'b', '+1415234', 0.01)])
+        assert index.cache.contains('+14152345678') is False
+        assert index.cache.contains('+15124156620') is True
+        assert index.cost('+14152345678') == 0.01
+        table.apply([(CHANGE, 'a', '+1512', 0.05)])
+        assert index.cost('+15124156620') == 0.05
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!python
+
+from liveroutes import ADD, CHANGE, REMOVE
+from pricer import FILE_BUFFER_SIZE, format_cost
+from routing import normalize, parse_route, read_routes
+
+# One-letter code of each delta action in a delta file, and back again
+ACTION_CODES = {ADD: 'A', CHANGE: 'C', REMOVE: 'R'}
+CODE_ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+
+def format_delta(action, prefix, cost):
+    """
+    Return one delta file line for the given action on a route: the action
+    code followed by the route, e.g. 'C+1415,0.03', or 'R+1415' to remove.
+    Running time: O(l) for a prefix of length l
+    """
+    if action == REMOVE:
+        return '{}+{}'.format(ACTION_CODES[action], normalize(prefix))
+    return '{}+{},{}'.format(ACTION_CODES[action], normalize(prefix),
+                             format_cost(cost))
+
+
+def parse_delta(line):
+    """
+    Parse one delta file line into a tuple of (action, prefix digits, cost),
+    where cost is None for a removal, or raise ValueError if it is malformed.
+    Running time: O(l) for a line of length l
+    """
+    line = line.strip()
+    action = CODE_ACTIONS.get(line[:1])
+    if action is None:
+        raise ValueError('Invalid delta action: {!r}'.format(line))
+    if action == REMOVE:
+        prefix = normalize(line[1:])
+        if not prefix.isdigit():
+            raise ValueError('Invalid delta prefix: {!r}'.format(line))
+        return action, prefix, None
+    prefix, cost = parse_route(line[1:])
+    return action, prefix, cost
+
+
+def diff_routes(old_routes, new_routes):
+    """
+    Generate (action, prefix, cost) deltas that turn the old routes into the
+    new routes, from two iterables of (prefix, cost) routes that are each
+    sorted by prefix, in one streaming merge pass. Raise ValueError if
+    either input is out of order or repeats a prefix.
+    Running time: O(o + n) for o old routes and n new routes
+    Space usage: O(1) since only one route of each input is held at a time
+    """
+    old_routes = _checked_order(old_routes)
+    new_routes = _checked_order(new_routes)
+    old = next(old_routes, None)
+    new = next(new_routes, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            # prefix is only in the old routes
+            yield REMOVE, old[0], None
+            old = next(old_routes, None)
+        elif old is None or new[0] < old[0]:
+            # prefix is only in the new routes
+            yield ADD, new[0], new[1]
+            new = next(new_routes, None)
+        else:
+            if old[1] != new[1]:
+                yield CHANGE, new[0], new[1]
+            old = next(old_routes, None)
+            new = next(new_routes, None)
+
+
+def _checked_order(routes):
+    """
+    Generate the given (prefix, cost) routes with normalized prefixes,
+    raising ValueError as soon as a prefix is not greater than the last.
+    """
+    last = None
+    for prefix, cost in routes:
+        prefix = normalize(prefix)
+        if last is not None and prefix <= last:
+            raise ValueError('Routes are not sorted by unique prefix: '
+                             '+{} after +{}'.format(prefix, last))
+        last = prefix
+        yield prefix, cost
+
+
+def write_delta(deltas, path):
+    """
+    Write the given (action, prefix, cost) deltas to a delta file at the
+    given path and return the number of deltas written.
+    """
+    count = 0
+    with open(path, 'w', buffering=FILE_BUFFER_SIZE) as delta_file:
+        for action, prefix, cost in deltas:
+            delta_file.write(format_delta(action, prefix, cost) + '\n')
+            count += 1
+    return count
+
+
+def read_delta(path):
+    """
+    Generate (action, prefix, cost) deltas from the delta file at the given
+    path one line at a time.
+    """
+    with open(path, buffering=FILE_BUFFER_SIZE) as delta_file:
+        for line in delta_file:
+            # skip blank lines (e.g. trailing newline at end of file)
+            if line.strip():
+                yield parse_delta(line)
+
+
+def diff_files(old_path, new_path, delta_path):
+    """
+    Write the delta between the route cost files at old_path and new_path,
+    both sorted by prefix (e.g. with `LC_ALL=C sort -t, -k1,1`), to a delta
+    file at delta_path. Return the number of deltas written.
+    Running time: O(o + n) for files of o and n characters
+    Space usage: O(1) no matter how long the route files are
+    """
+    return write_delta(diff_routes(read_routes(old_path),
+                                   read_routes(new_path)), delta_path)
+
+
+def apply_delta(index, deltas, carrier=None):
+    """
+    Apply the given (action, prefix, cost) deltas to a built route index and
+    return the number applied. A LiveRouteTable gets them as one batch of
+    the given carrier's deltas, so readers see all or none of them; any
+    other index with insert and delete methods is updated route by route.
+    Raise KeyError if a delta changes or removes a route that is not there,
+    or ValueError if the index is a LiveRouteTable and no carrier is given.
+    Running time: O(d * l) for d deltas on prefixes of length l
+    """
+    if hasattr(index, 'apply'):
+        if carrier is None:
+            raise ValueError('A carrier is needed to apply deltas to {!r}'
+                             .format(index))
+        batch = [(action, carrier, prefix, cost)
+                 for action, prefix, cost in deltas]
+        index.apply(batch)
+        return len(batch)
+    count = 0
+    for action, prefix, cost in deltas:
+        if action == REMOVE:
+            index.delete(prefix)
+        elif action == CHANGE and not index.contains(prefix):
+            raise KeyError('Route not found: +{}'.format(prefix))
+        else:
+            index.insert(prefix, cost)
+        count += 1
+    return count
+
+
+def main():
+    """Write the delta between two sorted route cost files."""
+    import os
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) == 3:
+        old_path, new_path, delta_path = args
+        count = diff_files(old_path, new_path, delta_path)
+        print('Wrote {} deltas ({} bytes) for {} bytes of new routes'.format(
+            count, os.path.getsize(delta_path), os.path.getsize(new_path)))
+    else:
+        print('Usage: {} old-route-costs.txt new-route-costs.txt delta.txt'
+              .format(sys.argv[0]))
+        print('  writes the add/change/remove delta between two route cost '
+              'files sorted by prefix')
+
+
+if __name__ == '__main__':
+    main()
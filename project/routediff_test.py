@@ -0,0 +1,102 @@
+#!python
+
+from routediff import (format_delta, parse_delta, diff_routes, diff_files,
+                       read_delta, apply_delta)
+from liveroutes import LiveRouteTable, ADD, CHANGE, REMOVE
+from routing import RouteTrie
+from routing_test import ROUTES, write_temp_file
+import os
+import unittest
+
+OLD_ROUTES = sorted(ROUTES)
+NEW_ROUTES = [('+1415', 0.02), ('+1415234', 0.025), ('+1512', 0.04),
+              ('+1650', 0.06)]
+
+
+class DeltaFormatTest(unittest.TestCase):
+
+    def test_format_delta(self):
+        assert format_delta(ADD, '+1415', 0.02) == 'A+1415,0.02'
+        assert format_delta(CHANGE, '1415', 0.03) == 'C+1415,0.03'
+        assert format_delta(REMOVE, '+1415', None) == 'R+1415'
+
+    def test_parse_delta(self):
+        assert parse_delta('A+1415,0.02\n') == (ADD, '1415', 0.02)
+        assert parse_delta('C+1415,0.03') == (CHANGE, '1415', 0.03)
+        assert parse_delta('R+1415') == (REMOVE, '1415', None)
+        for line in ['X+1415,0.02', '+1415,0.02', 'R+14a', 'A+1415', '']:
+            with self.assertRaises(ValueError):
+                parse_delta(line)
+
+
+class DiffRoutesTest(unittest.TestCase):
+
+    def test_diff_routes(self):
+        deltas = list(diff_routes(OLD_ROUTES, NEW_ROUTES))
+        assert deltas == [(CHANGE, '1415234', 0.025),
+                          (REMOVE, '1415246', None),
+                          (ADD, '1650', 0.06)]
+
+    def test_diff_empty(self):
+        assert list(diff_routes(OLD_ROUTES, OLD_ROUTES)) == []
+        assert list(diff_routes([], OLD_ROUTES)) == \
+            [(ADD, prefix[1:], cost) for prefix, cost in OLD_ROUTES]
+        assert list(diff_routes(OLD_ROUTES, [])) == \
+            [(REMOVE, prefix[1:], None) for prefix, _ in OLD_ROUTES]
+
+    def test_unsorted_input(self):
+        with self.assertRaises(ValueError):
+            list(diff_routes(ROUTES, NEW_ROUTES))
+        with self.assertRaises(ValueError):
+            list(diff_routes([], [('+1415', 0.02), ('+1415', 0.03)]))
+
+    def test_diff_files_round_trip(self):
+        old_path = write_temp_file(['{},{}'.format(*r) for r in OLD_ROUTES])
+        new_path = write_temp_file(['{},{}'.format(*r) for r in NEW_ROUTES])
+        delta_path = new_path + '.delta'
+        try:
+            assert diff_files(old_path, new_path, delta_path) == 3
+            with open(delta_path) as delta_file:
+                assert delta_file.read() == ('C+1415234,0.025\n'
+                                             'R+1415246\n'
+                                             'A+1650,0.06\n')
+            assert list(read_delta(delta_path)) == \
+                list(diff_routes(OLD_ROUTES, NEW_ROUTES))
+        finally:
+            for path in [old_path, new_path, delta_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class ApplyDeltaTest(unittest.TestCase):
+
+    def test_apply_to_route_trie(self):
+        index = RouteTrie(OLD_ROUTES)
+        deltas = diff_routes(OLD_ROUTES, NEW_ROUTES)
+        assert apply_delta(index, deltas) == 3
+        assert index.items() == NEW_ROUTES
+
+    def test_apply_change_of_missing_route(self):
+        index = RouteTrie(OLD_ROUTES)
+        with self.assertRaises(KeyError):
+            apply_delta(index, [(CHANGE, '1650', 0.06)])
+        with self.assertRaises(KeyError):
+            apply_delta(index, [(REMOVE, '1650', None)])
+
+    def test_apply_to_live_table(self):
+        table = LiveRouteTable()
+        table.replace_carrier('a', OLD_ROUTES)
+        deltas = diff_routes(OLD_ROUTES, NEW_ROUTES)
+        assert apply_delta(table, deltas, carrier='a') == 3
+        assert table.snapshot.items() == NEW_ROUTES
+        assert table.lookup_carrier('+16505551234') == ('+1650', 0.06, 'a')
+        snapshot = table.snapshot
+        with self.assertRaises(ValueError):
+            apply_delta(table, diff_routes(NEW_ROUTES, OLD_ROUTES))
+        assert table.snapshot is snapshot
+        assert table.carrier_routes('a') == {prefix[1:]: cost
+                                             for prefix, cost in NEW_ROUTES}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+#!python
+
+import gc
+import math
+import struct
+import sys
+from array import array
+import lessons  # Makes Lessons/source importable
+from hashtable import HashTable
+from bucketroutes import LengthBucketRoutes
+from routing import RouteTrie, TrieNode
+
+# map_bst imports LinkedQueue from Lessons/source/queue.py, which the
+# standard library queue module shadows outside Lessons/source
+TreeMap = lessons.import_with_lessons_queue('treemap').TreeMap
+
+# Dump file layout, all integers and floats little-endian:
+#   header: magic b'RTDP', format version, kind, count, extra (see below)
+# then for a RouteTrie (kind TRIE; count is nodes, extra is routes):
+#   carrier table: carrier count, then a string table of their names
+#   digits: one ASCII byte per node, the digit on the edge into it
+#   child counts: one unsigned byte per node
+#   costs: one 64-bit float per node, NaN if no route ends there
+#   carriers: one signed 32-bit carrier table index per node, or -1
+# with every per-node array in pre-order, children in digit order, so the
+# tree is rebuilt in one pass with a stack and no recursion;
+# or for a HashTable or TreeMap (kind HASH_TABLE or TREE_MAP; count is
+# entries, extra is unused), or a LengthBucketRoutes (kind LENGTH_BUCKETS;
+# count is routes, extra is distinct prefix lengths):
+#   keys: a string table of the entries' string keys, or the route prefix
+#     digits without a '+'
+#   values: one 64-bit float per entry or route cost
+# A string table of n strings is n unsigned 32-bit byte lengths, then the
+# UTF-8 bytes of all the strings joined together.
+MAGIC = b'RTDP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+COUNT = struct.Struct('<I')
+# Kinds of object a dump file can hold
+TRIE = 1
+HASH_TABLE = 2
+TREE_MAP = 3
+LENGTH_BUCKETS = 4
+TABLE_KINDS = {HASH_TABLE: HashTable, TREE_MAP: TreeMap}
+# Highest load factor of a loaded table, matching the one HashTable.set keeps
+MAX_LOAD_FACTOR = 0.75
+
+
+def _to_little(values):
+    """Return the given array with its items stored little-endian."""
+    if sys.byteorder != 'little':
+        values = values[:]
+        values.byteswap()
+    return values
+
+
+def _read_array(dump_file, typecode, count):
+    """Read an array of count little-endian items of the given type."""
+    values = array(typecode)
+    data = dump_file.read(values.itemsize * count)
+    if len(data) != values.itemsize * count:
+        raise ValueError('Truncated dump file: {}'.format(dump_file.name))
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _write_strings(dump_file, strings):
+    """Write the given strings to the dump file as a string table."""
+    encoded = [string.encode('utf-8') for string in strings]
+    dump_file.write(_to_little(array('I', map(len, encoded))).tobytes())
+    dump_file.write(b''.join(encoded))
+
+
+def _read_strings(dump_file, count):
+    """Read a string table of count strings from the dump file."""
+    lengths = _read_array(dump_file, 'I', count)
+    data = dump_file.read(sum(lengths))
+    if len(data) != sum(lengths):
+        raise ValueError('Truncated dump file: {}'.format(dump_file.name))
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(data[start:start + length].decode('utf-8'))
+        start += length
+    return strings
+
+
+def dump(index, path):
+    """
+    Write the given RouteTrie, LengthBucketRoutes, HashTable or TreeMap to
+    a dump file at the given path. Table keys must be strings and values
+    numbers.
+    Running time: O(n) for n trie nodes, routes or table entries
+    """
+    with open(path, 'wb') as dump_file:
+        if isinstance(index, RouteTrie):
+            _dump_trie(index, dump_file)
+        elif isinstance(index, LengthBucketRoutes):
+            _dump_buckets(index, dump_file)
+        elif isinstance(index, tuple(TABLE_KINDS.values())):
+            _dump_table(index, dump_file)
+        else:
+            raise TypeError('Cannot dump {}'.format(type(index).__name__))
+
+
+def load(path):
+    """
+    Return the RouteTrie, LengthBucketRoutes, HashTable or TreeMap in the
+    dump file at the given path, or raise ValueError if the file is not a
+    dump this code can read.
+    Running time: O(n) for n trie nodes, routes or table entries
+    """
+    with open(path, 'rb') as dump_file:
+        header = dump_file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError('Truncated dump file: {}'.format(path))
+        magic, version, kind, count, extra = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a version {} dump file: {}'
+                             .format(VERSION, path))
+        if kind not in (TRIE, LENGTH_BUCKETS) and kind not in TABLE_KINDS:
+            raise ValueError('Unknown dump kind {}: {}'.format(kind, path))
+        # loading allocates millions of objects and no garbage, so the cyclic
+        # garbage collector's passes over them would only slow it down
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            if kind == TRIE:
+                return _load_trie(dump_file, count, extra)
+            if kind == LENGTH_BUCKETS:
+                return _load_buckets(dump_file, count)
+            return _load_table(dump_file, TABLE_KINDS[kind], count)
+        finally:
+            if collecting:
+                gc.enable()
+
+
+def _dump_trie(trie, dump_file):
+    """Write the given RouteTrie to the open dump file."""
+    digits = bytearray()
+    child_counts = bytearray()
+    costs = array('d')
+    carriers = array('i')
+    carrier_ids = {}  # Maps carrier name to its carrier table index
+    nan = math.nan
+    # iterative pre-order traversal; children pushed in reverse digit order
+    # so they are popped in order
+    stack = [('0', trie.root)]
+    while stack:
+        digit, node = stack.pop()
+        digits.append(ord(digit))
+        child_counts.append(len(node.children))
+        costs.append(nan if node.cost is None else node.cost)
+        if node.carrier is None:
+            carriers.append(-1)
+        else:
+            carriers.append(carrier_ids.setdefault(node.carrier,
+                                                   len(carrier_ids)))
+        for child in sorted(node.children, reverse=True):
+            stack.append((child, node.children[child]))
+    dump_file.write(HEADER.pack(MAGIC, VERSION, TRIE, len(digits), trie.size))
+    dump_file.write(COUNT.pack(len(carrier_ids)))
+    _write_strings(dump_file, sorted(carrier_ids, key=carrier_ids.get))
+    dump_file.write(bytes(digits))
+    dump_file.write(bytes(child_counts))
+    dump_file.write(_to_little(costs).tobytes())
+    dump_file.write(_to_little(carriers).tobytes())
+
+
+def _load_trie(dump_file, count, size):
+    """Read a RouteTrie of count nodes and size routes from the dump file."""
+    carrier_count = COUNT.unpack(dump_file.read(COUNT.size))[0]
+    carrier_names = _read_strings(dump_file, carrier_count)
+    digits = dump_file.read(count).decode('ascii')
+    child_counts = dump_file.read(count)
+    costs = _read_array(dump_file, 'd', count).tolist()
+    carriers = _read_array(dump_file, 'i', count).tolist()
+    if len(digits) != count or len(child_counts) != count:
+        raise ValueError('Truncated dump file: {}'.format(dump_file.name))
+    trie = RouteTrie()
+    trie.size = size
+    # stack of [children dict, children left to read] for nodes still
+    # missing some
+    stack = []
+    for digit, child_count, cost, carrier in zip(digits, child_counts,
+                                                  costs, carriers):
+        node = TrieNode()
+        if cost == cost:  # Not NaN, so a route ends here
+            node.cost = cost
+            if carrier >= 0:
+                node.carrier = carrier_names[carrier]
+        if stack:
+            parent = stack[-1]
+            parent[0][digit] = node
+            parent[1] -= 1
+            if parent[1] == 0:
+                stack.pop()
+        else:
+            trie.root = node
+        if child_count:
+            stack.append([node.children, child_count])
+    return trie
+
+
+def _dump_table(table, dump_file):
+    """Write the given HashTable or TreeMap to the open dump file."""
+    kind = HASH_TABLE if isinstance(table, HashTable) else TREE_MAP
+    items = table.items()
+    keys = [key for key, _ in items]
+    if not all(isinstance(key, str) for key in keys):
+        raise TypeError('Only tables with string keys can be dumped')
+    values = array('d', [value for _, value in items])
+    dump_file.write(HEADER.pack(MAGIC, VERSION, kind, len(items), 0))
+    _write_strings(dump_file, keys)
+    dump_file.write(_to_little(values).tobytes())
+
+
+def _load_table(dump_file, table_class, count):
+    """Read a table of the given class with count entries from the file."""
+    keys = _read_strings(dump_file, count)
+    values = _read_array(dump_file, 'd', count).tolist()
+    if table_class is HashTable:
+        return _fill_table(keys, values)
+    table = table_class(_table_size(count))
+    for key, value in zip(keys, values):
+        table.set(key, value)
+    return table
+
+
+def _table_size(count):
+    """Return the bucket count that holds count entries without a resize."""
+    size = 8
+    while count > size * MAX_LOAD_FACTOR:
+        size *= 2
+    return size
+
+
+def _fill_table(keys, values):
+    """
+    Return a HashTable of the given distinct keys and their values, filled
+    without searching or resizing it.
+    Running time: O(n) for n keys
+    """
+    size = _table_size(len(keys))
+    table = HashTable(size)
+    # keys are unique, so append to each bucket without searching it
+    buckets = table.buckets
+    for key, value in zip(keys, values):
+        buckets[hash(key) % size].append((key, value))
+    table.size = len(keys)
+    return table
+
+
+def _dump_buckets(routes, dump_file):
+    """Write the given LengthBucketRoutes to the open dump file."""
+    keys = []
+    values = array('d')
+    for length in routes.lengths:
+        for prefix, cost in routes.tables[length].items():
+            keys.append(prefix)
+            values.append(cost)
+    dump_file.write(HEADER.pack(MAGIC, VERSION, LENGTH_BUCKETS, len(keys),
+                                len(routes.lengths)))
+    _write_strings(dump_file, keys)
+    dump_file.write(_to_little(values).tobytes())
+
+
+def _load_buckets(dump_file, count):
+    """Read a LengthBucketRoutes of count routes from the dump file."""
+    keys = _read_strings(dump_file, count)
+    values = _read_array(dump_file, 'd', count).tolist()
+    # group the routes by prefix length, then fill each length's table at
+    # once like a loaded HashTable
+    groups = {}  # Maps prefix length to ([prefixes], [costs])
+    for key, value in zip(keys, values):
+        group = groups.get(len(key))
+        if group is None:
+            group = groups[len(key)] = ([], [])
+        group[0].append(key)
+        group[1].append(value)
+    routes = LengthBucketRoutes()
+    for length, (prefixes, costs) in groups.items():
+        routes.tables[length] = _fill_table(prefixes, costs)
+    routes.lengths = sorted(routes.tables, reverse=True)
+    routes.size = count
+    return routes
+
+
+def main():
+    """Compare loading a dump file against rebuilding from route files."""
+    import os
+    import time
+    from routing import load_carriers
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) >= 2:
+        route_paths, dump_path = args[:-1], args[-1]
+        start = time.perf_counter()
+        trie = load_carriers(route_paths)
+        built = time.perf_counter()
+        dump(trie, dump_path)
+        dumped = time.perf_counter()
+        load(dump_path)
+        loaded = time.perf_counter()
+        print('Built {} routes from route files in {:.3f} seconds'
+              .format(trie.size, built - start))
+        print('Dumped {} bytes in {:.3f} seconds'.format(
+            os.path.getsize(dump_path), dumped - built))
+        print('Loaded dump in {:.3f} seconds ({:.1f}x faster than building)'
+              .format(loaded - dumped, (built - start) / (loaded - dumped)))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt routes.dump'
+              .format(sys.argv[0]))
+        print('  dumps the merged route trie and times loading it back')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!python
+
+from routedump import dump, load, HEADER, MAGIC, VERSION, TreeMap
+from routing import RouteTrie, NO_ROUTE_COST
+from bucketroutes import LengthBucketRoutes
+from routing_test import ROUTES
+from compacttrie_test import random_routes
+import lessons  # Makes Lessons/source importable
+from hashtable import HashTable
+import os
+import tempfile
+import unittest
+
+
+class RouteDumpTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.dump_path = tempfile.mkstemp(suffix='.dump')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.dump_path)
+
+    def test_trie(self):
+        trie = RouteTrie(ROUTES)
+        trie.insert('+1', 0.5, 'acme')
+        dump(trie, self.dump_path)
+        loaded = load(self.dump_path)
+        assert isinstance(loaded, RouteTrie)
+        assert loaded.length() == 5
+        assert loaded.items() == trie.items()
+        assert loaded.cost('+14152345678') == 0.03
+        assert loaded.cost('+19876543210') == 0.5
+        assert loaded.get_carrier('+1') == 'acme'
+        assert loaded.get_carrier('+1415') is None
+        loaded.insert('+1416', 0.07)
+        assert loaded.cost('+14161234567') == 0.07
+
+    def test_empty_trie(self):
+        dump(RouteTrie(), self.dump_path)
+        loaded = load(self.dump_path)
+        assert loaded.is_empty()
+        assert loaded.cost('+14155551234') == NO_ROUTE_COST
+
+    def test_random_trie(self):
+        trie = RouteTrie(random_routes(1000))
+        dump(trie, self.dump_path)
+        loaded = load(self.dump_path)
+        assert loaded.length() == trie.length()
+        assert loaded.items() == trie.items()
+
+    def test_length_buckets(self):
+        routes = LengthBucketRoutes(random_routes(1000))
+        routes.insert('+1', 0.5)
+        dump(routes, self.dump_path)
+        loaded = load(self.dump_path)
+        assert isinstance(loaded, LengthBucketRoutes)
+        assert loaded.length() == routes.length()
+        assert loaded.lengths == routes.lengths
+        assert loaded.items() == routes.items()
+        assert loaded.cost('+19876543210') == 0.5
+        # presized, so loading never resized a table
+        assert all(table.load_factor() <= 0.75
+                   for table in loaded.tables.values())
+        loaded.delete('+1')
+        assert not loaded.contains('+1')
+        assert loaded.length() == routes.length() - 1
+
+    def test_hash_table(self):
+        table = HashTable()
+        for index in range(100):
+            table.set('+1415{}'.format(index), index / 100)
+        dump(table, self.dump_path)
+        loaded = load(self.dump_path)
+        assert isinstance(loaded, HashTable)
+        assert loaded.length() == 100
+        assert sorted(loaded.items()) == sorted(table.items())
+        assert loaded.get('+141542') == 0.42
+        # presized, so loading never resized the table
+        assert loaded.load_factor() <= 0.75
+
+    def test_tree_map(self):
+        table = TreeMap()
+        for prefix, cost in ROUTES:
+            table.set(prefix, cost)
+        dump(table, self.dump_path)
+        loaded = load(self.dump_path)
+        assert isinstance(loaded, TreeMap)
+        assert sorted(loaded.items()) == sorted(table.items())
+        assert loaded.get('+1415246') == 0.01
+
+    def test_unsupported(self):
+        table = HashTable()
+        table.set(1415, 0.02)
+        with self.assertRaises(TypeError):
+            dump(table, self.dump_path)
+        with self.assertRaises(TypeError):
+            dump(dict(ROUTES), self.dump_path)
+
+    def test_invalid_file(self):
+        with open(self.dump_path, 'wb') as dump_file:
+            dump_file.write(b'+1415,0.02\n+1512,0.04\n')
+        with self.assertRaises(ValueError):
+            load(self.dump_path)
+        with open(self.dump_path, 'wb') as dump_file:
+            dump_file.write(HEADER.pack(MAGIC, VERSION + 1, 1, 0, 0))
+        with self.assertRaises(ValueError):
+            load(self.dump_path)
+
+    def test_truncated_file(self):
+        dump(RouteTrie(ROUTES), self.dump_path)
+        with open(self.dump_path, 'r+b') as dump_file:
+            dump_file.truncate(HEADER.size + 12)
+        with self.assertRaises(ValueError):
+            load(self.dump_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
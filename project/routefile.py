@@ -0,0 +1,181 @@
+#!python
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from compacttrie import CompactRouteTrie
+from routing import load_carriers
+
+# Compiled route index file layout, all integers little-endian:
+#   header: magic b'RTIX', format version, reserved, route count, slot count
+#   base array: slot count signed 32-bit integers
+#   check array: slot count signed 32-bit integers
+# The header is 16 bytes so both arrays start 4-byte aligned and can be read
+# in place from the mapped pages. See CompactRouteTrie for what they hold.
+# A compiled file may be mapped by any number of processes, and rewriting
+# its pages in place would crash them (SIGBUS on a truncated mapping), so a
+# compiled file is only ever replaced atomically: written to a temporary
+# file in the same directory, then renamed over the old one, whose inode
+# lives on for as long as anything still maps it.
+MAGIC = b'RTIX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+
+
+def write_index(trie, path):
+    """
+    Write the given CompactRouteTrie to a compiled route index file,
+    atomically replacing any file already at the given path so processes
+    that map it keep reading the old one.
+    Running time: O(s) for s slots in the trie
+    """
+    base, check = trie.base, trie.check
+    if sys.byteorder != 'little':
+        # arrays hold native integers, the file always holds little-endian
+        base, check = base[:], check[:]
+        base.byteswap()
+        check.byteswap()
+    handle, temp_path = tempfile.mkstemp(
+        suffix='.tmp', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(handle, 'wb') as index_file:
+            index_file.write(HEADER.pack(MAGIC, VERSION, 0, trie.size,
+                                         len(base)))
+            index_file.write(base.tobytes())
+            index_file.write(check.tobytes())
+        # mkstemp files are private; give it the mode open() would have
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def compile_routes(route_paths, index_path):
+    """
+    Merge the given carrier route cost files keeping the cheapest cost per
+    prefix, then write the compact trie of the result to index_path.
+    Return the CompactRouteTrie that was written.
+    Running time: O(n + p log p) for n characters of routes, p prefixes
+    Space usage: O(p) while building, which only the compile step pays
+    """
+    trie = CompactRouteTrie(load_carriers(route_paths).items())
+    write_index(trie, index_path)
+    return trie
+
+
+def is_compiled(path):
+    """Return True if the file at the given path is a compiled route index."""
+    with open(path, 'rb') as index_file:
+        return index_file.read(len(MAGIC)) == MAGIC
+
+
+class MappedRouteTrie(CompactRouteTrie):
+    """
+    CompactRouteTrie that answers lookups straight from a memory-mapped
+    compiled route index file. Opening one only reads the header, and every
+    process that maps the same file shares its pages through the page cache.
+    """
+
+    def __init__(self, path):
+        """
+        Map the compiled route index file at the given path, or raise
+        ValueError if it is not a compiled route index this code can read.
+        Running time: O(1) since pages are only read when lookups touch them
+        """
+        if sys.byteorder != 'little':
+            raise ValueError('Mapped route indexes need a little-endian host')
+        self.path = path
+        with open(path, 'rb') as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, size, slots = HEADER.unpack_from(self._map)
+        except struct.error:
+            self._map.close()
+            raise ValueError('Truncated route index file: {}'.format(path))
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError('Not a version {} route index file: {}'
+                             .format(VERSION, path))
+        if len(self._map) != HEADER.size + 8 * slots:
+            self._map.close()
+            raise ValueError('Truncated route index file: {}'.format(path))
+        self.size = size  # Number of route prefixes stored
+        # zero-copy views of the arrays in the mapped pages
+        self._pages = memoryview(self._map)
+        middle = HEADER.size + 4 * slots
+        self.base = self._pages[HEADER.size:middle].cast('i')
+        self.check = self._pages[middle:].cast('i')
+
+    def __repr__(self):
+        """Return a string representation of this mapped route trie."""
+        return 'MappedRouteTrie({!r}, {} routes)'.format(self.path, self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the array views and unmap the route index file."""
+        # the map cannot close while any view of its pages is still alive
+        self.base.release()
+        self.check.release()
+        self._pages.release()
+        self._map.close()
+
+
+def read_index(path):
+    """
+    Return a CompactRouteTrie with the arrays of the compiled route index
+    file at the given path copied into memory, so it owns its memory and
+    holds no open file or mapping, or raise ValueError like MappedRouteTrie.
+    Running time: O(s) for s slots in the file
+    """
+    with MappedRouteTrie(path) as mapped:
+        trie = CompactRouteTrie()
+        trie.size = mapped.size
+        trie.base = array('i', mapped.base.tobytes())
+        trie.check = array('i', mapped.check.tobytes())
+    return trie
+
+
+def open_index(route_paths):
+    """
+    Return a route index for the given files: a MappedRouteTrie for a single
+    compiled route index file, or else the carrier route cost files merged
+    into a RouteTrie.
+    """
+    if len(route_paths) == 1 and is_compiled(route_paths[0]):
+        return MappedRouteTrie(route_paths[0])
+    return load_carriers(route_paths)
+
+
+def main():
+    """Compile the given route cost files into a route index file."""
+    import time
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) >= 2:
+        start = time.time()
+        trie = compile_routes(args[:-1], args[-1])
+        compiled = time.time()
+        MappedRouteTrie(args[-1]).close()
+        opened = time.time()
+        print('Compiled {} routes into {} bytes in {:.3f} seconds'
+              .format(trie.size, trie.nbytes(), compiled - start))
+        print('Mapped {} in {:.6f} seconds'.format(args[-1], opened - compiled))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt routes.rtix'
+              .format(sys.argv[0]))
+        print('  compiles the cheapest route per prefix into a route index file')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!python
+
+from routefile import (write_index, compile_routes, is_compiled, open_index,
+                       read_index, MappedRouteTrie, HEADER)
+from compacttrie import CompactRouteTrie
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES, write_temp_file
+import os
+import tempfile
+import unittest
+
+
+class RouteFileTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.index_path = tempfile.mkstemp(suffix='.rtix')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.index_path)
+
+    def test_write_and_map(self):
+        trie = CompactRouteTrie(ROUTES)
+        write_index(trie, self.index_path)
+        assert os.path.getsize(self.index_path) == HEADER.size + trie.nbytes()
+        with MappedRouteTrie(self.index_path) as mapped:
+            assert mapped.length() == 4
+            assert mapped.items() == trie.items()
+            assert mapped.cost('+14152345678') == 0.03
+            assert mapped.cost('+19876543210') == NO_ROUTE_COST
+            assert mapped.lookup('+15124156620') == ('+1512', 0.04)
+            assert mapped.get('+1415246') == 0.01
+
+    def test_matches_compact_trie(self):
+        routes = random_routes(1000)
+        trie = CompactRouteTrie(routes)
+        write_index(trie, self.index_path)
+        with MappedRouteTrie(self.index_path) as mapped:
+            assert mapped.items() == trie.items()
+            for prefix, cost in routes:
+                assert mapped.cost(prefix + '12345') == trie.cost(prefix + '12345')
+
+    def test_read_index(self):
+        trie = CompactRouteTrie(ROUTES)
+        write_index(trie, self.index_path)
+        loaded = read_index(self.index_path)
+        assert not isinstance(loaded, MappedRouteTrie)
+        assert loaded.length() == 4
+        assert loaded.nbytes() == trie.nbytes()
+        assert loaded.items() == trie.items()
+        assert loaded.cost('+14152345678') == 0.03
+
+    def test_compile_routes(self):
+        paths = [write_temp_file(['+1512,0.04', '+1415,0.02']),
+                 write_temp_file(['+1415,0.01', '+1415234,0.03'])]
+        try:
+            trie = compile_routes(paths, self.index_path)
+            assert is_compiled(self.index_path) is True
+            assert is_compiled(paths[0]) is False
+            index = open_index([self.index_path])
+            assert isinstance(index, MappedRouteTrie)
+            assert index.items() == trie.items()
+            assert index.cost('+14159999999') == 0.01
+            index.close()
+            assert isinstance(open_index(paths), RouteTrie)
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    def test_invalid_file(self):
+        with open(self.index_path, 'wb') as index_file:
+            index_file.write(b'+1415,0.02\n+1512,0.04\n')
+        with self.assertRaises(ValueError):
+            MappedRouteTrie(self.index_path)
+
+    def test_rewrite_while_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.rtix')
+            write_index(CompactRouteTrie(ROUTES), path)
+            with MappedRouteTrie(path) as mapped:
+                write_index(CompactRouteTrie([('+44', 0.1)]), path)
+                # the old mapping still reads the file it was opened on
+                assert mapped.cost('+14152345678') == 0.03
+                assert mapped.length() == 4
+            with MappedRouteTrie(path) as mapped:
+                assert mapped.items() == [('+44', 0.1)]
+            # the temporary file was renamed, not left behind
+            assert os.listdir(directory) == ['routes.rtix']
+
+    def test_truncated_file(self):
+        write_index(CompactRouteTrie(ROUTES), self.index_path)
+        with open(self.index_path, 'r+b') as index_file:
+            index_file.truncate(HEADER.size + 8)
+        with self.assertRaises(ValueError):
+            MappedRouteTrie(self.index_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
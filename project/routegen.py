@@ -0,0 +1,151 @@
+#!python
+
+import os
+import random
+from itertools import accumulate
+
+# Country codes that synthetic prefixes start with, weighted towards the
+# short codes that carry most traffic like the real numbering plan
+COUNTRY_CODES = ['1', '7', '20', '27', '33', '34', '39', '44', '49', '52',
+                 '55', '61', '81', '86', '91', '234', '353', '880', '971']
+CODE_WEIGHTS = [30, 5, 2, 2, 4, 3, 3, 8, 6, 3, 3, 3, 4, 8, 6, 2, 1, 1, 2]
+# Full phone numbers have this many digits after the '+'
+NUMBER_LENGTH = 11
+
+
+def generate_prefixes(count, rand, max_length=10):
+    """
+    Return a list of count distinct route prefix digit strings. Each starts
+    with a country code and is extended to a random length; about a third
+    extend an earlier prefix so long routes overlap shorter ones, like
+    +1415 and +1415234.
+    Running time: O(count * max_length)
+    """
+    prefixes = []
+    seen = set()
+    while len(prefixes) < count:
+        if prefixes and rand.random() < 0.35:
+            # extend an existing prefix by a few digits
+            prefix = rand.choice(prefixes)
+            length = min(len(prefix) + rand.randint(1, 3), max_length)
+        else:
+            prefix = rand.choices(COUNTRY_CODES, CODE_WEIGHTS)[0]
+            length = rand.randint(len(prefix), max_length)
+        while len(prefix) < length:
+            prefix += rand.choice('0123456789')
+        if prefix not in seen:
+            seen.add(prefix)
+            prefixes.append(prefix)
+    return prefixes
+
+
+def generate_carriers(prefixes, carriers, rand, coverage=0.6):
+    """
+    Return a list of route lists, one per carrier, each a list of
+    (prefix, cost) tuples for a random share of the given prefixes. Every
+    prefix is offered by at least one carrier, and costs vary by carrier
+    around a price per country code.
+    Running time: O(p * carriers) for p prefixes
+    """
+    base_prices = {}
+    routes = [[] for _ in range(carriers)]
+    for prefix in prefixes:
+        country = prefix[:2]
+        if country not in base_prices:
+            base_prices[country] = rand.uniform(0.005, 0.5)
+        offered = [carrier for carrier in range(carriers)
+                   if rand.random() < coverage]
+        if not offered:
+            offered = [rand.randrange(carriers)]
+        for carrier in offered:
+            cost = base_prices[country] * rand.uniform(0.7, 1.3)
+            routes[carrier].append(('+' + prefix, round(cost, 4)))
+    return routes
+
+
+def generate_numbers(count, prefixes, rand, unroutable=0.1, zipf=None):
+    """
+    Return a list of count phone numbers, most of which start with one of
+    the given prefixes and about the unroutable fraction of which are
+    uniformly random digits that may match no route at all. If a zipf
+    exponent is given, numbers repeat like the calls of a call detail
+    record (CDR) file: each is drawn from count distinct numbers, the one
+    of rank r with probability proportional to 1 / r ** zipf.
+    Running time: O(count * NUMBER_LENGTH), plus O(count log count) to
+    draw repeated numbers
+    """
+    if zipf is not None:
+        distinct = generate_numbers(count, prefixes, rand, unroutable)
+        weights = list(accumulate(1 / rank ** zipf
+                                  for rank in range(1, count + 1)))
+        return rand.choices(distinct, cum_weights=weights, k=count)
+    numbers = []
+    for _ in range(count):
+        if rand.random() < unroutable:
+            number = ''
+        else:
+            number = rand.choice(prefixes)
+        while len(number) < NUMBER_LENGTH:
+            number += rand.choice('0123456789')
+        numbers.append('+' + number)
+    return numbers
+
+
+def write_routes(path, routes):
+    """Write the given (prefix, cost) routes to a route cost file."""
+    with open(path, 'w') as route_file:
+        route_file.write(''.join('{},{}\n'.format(prefix, cost)
+                                 for prefix, cost in routes))
+
+
+def write_numbers(path, numbers):
+    """Write the given phone numbers to a phone numbers file."""
+    with open(path, 'w') as numbers_file:
+        numbers_file.write(''.join(number + '\n' for number in numbers))
+
+
+def generate_dataset(directory, routes, numbers, carriers=3, seed=None,
+                     zipf=None):
+    """
+    Write route cost files for the given number of carriers, covering about
+    the given number of distinct prefixes between them, plus a phone numbers
+    file, repeating numbers like a CDR file if a zipf exponent is given (see
+    generate_numbers), to the given directory. Return a tuple of (route file
+    paths, numbers file path).
+    """
+    rand = random.Random(seed)
+    prefixes = generate_prefixes(routes, rand)
+    route_paths = []
+    for carrier, carrier_routes in enumerate(generate_carriers(
+            prefixes, carriers, rand)):
+        path = os.path.join(directory, 'route-costs-{}-carrier{}.txt'
+                            .format(routes, carrier + 1))
+        write_routes(path, carrier_routes)
+        route_paths.append(path)
+    numbers_path = os.path.join(directory, 'phone-numbers-{}.txt'
+                                .format(numbers))
+    write_numbers(numbers_path, generate_numbers(numbers, prefixes, rand,
+                                                 zipf=zipf))
+    return route_paths, numbers_path
+
+
+def main():
+    """Write a synthetic route and phone numbers dataset to a directory."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if 3 <= len(args) <= 5:
+        settings = [int(arg) for arg in args[1:4]]
+        zipf = float(args[4]) if len(args) == 5 else None
+        route_paths, numbers_path = generate_dataset(args[0], *settings,
+                                                     seed=0, zipf=zipf)
+        for path in route_paths + [numbers_path]:
+            print('Wrote {}'.format(path))
+    else:
+        print('Usage: {} directory routes numbers [carriers [zipf]]'
+              .format(sys.argv[0]))
+        print('  writes carrier route cost files and a phone numbers file')
+        print('  whose numbers repeat with the given Zipf exponent, if any')
+
+
+if __name__ == '__main__':
+    main()
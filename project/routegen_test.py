@@ -0,0 +1,73 @@
+#!python
+
+from routegen import (generate_prefixes, generate_carriers, generate_numbers,
+                      generate_dataset, NUMBER_LENGTH)
+from routing import read_routes, load_carriers
+from pricer import read_numbers
+import random
+import shutil
+import tempfile
+import unittest
+
+
+class RouteGenTest(unittest.TestCase):
+
+    def test_generate_prefixes(self):
+        prefixes = generate_prefixes(500, random.Random(1))
+        assert len(prefixes) == 500
+        assert len(set(prefixes)) == 500
+        assert all(prefix.isdigit() and len(prefix) <= 10
+                   for prefix in prefixes)
+        # some prefixes extend other prefixes
+        prefix_set = set(prefixes)
+        assert any(prefix[:length] in prefix_set for prefix in prefixes
+                   for length in range(1, len(prefix)))
+
+    def test_generate_prefixes_is_repeatable(self):
+        assert (generate_prefixes(100, random.Random(4)) ==
+                generate_prefixes(100, random.Random(4)))
+
+    def test_generate_carriers(self):
+        prefixes = generate_prefixes(300, random.Random(2))
+        carriers = generate_carriers(prefixes, 3, random.Random(2))
+        assert len(carriers) == 3
+        offered = set(prefix for routes in carriers for prefix, _ in routes)
+        # every prefix is offered by at least one carrier
+        assert offered == set('+' + prefix for prefix in prefixes)
+        assert all(cost > 0 for routes in carriers for _, cost in routes)
+
+    def test_generate_numbers(self):
+        prefixes = generate_prefixes(50, random.Random(3))
+        numbers = generate_numbers(200, prefixes, random.Random(3))
+        assert len(numbers) == 200
+        assert all(number[0] == '+' and len(number) == NUMBER_LENGTH + 1 and
+                   number[1:].isdigit() for number in numbers)
+
+    def test_generate_repeated_numbers(self):
+        prefixes = generate_prefixes(50, random.Random(3))
+        numbers = generate_numbers(1000, prefixes, random.Random(3), zipf=1.1)
+        assert len(numbers) == 1000
+        counts = sorted((numbers.count(number) for number in set(numbers)),
+                        reverse=True)
+        # a few numbers are called far more often than the rest
+        assert len(counts) < 700
+        assert counts[0] > 50
+        assert generate_numbers(1000, prefixes, random.Random(3),
+                                zipf=1.1) == numbers
+
+    def test_generate_dataset(self):
+        directory = tempfile.mkdtemp()
+        try:
+            route_paths, numbers_path = generate_dataset(directory, 200, 100,
+                                                         carriers=2, seed=5)
+            assert len(route_paths) == 2
+            routes = [list(read_routes(path)) for path in route_paths]
+            assert all(len(carrier) > 0 for carrier in routes)
+            assert load_carriers(route_paths).length() == 200
+            assert len(list(read_numbers(numbers_path))) == 100
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,351 @@
+#!python
+
+import os
+
+# Cost of calling a number that no route prefix matches
+NO_ROUTE_COST = 0
+
+
+def normalize(number):
+    """
+    Return the digits of the given phone number or route prefix without the
+    leading '+' and surrounding whitespace, e.g. '+1415' -> '1415'.
+    Running time: O(l) for a number of length l
+    """
+    number = number.strip()
+    if number.startswith('+'):
+        return number[1:]
+    return number
+
+
+def parse_route(line):
+    """
+    Parse one '+prefix,cost' line of a route cost file into a tuple of
+    (prefix digits, cost), or raise ValueError if the line is malformed.
+    Running time: O(l) for a line of length l
+    """
+    fields = line.strip().split(',')
+    if len(fields) != 2:
+        raise ValueError('Invalid route line: {!r}'.format(line))
+    prefix = normalize(fields[0])
+    if not prefix.isdigit():
+        raise ValueError('Invalid route prefix: {!r}'.format(line))
+    return prefix, float(fields[1])
+
+
+def read_routes(path):
+    """
+    Generate (prefix, cost) tuples from the route cost file at the given path,
+    one line at a time so the whole file is never held in memory.
+    Running time: O(n) for a file with n characters
+    Space usage: O(1) besides the line being parsed
+    """
+    with open(path) as route_file:
+        for line in route_file:
+            # skip blank lines (e.g. trailing newline at end of file)
+            if line.strip():
+                yield parse_route(line)
+
+
+class TrieNode(object):
+
+    def __init__(self):
+        """Initialize this node with no children and no route cost."""
+        self.children = {}  # Maps next digit to child node
+        self.cost = None  # Cost of the route ending here, if any
+        self.carrier = None  # Carrier offering that route, if known
+
+    def __repr__(self):
+        """Return a string representation of this trie node."""
+        return 'TrieNode({} children, cost={!r})'.format(len(self.children),
+                                                         self.cost)
+
+    def is_leaf(self):
+        """Return True if this node has no children."""
+        return len(self.children) == 0
+
+
+class RouteTrie(object):
+    """
+    Digit trie of route prefixes that finds the longest matching prefix of a
+    phone number in O(l) time for a number of length l, no matter how many
+    routes are stored.
+    """
+
+    def __init__(self, routes=None):
+        """Initialize this trie and insert the given (prefix, cost) routes."""
+        self.root = TrieNode()
+        self.size = 0  # Number of route prefixes stored
+        if routes is not None:
+            for prefix, cost in routes:
+                self.insert(prefix, cost)
+
+    def __repr__(self):
+        """Return a string representation of this route trie."""
+        return 'RouteTrie({} routes)'.format(self.size)
+
+    def is_empty(self):
+        """Return True if this trie contains no routes."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes stored in this trie."""
+        return self.size
+
+    def _find_node(self, prefix):
+        """
+        Return the node reached by following the digits of the given prefix,
+        or None if no node exists for it.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self.root
+        for digit in normalize(prefix):
+            node = node.children.get(digit)
+            if node is None:
+                return None
+        return node
+
+    def contains(self, prefix):
+        """
+        Return True if a route with exactly the given prefix is stored.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._find_node(prefix)
+        return node is not None and node.cost is not None
+
+    def get(self, prefix):
+        """
+        Return the cost of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._find_node(prefix)
+        if node is None or node.cost is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        return node.cost
+
+    def _make_node(self, prefix):
+        """
+        Return the node for the given prefix, creating any missing nodes
+        along its path.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self.root
+        for digit in normalize(prefix):
+            child = node.children.get(digit)
+            if child is None:
+                child = TrieNode()
+                node.children[digit] = child
+            node = child
+        return node
+
+    def insert(self, prefix, cost, carrier=None):
+        """
+        Insert a route with the given prefix and cost, or update its cost if
+        the prefix is already stored.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._make_node(prefix)
+        # only count new prefixes, not cost updates
+        if node.cost is None:
+            self.size += 1
+        node.cost = cost
+        node.carrier = carrier
+
+    def insert_cheapest(self, prefix, cost, carrier=None):
+        """
+        Insert a route with the given prefix and cost unless the prefix is
+        already stored with a cost no greater than the given one, so each
+        prefix keeps only its cheapest carrier. Return True if inserted.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._make_node(prefix)
+        if node.cost is None:
+            self.size += 1
+        # ties keep the carrier that was loaded first
+        elif node.cost <= cost:
+            return False
+        node.cost = cost
+        node.carrier = carrier
+        return True
+
+    def get_carrier(self, prefix):
+        """
+        Return the carrier of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(l) for a prefix of length l
+        """
+        node = self._find_node(prefix)
+        if node is None or node.cost is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        return node.carrier
+
+    def delete(self, prefix):
+        """
+        Delete the route with the given prefix, or raise KeyError.
+        Nodes left without a route or children are pruned from the trie.
+        Running time: O(l) for a prefix of length l
+        """
+        digits = normalize(prefix)
+        # remember the path so empty nodes can be pruned on the way back up
+        path = [self.root]
+        for digit in digits:
+            node = path[-1].children.get(digit)
+            if node is None:
+                raise KeyError('Route not found: {}'.format(prefix))
+            path.append(node)
+        if path[-1].cost is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        path[-1].cost = None
+        path[-1].carrier = None
+        self.size -= 1
+        # prune nodes that no longer lead to any route
+        for depth in range(len(digits), 0, -1):
+            node = path[depth]
+            if node.cost is not None or not node.is_leaf():
+                break
+            del path[depth - 1].children[digits[depth - 1]]
+
+    def items(self):
+        """
+        Return a list of all (prefix, cost) routes in sorted prefix order.
+        Running time: O(n) for n nodes in the trie
+        """
+        result = []
+        # iterative depth-first traversal so deep tries cannot hit the
+        # recursion limit; children pushed in reverse to pop them in order
+        stack = [('', self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            if node.cost is not None:
+                result.append(('+' + prefix, node.cost))
+            for digit in sorted(node.children, reverse=True):
+                stack.append((prefix + digit, node.children[digit]))
+        return result
+
+    def _longest_match(self, digits):
+        """
+        Return a tuple of (length, node) for the longest route prefix of the
+        given digits, or None if no route matches.
+        Running time: O(l) for digits of length l
+        """
+        node = self.root
+        match = (0, node) if node.cost is not None else None
+        for depth, digit in enumerate(digits, 1):
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.cost is not None:
+                match = (depth, node)
+        return match
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        digits = normalize(number)
+        match = self._longest_match(digits)
+        if match is None:
+            return None
+        length, node = match
+        return '+' + digits[:length], node.cost
+
+    def lookup_carrier(self, number):
+        """
+        Return the (prefix, cost, carrier) of the longest route prefix
+        matching the given phone number, or None if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        digits = normalize(number)
+        match = self._longest_match(digits)
+        if match is None:
+            return None
+        length, node = match
+        return '+' + digits[:length], node.cost, node.carrier
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Running time: O(l) for a number of length l
+        """
+        node = self.root
+        cost = node.cost
+        # no normalize() call here: this is the per-call hot path and any
+        # leading '+' simply has no child node to follow
+        for digit in number[1:] if number[:1] == '+' else number:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.cost is not None:
+                cost = node.cost
+        return NO_ROUTE_COST if cost is None else cost
+
+
+def load_routes(path, index=None):
+    """
+    Load every route in the route cost file at the given path into the given
+    route index (a new RouteTrie by default) and return the index.
+    Running time: O(n) for a file with n characters
+    Space usage: O(p) for p distinct prefix digits stored in the index
+    """
+    if index is None:
+        index = RouteTrie()
+    for prefix, cost in read_routes(path):
+        index.insert(prefix, cost)
+    return index
+
+
+def carrier_name(path):
+    """Return the carrier name for a route file: its name minus extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_carriers(paths, index=None):
+    """
+    Merge the route cost files of several carriers into one route index
+    (a new RouteTrie by default) that keeps only the cheapest cost and its
+    carrier for each distinct prefix, and return the index.
+    Each item of paths is either a file path, whose carrier is named after
+    the file, or a (carrier, path) tuple.
+    Running time: O(n) for n characters across all files, so a lookup
+    afterwards costs the same no matter how many carriers were merged
+    Space usage: O(p) for p distinct prefix digits across all carriers
+    """
+    if index is None:
+        index = RouteTrie()
+    for item in paths:
+        if isinstance(item, tuple):
+            carrier, path = item
+        else:
+            carrier, path = carrier_name(item), item
+        for prefix, cost in read_routes(path):
+            index.insert_cheapest(prefix, cost, carrier)
+    return index
+
+
+def main():
+    """Look up the cost of each phone number given on the command line."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    # route files end in .txt, phone numbers start with +
+    paths = [arg for arg in args if not arg.startswith('+')]
+    numbers = [arg for arg in args if arg.startswith('+')]
+    if len(paths) > 0 and len(numbers) > 0:
+        index = load_carriers(paths)
+        for number in numbers:
+            match = index.lookup_carrier(number)
+            if match is None:
+                print('{},{}'.format(number, NO_ROUTE_COST))
+            else:
+                print('{},{} via {}'.format(number, match[1], match[2]))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt '
+              'number1 ... numberN'.format(sys.argv[0]))
+        print('  prints the cheapest cost and carrier for each phone number')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!python
+
+from routing import (RouteTrie, normalize, parse_route, read_routes,
+                     load_routes, load_carriers, carrier_name, NO_ROUTE_COST)
+import os
+import tempfile
+import unittest
+
+
+ROUTES = [('+1512', 0.04), ('+1415', 0.02), ('+1415234', 0.03),
+          ('+1415246', 0.01)]
+
+
+def write_temp_file(lines):
+    """Write the given lines to a new temporary file and return its path."""
+    handle, path = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(handle, 'w') as temp_file:
+        temp_file.write('\n'.join(lines) + '\n')
+    return path
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_normalize(self):
+        assert normalize('+1415') == '1415'
+        assert normalize(' +1415\n') == '1415'
+        assert normalize('1415') == '1415'
+
+    def test_parse_route(self):
+        assert parse_route('+1415234,0.03\n') == ('1415234', 0.03)
+        assert parse_route('+1512,0') == ('1512', 0.0)
+
+    def test_parse_route_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_route('+1415234')
+        with self.assertRaises(ValueError):
+            parse_route('+14a5,0.03')
+        with self.assertRaises(ValueError):
+            parse_route('+1415,cheap')
+
+    def test_read_routes_skips_blank_lines(self):
+        path = write_temp_file(['+1512,0.04', '', '+1415,0.02'])
+        try:
+            assert list(read_routes(path)) == [('1512', 0.04), ('1415', 0.02)]
+        finally:
+            os.remove(path)
+
+
+class RouteTrieTest(unittest.TestCase):
+
+    def test_init(self):
+        trie = RouteTrie()
+        assert trie.length() == 0
+        assert trie.is_empty() is True
+
+    def test_init_with_routes(self):
+        trie = RouteTrie(ROUTES)
+        assert trie.length() == 4
+        assert trie.is_empty() is False
+
+    def test_insert_and_get(self):
+        trie = RouteTrie()
+        trie.insert('+1415', 0.02)
+        assert trie.get('+1415') == 0.02
+        assert trie.contains('+1415') is True
+        # intermediate nodes are not routes
+        assert trie.contains('+141') is False
+        with self.assertRaises(KeyError):
+            trie.get('+141')
+        # updating a cost does not change the size
+        trie.insert('+1415', 0.05)
+        assert trie.get('+1415') == 0.05
+        assert trie.length() == 1
+
+    def test_delete(self):
+        trie = RouteTrie(ROUTES)
+        trie.delete('+1415234')
+        assert trie.length() == 3
+        assert trie.contains('+1415234') is False
+        assert trie.contains('+1415246') is True
+        # the rest of the path is still reachable
+        assert trie.get('+1415') == 0.02
+        with self.assertRaises(KeyError):
+            trie.delete('+1415234')
+        with self.assertRaises(KeyError):
+            trie.delete('+141')
+
+    def test_delete_prunes_nodes(self):
+        trie = RouteTrie([('+1415234', 0.03)])
+        trie.delete('+1415234')
+        assert trie.root.is_leaf() is True
+
+    def test_items(self):
+        trie = RouteTrie(ROUTES)
+        assert trie.items() == sorted(ROUTES)
+
+    def test_lookup(self):
+        trie = RouteTrie(ROUTES)
+        assert trie.lookup('+15124156620') == ('+1512', 0.04)
+        assert trie.lookup('+14152345678') == ('+1415234', 0.03)
+        assert trie.lookup('+14152465678') == ('+1415246', 0.01)
+        assert trie.lookup('+14159999999') == ('+1415', 0.02)
+        assert trie.lookup('+19876543210') is None
+
+    def test_cost(self):
+        trie = RouteTrie(ROUTES)
+        assert trie.cost('+15124156620') == 0.04
+        assert trie.cost('+14152345678') == 0.03
+        assert trie.cost('14152345678') == 0.03
+        assert trie.cost('+19876543210') == NO_ROUTE_COST
+        # number shorter than the only matching route
+        assert trie.cost('+141523') == 0.02
+
+    def test_load_routes(self):
+        path = write_temp_file(['{},{}'.format(*route) for route in ROUTES])
+        try:
+            trie = load_routes(path)
+        finally:
+            os.remove(path)
+        assert trie.length() == 4
+        assert trie.cost('+14152345678') == 0.03
+
+
+class LoadCarriersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = [
+            write_temp_file(['+1512,0.04', '+1415,0.02', '+1415234,0.03']),
+            write_temp_file(['+1512,0.05', '+1415,0.01', '+44,0.10']),
+            write_temp_file(['+1415234,0.02', '+44,0.10']),
+        ]
+
+    def tearDown(self):
+        for path in self.paths:
+            os.remove(path)
+
+    def test_insert_cheapest(self):
+        trie = RouteTrie()
+        assert trie.insert_cheapest('+1415', 0.02, 'A') is True
+        assert trie.insert_cheapest('+1415', 0.03, 'B') is False
+        assert trie.insert_cheapest('+1415', 0.02, 'C') is False
+        assert trie.insert_cheapest('+1415', 0.01, 'D') is True
+        assert trie.get('+1415') == 0.01
+        assert trie.get_carrier('+1415') == 'D'
+        assert trie.length() == 1
+
+    def test_load_carriers_keeps_cheapest(self):
+        carriers = [('a', self.paths[0]), ('b', self.paths[1]),
+                    ('c', self.paths[2])]
+        trie = load_carriers(carriers)
+        # one entry per distinct prefix across all carriers
+        assert trie.length() == 4
+        assert trie.lookup_carrier('+15124156620') == ('+1512', 0.04, 'a')
+        assert trie.lookup_carrier('+14159999999') == ('+1415', 0.01, 'b')
+        assert trie.lookup_carrier('+14152345678') == ('+1415234', 0.02, 'c')
+        # tie goes to the carrier loaded first
+        assert trie.lookup_carrier('+447700900000') == ('+44', 0.10, 'b')
+        assert trie.lookup_carrier('+19876543210') is None
+
+    def test_load_carriers_names_from_paths(self):
+        trie = load_carriers(self.paths)
+        assert trie.get_carrier('+1512') == carrier_name(self.paths[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
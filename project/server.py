@@ -0,0 +1,189 @@
+#!python
+
+import asyncio
+from pricer import format_cost
+from routefile import open_index
+
+# Bytes read from a connection at a time; every complete request line in a
+# read is answered with one write
+READ_SIZE = 1 << 16
+# Longest request line accepted before the connection is closed
+MAX_LINE = 1 << 20
+# Response line for a request line that cannot be answered, such as one
+# that is not ASCII
+ERROR_RESPONSE = 'error\n'
+
+
+def answer(cost, request):
+    """
+    Return the response line for one request line of space-separated phone
+    numbers: '+number,cost' for each number, separated by spaces.
+    Running time: O(n * l) for n numbers of length l
+    """
+    return ' '.join('{},{}'.format(number, format_cost(cost(number)))
+                    for number in request.split()) + '\n'
+
+
+class PricingServer(object):
+    """
+    Line protocol pricing service over TCP or a Unix socket. Clients send
+    request lines of one or more space-separated phone numbers and may
+    pipeline as many lines as they like; each line gets one response line,
+    in order, which is ERROR_RESPONSE for a line that cannot be answered.
+    All connections share one in-memory route index.
+    """
+
+    def __init__(self, index):
+        """Initialize this server to answer from the given route index."""
+        self.index = index  # Any route index with a cost(number) method
+        self.requests = 0  # Request lines answered
+        self.numbers = 0  # Phone numbers priced
+        self.errors = 0  # Request lines answered with ERROR_RESPONSE
+        self.connections = 0  # Connections currently open
+        self._server = None
+
+    def __repr__(self):
+        """Return a string representation of this pricing server."""
+        return 'PricingServer({} requests, {} numbers)'.format(self.requests,
+                                                             self.numbers)
+
+    def answer_lines(self, lines):
+        """
+        Return the encoded responses to the given request lines (bytes) as
+        one buffer. The index is looked up once per call and no reference to
+        it outlives the call, so a swapped index is picked up between
+        batches, never in the middle of one, and nothing keeps the old index
+        alive once the batch running when it was swapped out is answered.
+        Running time: O(n * l) for n numbers of length l in the lines
+        """
+        cost = self.index.cost
+        responses = []
+        for line in lines:
+            # a bad line gets an error response of its own, so it never
+            # costs the valid lines pipelined with it their answers
+            try:
+                request = line.decode('ascii')
+                responses.append(answer(cost, request))
+            except Exception:
+                responses.append(ERROR_RESPONSE)
+                self.errors += 1
+                continue
+            self.numbers += len(request.split())
+        self.requests += len(responses)
+        return ''.join(responses).encode('ascii')
+
+    def swap_index(self, index):
+        """
+        Answer every batch from now on from the given route index and return
+        the index it replaces. Batches are answered without yielding to the
+        event loop, so when this is called on the loop no batch is using the
+        old index and it may be closed right away.
+        Running time: O(1)
+        """
+        old_index, self.index = self.index, index
+        return old_index
+
+    async def handle(self, reader, writer):
+        """
+        Answer every request line sent on one connection until it closes.
+        Lines that arrive together are answered with a single write.
+        Running time: O(n * l) for n numbers of length l sent
+        Space usage: O(r) for r bytes read at a time
+        """
+        self.connections += 1
+        pending = b''  # Partial line left over from the last read
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                if len(pending) > MAX_LINE:
+                    break
+                if not lines:
+                    continue
+                writer.write(self.answer_lines(lines))
+                await writer.drain()
+        except ConnectionError:
+            pass  # Client went away mid-request
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Start listening on the given TCP host and port, or on the Unix socket
+        at the given path if one is given. Return the listening address.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self.handle, path)
+            return path
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Answer requests until this server is closed."""
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and wait for the listening socket to close."""
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def serve(index, address, reload_paths=None):
+    """
+    Serve the given route index on a TCP port or a Unix socket path. If
+    reload_paths are given, reload the index whenever those files change.
+    """
+    server = PricingServer(index)
+    if address.isdigit():
+        bound = await server.start(port=int(address))
+    else:
+        bound = await server.start(path=address)
+    print('Serving {} on {}'.format(index, bound))
+    if reload_paths is None:
+        await server.serve_forever()
+        return
+    from reload import RouteReloader
+    reloader = RouteReloader(server, reload_paths)
+    reloader.start()
+    try:
+        await server.serve_forever()
+    finally:
+        await reloader.stop()
+
+
+def main():
+    """Serve prices for the given route files on a port or Unix socket."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    reload_files = len(args) > 0 and args[0] == '--reload'
+    if reload_files:
+        args = args[1:]
+    if len(args) >= 2:
+        if reload_files:
+            # the reloader may swap in new files at any time, so don't map
+            # the watched ones
+            from reload import open_reloadable_index
+            index = open_reloadable_index(args[1:])
+        else:
+            index = open_index(args[1:])
+        try:
+            asyncio.run(serve(index, args[0],
+                              args[1:] if reload_files else None))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print('Usage: {} [--reload] port|socket-path route-costs1.txt ... '
+              'route-costsN.txt'.format(sys.argv[0]))
+        print('       {} [--reload] port|socket-path routes.rtix'
+              .format(sys.argv[0]))
+        print('  answers lines of space-separated phone numbers with '
+              '+number,cost')
+        print('  --reload swaps in a new index when the route files change')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!python
+
+from server import PricingServer, answer, ERROR_RESPONSE
+from loadgen import load_test, percentile, open_connection
+from routing import RouteTrie
+from routing_test import ROUTES
+import asyncio
+import os
+import tempfile
+import unittest
+
+
+class AnswerTest(unittest.TestCase):
+
+    def test_answer_single(self):
+        index = RouteTrie(ROUTES)
+        assert answer(index.cost, '+14152345678') == '+14152345678,0.03\n'
+
+    def test_answer_batch(self):
+        index = RouteTrie(ROUTES)
+        assert answer(index.cost, '+15124156620 +19876543210\r') == \
+            '+15124156620,0.04 +19876543210,0\n'
+
+    def test_answer_empty_line(self):
+        index = RouteTrie(ROUTES)
+        assert answer(index.cost, '') == '\n'
+
+
+class PricingServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = PricingServer(RouteTrie(ROUTES))
+
+    def test_pipelined_requests(self):
+        async def scenario():
+            address = await self.server.start()
+            reader, writer = await open_connection(address)
+            # send three request lines, the last split across two writes
+            writer.write(b'+15124156620\n+14152345678 +19876543210\n+1415')
+            await writer.drain()
+            writer.write(b'9999999\n')
+            responses = [await reader.readline() for _ in range(3)]
+            writer.close()
+            await self.server.close()
+            return responses
+
+        responses = asyncio.run(scenario())
+        assert responses == [b'+15124156620,0.04\n',
+                             b'+14152345678,0.03 +19876543210,0\n',
+                             b'+14159999999,0.02\n']
+        assert self.server.requests == 3
+        assert self.server.numbers == 4
+
+    def test_invalid_line(self):
+        response = self.server.answer_lines(
+            [b'+15124156620', b'+1415\xff2345678', b'+14152345678'])
+        assert response == (b'+15124156620,0.04\n' +
+                            ERROR_RESPONSE.encode('ascii') +
+                            b'+14152345678,0.03\n')
+        assert self.server.requests == 3
+        assert self.server.numbers == 2
+        assert self.server.errors == 1
+
+    def test_pipelined_invalid_line(self):
+        async def scenario():
+            address = await self.server.start()
+            reader, writer = await open_connection(address)
+            writer.write(b'+15124156620\n\xe9\n+14152345678\n')
+            responses = [await reader.readline() for _ in range(3)]
+            writer.close()
+            await self.server.close()
+            return responses
+
+        assert asyncio.run(scenario()) == [b'+15124156620,0.04\n', b'error\n',
+                                           b'+14152345678,0.03\n']
+
+    def test_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'pricer.sock')
+
+        async def scenario():
+            await self.server.start(path=path)
+            reader, writer = await open_connection(path)
+            writer.write(b'+14152345678\n')
+            response = await reader.readline()
+            writer.close()
+            await self.server.close()
+            return response
+
+        try:
+            assert asyncio.run(scenario()) == b'+14152345678,0.03\n'
+        finally:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+    def test_load_test(self):
+        async def scenario():
+            address = await self.server.start()
+            stats = await load_test(address, ['+14152345678', '+15124156620'],
+                                    connections=3, requests=50, batch=4,
+                                    pipeline=8)
+            await self.server.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats['requests'] == 150
+        assert stats['numbers'] == 600
+        assert self.server.requests == 150
+        assert self.server.numbers == 600
+        assert 0 < stats['p50_ms'] <= stats['p99_ms'] <= stats['max_ms']
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 0.50) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile(values, 1.0) == 100
+        assert percentile(values, 0.0) == 1
+        assert percentile([], 0.99) == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
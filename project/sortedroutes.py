@@ -0,0 +1,255 @@
+#!python
+
+from array import array
+from bisect import bisect_left, bisect_right
+from compacttrie import to_fixed, from_fixed, COST_SCALE
+from routing import normalize, NO_ROUTE_COST
+
+# Longest prefix that can be stored (E.164 numbers have at most 15 digits)
+MAX_DIGITS = 15
+# Low bits of a key that hold the prefix length
+LENGTH_BITS = 5
+LENGTH_MASK = (1 << LENGTH_BITS) - 1
+# POWERS[n] is 10 ** n, to drop the last n padded digits of a key
+POWERS = [10 ** n for n in range(MAX_DIGITS + 1)]
+
+
+def encode(digits):
+    """
+    Return the integer key of the given prefix digits: the digits padded
+    with zeros to MAX_DIGITS, then the prefix length in the low bits.
+    Keys sort in the same order as the digit strings, e.g. 14 < 140 < 1401.
+    Running time: O(l) for l digits
+    """
+    if len(digits) > MAX_DIGITS:
+        raise ValueError('Prefix longer than {} digits: {}'
+                         .format(MAX_DIGITS, digits))
+    return int(digits.ljust(MAX_DIGITS, '0')) << LENGTH_BITS | len(digits)
+
+
+def decode(key):
+    """Return the prefix digits encoded in the given integer key."""
+    length = key & LENGTH_MASK
+    return str(key >> LENGTH_BITS).zfill(MAX_DIGITS)[:length]
+
+
+class SortedRoutes(object):
+    """
+    Route index that stores every prefix as an integer key in one sorted
+    array('q'), with parallel arrays of fixed-point costs and of the index of
+    each prefix's longest stored proper prefix (its parent), 16 bytes per
+    route in all. A number is priced by a binary search for the greatest
+    prefix key not above the number's key; if that prefix does not match,
+    the longest match is one of its parents. Updates shift the arrays, so
+    this suits read-mostly route tables.
+    """
+
+    def __init__(self, routes=None):
+        """
+        Build this index from the given iterable of (prefix, cost) routes.
+        A later route with the same prefix replaces an earlier one.
+        Running time: O(p log p) to sort p routes
+        """
+        fixed_costs = {}
+        if routes is not None:
+            for prefix, cost in routes:
+                fixed_costs[encode(normalize(prefix))] = to_fixed(cost)
+        keys = sorted(fixed_costs)
+        self.keys = array('q', keys)  # Sorted prefix keys
+        self.costs = array('i', [fixed_costs[key] for key in keys])
+        self.parents = array('i')  # Index of longest proper prefix, or -1
+        self._link_parents()
+
+    @classmethod
+    def from_arrays(cls, keys, costs):
+        """
+        Return an index built straight from parallel arrays of prefix keys
+        (as made by encode) and fixed-point costs in route file order, as
+        parallel.parse_routes_parallel returns them, without decoding any
+        key back to digits. A later route with the same key replaces an
+        earlier one.
+        Running time: O(p) for p routes already in key order, else
+        O(p log p) to sort them
+        """
+        index = cls()
+        count = len(keys)
+        if all(keys[i] < keys[i + 1] for i in range(count - 1)):
+            # a route file sorted by prefix needs no sort or dedupe
+            index.keys = array('q', keys)
+            index.costs = array('i', costs)
+        else:
+            # stable sort, so the last of equal keys is the later route
+            order = sorted(range(count), key=keys.__getitem__)
+            last = [position for i, position in enumerate(order)
+                    if i + 1 == count or keys[order[i + 1]] != keys[position]]
+            index.keys = array('q', [keys[position] for position in last])
+            index.costs = array('i', [costs[position] for position in last])
+        index._link_parents()
+        return index
+
+    def __repr__(self):
+        """Return a string representation of this sorted route index."""
+        return 'SortedRoutes({} routes, {} bytes)'.format(self.length(),
+                                                          self.nbytes())
+
+    def is_empty(self):
+        """Return True if this index contains no routes."""
+        return len(self.keys) == 0
+
+    def length(self):
+        """Return the number of routes stored in this index."""
+        return len(self.keys)
+
+    def nbytes(self):
+        """Return the number of bytes used by this index's arrays."""
+        return sum(table.itemsize * len(table)
+                   for table in (self.keys, self.costs, self.parents))
+
+    def bytes_per_route(self):
+        """Return the average number of array bytes used per stored route."""
+        return self.nbytes() / len(self.keys) if len(self.keys) > 0 else 0
+
+    def _link_parents(self):
+        """
+        Recompute the parent of every route with one pass over the sorted
+        keys, keeping a stack of the prefixes enclosing the current key.
+        Running time: O(n) for n routes, since each is pushed and popped once
+        """
+        parents = array('i', [-1] * len(self.keys))
+        stack = []  # Indexes of the enclosing prefixes, innermost on top
+        for index, key in enumerate(self.keys):
+            while stack and not self._is_prefix(self.keys[stack[-1]], key):
+                stack.pop()
+            if stack:
+                parents[index] = stack[-1]
+            stack.append(index)
+        self.parents = parents
+
+    def _is_prefix(self, prefix_key, key):
+        """
+        Return True if the prefix encoded in prefix_key is a prefix of the
+        digits encoded in key.
+        Running time: O(1)
+        """
+        length = prefix_key & LENGTH_MASK
+        if length > key & LENGTH_MASK:
+            return False
+        scale = POWERS[MAX_DIGITS - length]
+        return ((prefix_key >> LENGTH_BITS) // scale ==
+                (key >> LENGTH_BITS) // scale)
+
+    def _find(self, digits):
+        """
+        Return the array index of the route with exactly the given prefix
+        digits, or None if it is not stored.
+        Running time: O(log n) for n routes
+        """
+        if len(digits) > MAX_DIGITS or not (digits.isdigit() or digits == ''):
+            return None
+        key = encode(digits)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def contains(self, prefix):
+        """
+        Return True if a route with exactly the given prefix is stored.
+        Running time: O(log n) for n routes
+        """
+        return self._find(normalize(prefix)) is not None
+
+    def get(self, prefix):
+        """
+        Return the cost of the route with exactly the given prefix,
+        or raise KeyError if there is no such route.
+        Running time: O(log n) for n routes
+        """
+        index = self._find(normalize(prefix))
+        if index is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        return from_fixed(self.costs[index])
+
+    def insert(self, prefix, cost):
+        """
+        Insert a route with the given prefix and cost, or update its cost if
+        the prefix is already stored.
+        Running time: O(n) for n routes, to shift the arrays and relink
+        parents; updating an existing cost is O(log n)
+        """
+        key = encode(normalize(prefix))
+        fixed = to_fixed(cost)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            self.costs[index] = fixed
+            return
+        self.keys.insert(index, key)
+        self.costs.insert(index, fixed)
+        self._link_parents()
+
+    def delete(self, prefix):
+        """
+        Delete the route with the given prefix, or raise KeyError.
+        Running time: O(n) for n routes, to shift the arrays and relink
+        parents
+        """
+        index = self._find(normalize(prefix))
+        if index is None:
+            raise KeyError('Route not found: {}'.format(prefix))
+        del self.keys[index]
+        del self.costs[index]
+        self._link_parents()
+
+    def items(self):
+        """
+        Return a list of all (prefix, cost) routes in sorted prefix order.
+        Running time: O(n) for n routes
+        """
+        return [('+' + decode(key), from_fixed(fixed))
+                for key, fixed in zip(self.keys, self.costs)]
+
+    def _longest_match(self, digits):
+        """
+        Return the array index of the longest route prefix of the given
+        digits, or None if no route matches.
+        Running time: O(log n + d) for n routes and a match d parents up
+        from the binary search result, where d is at most the prefix length
+        """
+        digits = digits[:MAX_DIGITS]  # No stored prefix is any longer
+        if not digits.isdigit():
+            return None
+        key = encode(digits)
+        value = key >> LENGTH_BITS
+        keys, parents = self.keys, self.parents
+        # greatest prefix key that is not greater than the number's key
+        index = bisect_right(keys, key) - 1
+        while index >= 0:
+            prefix_key = keys[index]
+            scale = POWERS[MAX_DIGITS - (prefix_key & LENGTH_MASK)]
+            if (prefix_key >> LENGTH_BITS) // scale == value // scale:
+                return index
+            # the longest match, if any, is a prefix of this prefix
+            index = parents[index]
+        return None
+
+    def lookup(self, number):
+        """
+        Return the (prefix, cost) of the longest route prefix matching the
+        given phone number, or None if no route matches.
+        Running time: O(log n + l) for n routes and a number of length l
+        """
+        index = self._longest_match(normalize(number))
+        if index is None:
+            return None
+        return '+' + decode(self.keys[index]), from_fixed(self.costs[index])
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Running time: O(log n + l) for n routes and a number of length l
+        """
+        index = self._longest_match(normalize(number))
+        if index is None:
+            return NO_ROUTE_COST
+        return self.costs[index] / COST_SCALE
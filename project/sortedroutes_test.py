@@ -0,0 +1,114 @@
+#!python
+
+from sortedroutes import SortedRoutes, encode, decode
+from compacttrie import to_fixed
+from array import array
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES
+import random
+import unittest
+
+
+class SortedRoutesTest(unittest.TestCase):
+
+    def test_encode_and_decode(self):
+        assert decode(encode('1415')) == '1415'
+        assert decode(encode('0044')) == '0044'
+        assert decode(encode('')) == ''
+        # keys sort like the digit strings they encode
+        prefixes = ['1', '14', '140', '1401', '1399', '15', '2']
+        assert sorted(prefixes, key=encode) == sorted(prefixes)
+        with self.assertRaises(ValueError):
+            encode('1234567890123456')
+
+    def test_init(self):
+        index = SortedRoutes()
+        assert index.length() == 0
+        assert index.is_empty() is True
+        assert index.cost('+14152345678') == NO_ROUTE_COST
+
+    def test_init_with_routes(self):
+        index = SortedRoutes(ROUTES)
+        assert index.length() == 4
+        assert [decode(key) for key in index.keys] == \
+            ['1415', '1415234', '1415246', '1512']
+        # each route links to its longest stored proper prefix
+        assert list(index.parents) == [-1, 0, 0, -1]
+        assert index.bytes_per_route() == 16
+
+    def test_insert_and_get(self):
+        index = SortedRoutes()
+        index.insert('+1415', 0.02)
+        index.insert('+1415', 0.05)
+        assert index.get('+1415') == 0.05
+        assert index.length() == 1
+        assert index.contains('+1415') is True
+        assert index.contains('+141') is False
+        with self.assertRaises(KeyError):
+            index.get('+141')
+
+    def test_insert_relinks_parents(self):
+        index = SortedRoutes([('+1415234', 0.03), ('+1415246', 0.05)])
+        assert index.cost('+14159999999') == NO_ROUTE_COST
+        index.insert('+1415', 0.02)
+        assert list(index.parents) == [-1, 0, 0]
+        assert index.cost('+14159999999') == 0.02
+        assert index.cost('+14152599999') == 0.02
+
+    def test_delete(self):
+        index = SortedRoutes(ROUTES)
+        index.delete('+1415')
+        assert index.length() == 3
+        assert list(index.parents) == [-1, -1, -1]
+        assert index.cost('+14152345678') == 0.03
+        assert index.cost('+14159999999') == NO_ROUTE_COST
+        with self.assertRaises(KeyError):
+            index.delete('+1415')
+        with self.assertRaises(KeyError):
+            index.delete('+14')
+
+    def test_items(self):
+        assert SortedRoutes(ROUTES).items() == sorted(ROUTES)
+
+    def test_from_arrays(self):
+        routes = ROUTES + [('+1415', 0.025)]
+        keys = array('q', [encode(prefix[1:]) for prefix, _ in routes])
+        costs = array('i', [to_fixed(cost) for _, cost in routes])
+        index = SortedRoutes.from_arrays(keys, costs)
+        # the later +1415 route replaces the earlier one
+        assert index.items() == SortedRoutes(routes).items()
+        assert list(index.parents) == list(SortedRoutes(routes).parents)
+        assert index.get('+1415') == 0.025
+        # already sorted keys are taken as they are
+        ordered = SortedRoutes(ROUTES)
+        index = SortedRoutes.from_arrays(ordered.keys, ordered.costs)
+        assert index.items() == sorted(ROUTES)
+        assert SortedRoutes.from_arrays(array('q'), array('i')).is_empty()
+
+    def test_lookup_and_cost(self):
+        index = SortedRoutes(ROUTES)
+        assert index.lookup('+14152345678') == ('+1415234', 0.03)
+        assert index.lookup('+14159999999') == ('+1415', 0.02)
+        # the greatest key below this number is +1415246, not a match
+        assert index.lookup('+14152500000') == ('+1415', 0.02)
+        assert index.lookup('+19876543210') is None
+        assert index.cost('+15124156620') == 0.04
+        assert index.cost('+141523') == 0.02
+        assert index.cost('+19876543210') == NO_ROUTE_COST
+        assert index.cost('not a number') == NO_ROUTE_COST
+
+    def test_matches_route_trie(self):
+        routes = random_routes(500)
+        index = SortedRoutes(routes)
+        trie = RouteTrie(routes)
+        assert index.items() == trie.items()
+        rand = random.Random(9)
+        for _ in range(500):
+            number = '+' + ''.join(rand.choice('0123456789')
+                                   for _ in range(11))
+            assert index.lookup(number) == trie.lookup(number)
+
+
+if __name__ == '__main__':
+    unittest.main()
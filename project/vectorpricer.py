@@ -0,0 +1,185 @@
+#!python
+
+from pricer import read_numbers, write_costs, FILE_BUFFER_SIZE
+from routing import normalize, NO_ROUTE_COST
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only batch pricing needs it
+    np = None
+
+# Longest number that fits an int64 with room to spare (E.164 allows 15)
+MAX_DIGITS = 18
+# Phone numbers priced per vectorized batch when pricing a whole file
+BATCH_SIZE = 1 << 20
+
+
+class VectorRouteIndex(object):
+    """
+    Route index that prices whole arrays of phone numbers at once with numpy.
+    Routes are kept as one sorted int64 array of prefix values per prefix
+    length, with an aligned float64 array of costs. A batch of numbers is
+    converted to int64 values once, then for each prefix length from the
+    longest down, the numbers not yet matched are cut to that length by
+    integer division and searched for with np.searchsorted, so the Python
+    loop runs once per prefix length instead of once per number.
+    """
+
+    def __init__(self, routes=None):
+        """
+        Build this index from the given iterable of (prefix, cost) routes,
+        such as the items() of another route index. A later route with the
+        same prefix replaces an earlier one.
+        Running time: O(p log p) to sort p routes
+        """
+        if np is None:
+            raise ImportError('VectorRouteIndex requires numpy')
+        by_length = {}  # Maps prefix length to dict of prefix value -> cost
+        if routes is not None:
+            for prefix, cost in routes:
+                digits = normalize(prefix)
+                if not digits.isdigit() or len(digits) > MAX_DIGITS:
+                    raise ValueError('Invalid route prefix: {}'.format(prefix))
+                by_length.setdefault(len(digits), {})[int(digits)] = cost
+        self.size = sum(len(costs) for costs in by_length.values())
+        self.lengths = sorted(by_length, reverse=True)  # Longest first
+        self.prefixes = {}  # Maps prefix length to sorted int64 prefixes
+        self.costs = {}  # Maps prefix length to float64 costs of prefixes
+        for length, costs in by_length.items():
+            values = sorted(costs)
+            self.prefixes[length] = np.array(values, dtype=np.int64)
+            self.costs[length] = np.array([costs[value] for value in values],
+                                          dtype=np.float64)
+
+    def __repr__(self):
+        """Return a string representation of this vectorized route index."""
+        return 'VectorRouteIndex({} routes, lengths {})'.format(
+            self.size, sorted(self.lengths))
+
+    def is_empty(self):
+        """Return True if this index contains no routes."""
+        return self.size == 0
+
+    def length(self):
+        """Return the number of routes stored in this index."""
+        return self.size
+
+    def to_arrays(self, numbers):
+        """
+        Return a tuple of int64 arrays (values, lengths) of the digits of the
+        given phone numbers and their digit counts. Numbers are expected to
+        be stripped of whitespace, as read_numbers yields them. Numbers that
+        are not all digits after an optional '+' or are too long get a value
+        and length of 0 so that no route matches.
+        Running time: O(n * l) for n numbers of length l, mostly in numpy
+        """
+        chars = np.asarray(numbers, dtype=str)
+        # view the fixed-width strings as a matrix of character codes, one
+        # row per number, padded on the right with code 0
+        width = chars.dtype.itemsize // 4
+        codes = chars.view(np.uint32).reshape(len(chars), width)
+        lengths = np.count_nonzero(codes, axis=1)
+        skip = (codes[:, 0] == ord('+')).astype(np.int64) if width else 0
+        values = np.zeros(len(chars), dtype=np.int64)
+        valid = lengths > skip
+        for column in range(width):
+            inside = (column >= skip) & (column < lengths)
+            digits = codes[:, column].astype(np.int64) - ord('0')
+            valid &= ~inside | ((digits >= 0) & (digits <= 9))
+            values = np.where(inside, values * 10 + digits, values)
+        lengths = lengths - skip
+        valid &= lengths <= MAX_DIGITS
+        values[~valid] = 0
+        lengths[~valid] = 0
+        return values, lengths
+
+    def cost_array(self, numbers):
+        """
+        Return a float64 array of the cost of calling each of the given phone
+        numbers, aligned with the input, using each number's longest matching
+        route prefix or NO_ROUTE_COST if no route matches.
+        Running time: O(n * k * log p) for n numbers, k prefix lengths and
+        p routes, with each of the k passes vectorized over the numbers
+        """
+        values, lengths = self.to_arrays(numbers)
+        costs = np.full(len(values), NO_ROUTE_COST, dtype=np.float64)
+        unmatched = np.ones(len(values), dtype=bool)
+        powers = 10 ** np.arange(MAX_DIGITS + 1, dtype=np.int64)
+        for length in self.lengths:
+            # numbers still unmatched that are at least this long
+            which = np.flatnonzero(unmatched & (lengths >= length))
+            if len(which) == 0:
+                continue
+            candidates = values[which] // powers[lengths[which] - length]
+            prefixes = self.prefixes[length]
+            found = np.searchsorted(prefixes, candidates)
+            found[found == len(prefixes)] = 0  # Keep indexes in bounds
+            hit = prefixes[found] == candidates
+            costs[which[hit]] = self.costs[length][found[hit]]
+            unmatched[which[hit]] = False
+        return costs
+
+    def cost(self, number):
+        """
+        Return the cost of calling the given phone number using its longest
+        matching route prefix, or NO_ROUTE_COST if no route matches.
+        Pricing one number at a time is slow; prefer cost_array.
+        """
+        return float(self.cost_array([number])[0])
+
+
+def read_batches(path, batch_size=BATCH_SIZE):
+    """
+    Generate lists of up to batch_size phone numbers from the file at the
+    given path, so only one batch is held in memory at a time.
+    """
+    batch = []
+    for number in read_numbers(path):
+        batch.append(number)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def price_file_batch(index, numbers_path, costs_path, batch_size=BATCH_SIZE):
+    """
+    Price the phone numbers file at numbers_path with the given
+    VectorRouteIndex one batch at a time and write a call costs file to
+    costs_path. Return the number of numbers priced.
+    Space usage: O(batch_size) no matter how long the input file is
+    """
+    count = 0
+    with open(costs_path, 'w', buffering=FILE_BUFFER_SIZE) as costs_file:
+        for batch in read_batches(numbers_path, batch_size):
+            costs = index.cost_array(batch).tolist()
+            count += write_costs(zip(batch, costs), costs_file)
+    return count
+
+
+def main():
+    """Price a phone numbers file in vectorized batches."""
+    import sys
+    import time
+    from routefile import open_index
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) >= 3:
+        route_paths, numbers_path, costs_path = args[:-2], args[-2], args[-1]
+        start = time.time()
+        index = VectorRouteIndex(open_index(route_paths).items())
+        loaded = time.time()
+        count = price_file_batch(index, numbers_path, costs_path)
+        done = time.time()
+        print('Loaded {} routes in {:.3f} seconds'.format(index.length(),
+                                                        loaded - start))
+        print('Priced {} numbers in {:.3f} seconds ({:.0f} numbers/s)'.format(
+            count, done - loaded, count / max(done - loaded, 1e-9)))
+    else:
+        print('Usage: {} route-costs1.txt ... route-costsN.txt '
+              'phone-numbers.txt call-costs.txt'.format(sys.argv[0]))
+        print('  prices phone numbers in vectorized batches (needs numpy)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!python
+
+from vectorpricer import VectorRouteIndex, price_file_batch, read_batches, np
+from compacttrie_test import random_routes
+from routing import RouteTrie, NO_ROUTE_COST
+from routing_test import ROUTES, write_temp_file
+import os
+import random
+import unittest
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class VectorRouteIndexTest(unittest.TestCase):
+
+    def test_init(self):
+        index = VectorRouteIndex()
+        assert index.length() == 0
+        assert index.is_empty() is True
+        assert index.cost_array(['+14152345678']).tolist() == [NO_ROUTE_COST]
+        with self.assertRaises(ValueError):
+            VectorRouteIndex([('+14a', 0.01)])
+
+    def test_init_with_routes(self):
+        index = VectorRouteIndex(ROUTES)
+        assert index.length() == 4
+        assert index.lengths == [7, 4]
+        assert index.prefixes[7].tolist() == [1415234, 1415246]
+        assert index.costs[7].tolist() == [0.03, 0.01]
+
+    def test_to_arrays(self):
+        index = VectorRouteIndex(ROUTES)
+        numbers = ['+1415', '0044', 'abc', '', '+', '1+2']
+        values, lengths = index.to_arrays(numbers)
+        assert values.tolist() == [1415, 44, 0, 0, 0, 0]
+        assert lengths.tolist() == [4, 4, 0, 0, 0, 0]
+
+    def test_cost_array(self):
+        index = VectorRouteIndex(ROUTES)
+        numbers = ['+14152345678', '+14159999999', '+19876543210',
+                   '+15124156620', '+141523', '+1415', '+141', 'junk']
+        costs = index.cost_array(numbers)
+        assert costs.tolist() == [0.03, 0.02, 0, 0.04, 0.02, 0.02, 0, 0]
+        assert index.cost('+15124156620') == 0.04
+        assert len(index.cost_array([])) == 0
+
+    def test_leading_zero_prefixes(self):
+        index = VectorRouteIndex([('+044', 0.1), ('+44', 0.2)])
+        assert index.cost_array(['+0441', '+441']).tolist() == [0.1, 0.2]
+
+    def test_matches_route_trie(self):
+        routes = random_routes(500)
+        index = VectorRouteIndex(routes)
+        trie = RouteTrie(routes)
+        rand = random.Random(9)
+        numbers = ['+' + ''.join(rand.choice('0123456789') for _ in range(11))
+                   for _ in range(500)]
+        assert index.cost_array(numbers).tolist() == \
+            [trie.cost(number) for number in numbers]
+
+    def test_price_file_batch(self):
+        numbers_path = write_temp_file(['+15124156620', '+14152345678',
+                                        '+19876543210'])
+        costs_path = numbers_path + '.costs'
+        try:
+            assert list(read_batches(numbers_path, 2)) == \
+                [['+15124156620', '+14152345678'], ['+19876543210']]
+            index = VectorRouteIndex(ROUTES)
+            assert price_file_batch(index, numbers_path, costs_path, 2) == 3
+            with open(costs_path) as costs_file:
+                assert costs_file.read() == ('+15124156620,0.04\n'
+                                             '+14152345678,0.03\n'
+                                             '+19876543210,0\n')
+        finally:
+            os.remove(numbers_path)
+            if os.path.exists(costs_path):
+                os.remove(costs_path)
+
+
+if __name__ == '__main__':
+    unittest.main()